@@ -0,0 +1,136 @@
+"""Query budgets of dynamic requests.
+
+Used by `WithDynamicViewSetMixin` when a query budget (QUERY_BUDGET, or
+a viewset's `query_budget`) or N+1 detection (N_PLUS_ONE_THRESHOLD) is
+configured: the queries run while handling a request are counted, and
+requests that exceed their budget are logged or rejected. Queries that
+repeat with the same SQL shape, a sign of N+1 queries, are logged along
+with the serializer fields that ran them.
+"""
+import logging
+import re
+import sys
+from collections import Counter, defaultdict
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.fields import Field
+
+from dynamic_rest.plans import ExecuteWrapper
+
+logger = logging.getLogger(__name__)
+
+# Query budget actions
+LOG = "log"
+REJECT = "reject"
+
+# `IN (%s, %s, ...)` lists, which vary in length between identical queries
+IN_LIST = re.compile(r"\bIN \((?:%s, )*%s\)")
+
+
+class QueryBudgetExceeded(APIException):
+    """Raised when a request runs more queries than its budget allows."""
+
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "This request exceeds its query budget."
+    default_code = "query_budget_exceeded"
+
+
+def get_sql_shape(sql):
+    """Return the shape of a SQL query, ignoring the length of IN lists."""
+    return IN_LIST.sub("IN (...)", sql)
+
+
+def get_current_field():
+    """Return the label of the serializer field being evaluated, or None.
+
+    The label is `<serializer class>.<field name>`, for the innermost
+    named serializer field found on the call stack.
+    """
+    frame = sys._getframe(1)  # pylint: disable=protected-access
+    while frame is not None:
+        field = frame.f_locals.get("self")
+        if isinstance(field, Field) and field.field_name:
+            return f"{type(field.parent).__name__}.{field.field_name}"
+        frame = frame.f_back
+    return None
+
+
+class QueryBudget(ExecuteWrapper):
+    """Count the queries run on all database connections.
+
+    Queries run on other threads (e.g. concurrent prefetches) are
+    not counted.
+    """
+
+    def __init__(self, budget=None, action=LOG, threshold=None):
+        """Initialize the query budget.
+
+        Arguments:
+            budget: The maximum number of queries, or None.
+            action: LOG to log requests over budget, or REJECT to
+                raise QueryBudgetExceeded before the first query
+                over budget runs.
+            threshold: The number of queries with the same shape that
+                are reported as N+1 queries, or None.
+        """
+        self.budget = budget
+        self.action = action
+        self.threshold = threshold
+        self.count = 0
+        self.shapes = Counter()
+        self.fields = defaultdict(set)
+
+    def __call__(self, execute, sql, params, many, context):
+        """Count a query, then run it (as a connection execute wrapper)."""
+        self.count += 1
+        if self.action == REJECT and self.is_exceeded():
+            raise QueryBudgetExceeded(
+                f"This request exceeds its query budget of {self.budget} queries."
+            )
+        if self.threshold:
+            shape = get_sql_shape(sql)
+            self.shapes[shape] += 1
+            if field := get_current_field():
+                self.fields[shape].add(field)
+        return execute(sql, params, many, context)
+
+    def is_exceeded(self):
+        """Return True if more queries than the budget allows were run."""
+        return self.budget is not None and self.count > self.budget
+
+    def get_repeated_queries(self):
+        """Return the queries that ran at least `threshold` times.
+
+        Returns:
+            A list of dicts with the shape (`sql`), number of runs
+            (`count`) and serializer fields (`fields`) of each query.
+        """
+        if not self.threshold:
+            return []
+        return [
+            {"sql": shape, "count": count, "fields": sorted(self.fields[shape])}
+            for shape, count in self.shapes.most_common()
+            if count >= self.threshold
+        ]
+
+    def report(self, request):
+        """Log the request if it exceeded its budget or ran N+1 queries."""
+        path = request.get_full_path()
+        if self.is_exceeded():
+            logger.warning(
+                "Query budget exceeded: %s %s ran %d queries (budget: %d)",
+                request.method,
+                path,
+                self.count,
+                self.budget,
+            )
+        for query in self.get_repeated_queries():
+            logger.warning(
+                "Possible N+1 queries: %s %s ran %d times (fields: %s): %s",
+                request.method,
+                path,
+                query["count"],
+                ", ".join(query["fields"]) or "unknown",
+                query["sql"],
+            )
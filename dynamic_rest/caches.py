@@ -0,0 +1,127 @@
+"""Process-wide caches used by DREST."""
+import threading
+import weakref
+from collections import OrderedDict
+
+from django.test.signals import setting_changed
+
+# Caches are invalidated when any of these Django settings change.
+INVALIDATING_SETTINGS = ("DYNAMIC_REST", "REST_FRAMEWORK")
+
+_CACHES = weakref.WeakSet()
+
+
+class LRUCache(object):
+    """A thread-safe, bounded cache with least-recently-used eviction.
+
+    The cache can be bounded by number of entries, by total size
+    (where each entry's size is provided by the caller), or both.
+    Hits, misses and evictions are counted so that cache effectiveness
+    can be monitored in long-lived processes.
+
+    All instances are cleared whenever DREST or DRF settings change.
+    """
+
+    def __init__(self, max_entries=None, max_size=None):
+        """Initialize the cache.
+
+        Arguments:
+            max_entries: Maximum number of entries, or a callable
+                returning it. None means unbounded.
+            max_size: Maximum total size of all entries, or a callable
+                returning it. None means unbounded.
+        """
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._sizes = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        _CACHES.add(self)
+
+    @staticmethod
+    def _get_limit(limit):
+        """Resolve a limit that may be given as a callable."""
+        return limit() if callable(limit) else limit
+
+    def get(self, key, default=None):
+        """Return the value for `key`, marking it as recently used."""
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, size=1):
+        """Store `value` under `key`, evicting old entries if necessary.
+
+        Entries that are larger than the maximum size are not stored.
+        """
+        max_entries = self._get_limit(self.max_entries)
+        max_size = self._get_limit(self.max_size)
+        if max_size is not None and size > max_size:
+            return
+
+        with self._lock:
+            if key in self._data:
+                self._size -= self._sizes.pop(key)
+                del self._data[key]
+
+            self._data[key] = value
+            self._sizes[key] = size
+            self._size += size
+
+            while (max_entries is not None and len(self._data) > max_entries) or (
+                max_size is not None and self._size > max_size
+            ):
+                evicted, _ = self._data.popitem(last=False)
+                self._size -= self._sizes.pop(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._size = 0
+
+    def stats(self):
+        """Return a dict of cache statistics."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._data),
+                "size": self._size,
+            }
+
+    def __contains__(self, key):
+        """Check whether `key` is cached, without affecting statistics."""
+        return key in self._data
+
+    def __len__(self):
+        """Return the number of entries."""
+        return len(self._data)
+
+
+def clear_caches():
+    """Clear all DREST caches."""
+    for cache in list(_CACHES):
+        cache.clear()
+
+
+def _settings_changed(*_, **kwargs):
+    """Invalidate caches when relevant settings change."""
+    if kwargs["setting"] in INVALIDATING_SETTINGS:
+        clear_caches()
+
+
+setting_changed.connect(_settings_changed)
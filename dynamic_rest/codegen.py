@@ -0,0 +1,208 @@
+"""Code generation of specialized serializer representation functions.
+
+`WithDynamicSerializerMixin._faster_to_representation` decides how to read
+each field on every row. When ENABLE_COMPILED_REPRESENTATIONS is set, those
+decisions are made once per serializer shape instead: the Python source of
+a function that reads every field in the right way is generated, compiled,
+cached, and then bound to the field objects of each serializer instance.
+"""
+import keyword
+import logging
+
+from rest_framework import fields as drf_fields
+from rest_framework.fields import SkipField
+
+from dynamic_rest.caches import LRUCache
+from dynamic_rest.fields import DynamicGenericRelationField, DynamicRelationField
+from dynamic_rest.meta import get_model_field
+from dynamic_rest.prefetch import FastObject
+
+logger = logging.getLogger(__name__)
+
+FACTORIES = LRUCache(max_entries=1024)
+
+# How a field is read from a FastObject row.
+FAST_RELATION = "relation"  # via field.get_attribute()
+FAST_ID = "id"  # via row[source], falling back to row[source + "_id"]
+FAST_KEY = "key"  # via row[source]
+
+# How a field is read from a model instance.
+MODEL_GETTER = "getter"  # via field.get_attribute()
+MODEL_COLUMN = "column"  # via instance.<attname>
+
+
+def _fast_fallback(field, instance):
+    """Read a field that is missing from a FastObject row."""
+    field_source = field.source
+    if hasattr(instance, field_source):
+        return getattr(instance, field_source)
+    # Fall back on DRF behavior
+    attribute = field.get_attribute(instance)
+    logger.debug(
+        "Missing %s from %s", field.field_name, field.parent.__class__.__name__
+    )
+    return attribute
+
+
+def _is_model_column(model, field):
+    """Check whether a field maps directly onto a local model column."""
+    if model is None or type(field).get_attribute is not drf_fields.Field.get_attribute:
+        return False
+
+    source = field.source
+    if (
+        not source
+        or source == "*"
+        or "." in source
+        or not source.isidentifier()
+        or keyword.iskeyword(source)
+    ):
+        return False
+
+    try:
+        model_field = get_model_field(model, source)
+    except AttributeError:
+        return False
+    return (
+        getattr(model_field, "concrete", False)
+        and not model_field.is_relation
+        and model_field.attname == source
+    )
+
+
+def get_field_spec(serializer):
+    """Return a hashable description of how to read each readable field."""
+    model = serializer.get_model()
+    id_fields = serializer._readable_id_fields  # pylint: disable=protected-access
+    spec = []
+    for field in serializer._readable_fields:  # pylint: disable=protected-access
+        if isinstance(field, (DynamicGenericRelationField, DynamicRelationField)):
+            fast_kind = FAST_RELATION
+        elif field in id_fields:
+            fast_kind = FAST_ID
+        else:
+            fast_kind = FAST_KEY
+        model_kind = MODEL_COLUMN if _is_model_column(model, field) else MODEL_GETTER
+        spec.append((field.field_name, field.source, fast_kind, model_kind))
+    return tuple(spec)
+
+
+def _generate_getter(lines, i, name):
+    """Generate code that reads a field with `field.get_attribute`."""
+    lines.extend(
+        [
+            "        try:",
+            f"            attribute = get_{i}(instance)",
+            "        except SkipField:",
+            "            pass",
+            "        else:",
+            f"            ret[{name!r}] = "
+            f"None if attribute is None else rep_{i}(attribute)",
+        ]
+    )
+
+
+def generate_source(spec):
+    """Generate the source of a representation function factory."""
+    lines = ["def factory(fields, model, fallback, default):"]
+    for i, _ in enumerate(spec):
+        lines.extend(
+            [
+                f"    field_{i} = fields[{i}]",
+                f"    get_{i} = field_{i}.get_attribute",
+                f"    rep_{i} = field_{i}.to_representation",
+            ]
+        )
+
+    lines.extend(["", "    def fast(instance):", "        ret = {}"])
+    for i, (name, source, fast_kind, _) in enumerate(spec):
+        if fast_kind == FAST_RELATION:
+            _generate_getter(lines, i, name)
+            continue
+
+        if fast_kind == FAST_ID:
+            lines.extend(
+                [
+                    f"        if {source!r} not in instance:",
+                    f"            ret[{name!r}] = instance.get({source + '_id'!r})",
+                    "        else:",
+                    f"            attribute = instance[{source!r}]",
+                    f"            ret[{name!r}] = "
+                    f"None if attribute is None else rep_{i}(attribute)",
+                ]
+            )
+            continue
+
+        lines.extend(
+            [
+                "        try:",
+                f"            attribute = instance[{source!r}]",
+                "        except KeyError:",
+                f"            attribute = fallback(field_{i}, instance)",
+                f"        ret[{name!r}] = "
+                f"None if attribute is None else rep_{i}(attribute)",
+            ]
+        )
+    lines.extend(["        return ret", ""])
+
+    lines.extend(["    def slow(instance):", "        ret = {}"])
+    for i, (name, source, _, model_kind) in enumerate(spec):
+        if model_kind == MODEL_COLUMN:
+            lines.extend(
+                [
+                    f"        attribute = instance.{source}",
+                    f"        ret[{name!r}] = "
+                    f"None if attribute is None else rep_{i}(attribute)",
+                ]
+            )
+        else:
+            _generate_getter(lines, i, name)
+    lines.extend(["        return ret", ""])
+
+    lines.extend(
+        [
+            "    def to_representation(instance):",
+            "        if isinstance(instance, FastObject):",
+            "            return fast(instance)",
+            "        if isinstance(instance, model):",
+            "            return slow(instance)",
+            "        return default(instance)",
+            "",
+            "    return to_representation",
+        ]
+    )
+    return "\n".join(lines)
+
+
+def get_factory(serializer_class, spec):
+    """Return the compiled factory for a serializer class and field spec."""
+    key = (serializer_class, spec)
+    factory = FACTORIES.get(key)
+    if factory is None:
+        namespace = {"FastObject": FastObject, "SkipField": SkipField}
+        code = compile(
+            generate_source(spec),
+            f"<dynamic_rest.codegen {serializer_class.__name__}>",
+            "exec",
+        )
+        exec(code, namespace)  # pylint: disable=exec-used
+        factory = namespace["factory"]
+        FACTORIES.set(key, factory)
+    return factory
+
+
+def compile_representation(serializer):
+    """Return a specialized `to_representation` function for a serializer.
+
+    The returned function produces the same plain dict as
+    `_faster_to_representation`, for FastObject rows and instances of the
+    serializer's model. Other objects are delegated to that method.
+    """
+    spec = get_field_spec(serializer)
+    factory = get_factory(serializer.__class__, spec)
+    return factory(
+        list(serializer._readable_fields),  # pylint: disable=protected-access
+        serializer.get_model() or object,
+        _fast_fallback,
+        serializer._faster_to_representation,  # pylint: disable=protected-access
+    )
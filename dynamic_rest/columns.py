@@ -0,0 +1,143 @@
+"""Column-at-a-time serialization helpers.
+
+Used by `DynamicListSerializer.batch_to_representation` to read and
+represent one field for a whole page of rows at a time, instead of
+reading every field of one row at a time.
+"""
+from operator import attrgetter
+
+from rest_framework import fields as drf_fields
+from rest_framework.fields import SkipField
+
+from dynamic_rest.codegen import (
+    FAST_ID,
+    FAST_KEY,
+    MODEL_COLUMN,
+    _fast_fallback,
+    get_field_spec,
+)
+from dynamic_rest.fields import DynamicField
+from dynamic_rest.prefetch import FastObject
+
+# Marks a value that should be omitted from the row, i.e. SkipField.
+SKIP = object()
+
+# Field representations that return primitive values unchanged, mapped to
+# the exact type of those values. Values of any other type are converted.
+PRIMITIVE_REPRESENTATIONS = {
+    DynamicField.to_representation: None,
+    drf_fields.CharField.to_representation: str,
+    drf_fields.IntegerField.to_representation: int,
+    drf_fields.FloatField.to_representation: float,
+}
+
+
+def _read_with_getter(field, instances):
+    """Read a column with `field.get_attribute`."""
+    get_attribute = field.get_attribute
+    values = []
+    for instance in instances:
+        try:
+            values.append(get_attribute(instance))
+        except SkipField:
+            values.append(SKIP)
+    return values
+
+
+def _read_fast_key(field, instances):
+    """Read a column from FastObject rows by key."""
+    source = field.source
+    values = []
+    for instance in instances:
+        try:
+            values.append(instance[source])
+        except KeyError:
+            values.append(_fast_fallback(field, instance))
+    return values
+
+
+def _read_fast_id(field, instances):
+    """Read a related id column from FastObject rows.
+
+    Returns represented values: rows without the related object
+    use the raw `<source>_id` value, as in `_faster_to_representation`.
+    """
+    source = field.source
+    source_id = f"{source}_id"
+    to_representation = field.to_representation
+    values = []
+    for instance in instances:
+        if source not in instance:
+            values.append(instance.get(source_id))
+        else:
+            value = instance[source]
+            values.append(None if value is None else to_representation(value))
+    return values
+
+
+def represent_column(field, values):
+    """Apply `field.to_representation` to a column of values in place.
+
+    Columns that are entirely None (or skipped) are left as they are,
+    and columns of primitive fields whose values already have the
+    represented type are not converted.
+    """
+    if all(value is None or value is SKIP for value in values):
+        return values
+
+    to_representation = field.to_representation
+    method = getattr(type(field), "to_representation", None)
+    if method in PRIMITIVE_REPRESENTATIONS:
+        value_type = PRIMITIVE_REPRESENTATIONS[method]
+        # exact types only: bool and str subclass values must be converted
+        if value_type is None or all(
+            value is None
+            or value is SKIP
+            or type(value) is value_type  # pylint: disable=unidiomatic-typecheck
+            for value in values
+        ):
+            return values
+
+    for i, value in enumerate(values):
+        if value is not None and value is not SKIP:
+            values[i] = to_representation(value)
+    return values
+
+
+def get_columns(serializer, instances):
+    """Return the represented columns of a serializer for a list of rows.
+
+    Arguments:
+        serializer: A DREST serializer.
+        instances: A list of FastObject rows, or of model instances.
+
+    Returns:
+        A list of (field name, values) tuples in field order, where values
+        are represented and SKIP marks values that should be omitted,
+        or None if the rows are not all of a supported type.
+    """
+    model = serializer.get_model()
+    if all(isinstance(instance, FastObject) for instance in instances):
+        is_fast = True
+    elif model is not None and all(isinstance(i, model) for i in instances):
+        is_fast = False
+    else:
+        return None
+
+    columns = []
+    fields = serializer._readable_fields  # pylint: disable=protected-access
+    for field, spec in zip(fields, get_field_spec(serializer)):
+        name, source, fast_kind, model_kind = spec
+        if is_fast and fast_kind == FAST_ID:
+            columns.append((name, _read_fast_id(field, instances)))
+            continue
+
+        if is_fast and fast_kind == FAST_KEY:
+            values = _read_fast_key(field, instances)
+        elif not is_fast and model_kind == MODEL_COLUMN:
+            values = list(map(attrgetter(source), instances))
+        else:
+            # relations, and fields without a faster way to read them
+            values = _read_with_getter(field, instances)
+        columns.append((name, represent_column(field, values)))
+    return columns
@@ -10,6 +10,29 @@ DYNAMIC_REST = {
     # ENABLE_BROWSABLE_API: enable/disable the browsable API.
     # It can be useful to disable it in production.
     "ENABLE_BROWSABLE_API": True,
+    # ENABLE_ORJSON_RENDERER: render JSON with orjson (DynamicJSONRenderer)
+    # instead of DRF's JSONRenderer in dynamic viewsets
+    "ENABLE_ORJSON_RENDERER": True,
+    # ORJSON_STRICT_FLOATS: render NaN and infinite floats as JSONRenderer
+    # does (an error, or NaN/Infinity if STRICT_JSON is disabled) rather
+    # than as null. This scans the data of every response containing null.
+    "ORJSON_STRICT_FLOATS": False,
+    # ENABLE_QUERY_PLAN: return the queries run by a request, with their
+    # timings, when it has `debug=plan` (or `debug=explain` to also run
+    # EXPLAIN). This exposes SQL, so it should not be enabled publicly.
+    "ENABLE_QUERY_PLAN": False,
+    # QUERY_BUDGET: maximum number of queries run by a request to a dynamic
+    # viewset (None for no limit); viewsets can override it with
+    # `query_budget`
+    "QUERY_BUDGET": None,
+    # QUERY_BUDGET_ACTION: "log" to log requests that exceed their query
+    # budget, or "reject" to fail them with a 400 response; viewsets can
+    # override it with `query_budget_action`
+    "QUERY_BUDGET_ACTION": "log",
+    # N_PLUS_ONE_THRESHOLD: log queries that run at least this many times
+    # in a request with the same SQL (a sign of N+1 queries), along with
+    # the serializer fields that ran them (None to disable)
+    "N_PLUS_ONE_THRESHOLD": None,
     # ENABLE_LINKS: enable/disable relationship links
     "ENABLE_LINKS": True,
     # ENABLE_SERIALIZER_CACHE: enable/disable caching of related serializers
@@ -21,12 +44,64 @@ DYNAMIC_REST = {
     "ENABLE_SERIALIZER_OBJECT_CACHE": True,
     # ENABLE_SERIALIZER_OPTIMIZATIONS: enable/disable representation speedups
     "ENABLE_SERIALIZER_OPTIMIZATIONS": True,
+    # ENABLE_COMPILED_REPRESENTATIONS: generate and compile a specialized
+    # representation function for each serializer shape, so that fields
+    # are not type-checked for every row. Requires serializer optimizations.
+    "ENABLE_COMPILED_REPRESENTATIONS": False,
+    # ENABLE_COLUMNAR_SERIALIZATION: represent lists one field at a time
+    # for all rows, instead of one row at a time.
+    "ENABLE_COLUMNAR_SERIALIZATION": False,
     # ENABLE_BULK_PARTIAL_CREATION: enable/disable partial creation in bulk
     "ENABLE_BULK_PARTIAL_CREATION": False,
+    # ENABLE_BULK_CREATE: create the resources of bulk POST requests with
+    # QuerySet.bulk_create, without calling model save() or sending signals
+    "ENABLE_BULK_CREATE": False,
+    # BULK_CREATE_BATCH_SIZE: number of rows inserted per query by
+    # bulk creation (None for a single query)
+    "BULK_CREATE_BATCH_SIZE": 1000,
     # ENABLE_BULK_UPDATE: enable/disable update in bulk
     "ENABLE_BULK_UPDATE": True,
+    # BULK_UPDATE_MODE: how records of bulk PATCH/PUT requests are written:
+    # "loop" to save each record (running model signals), or "bulk" to write
+    # the changed fields with QuerySet.bulk_update
+    "BULK_UPDATE_MODE": "loop",
+    # BULK_UPDATE_BATCH_SIZE: number of rows written per query
+    # by QuerySet.bulk_update (None for a single query)
+    "BULK_UPDATE_BATCH_SIZE": 1000,
+    # ENABLE_BULK_DELETE: delete the resources of bulk DELETE requests with
+    # a single QuerySet.delete, instead of calling perform_destroy for each
+    "ENABLE_BULK_DELETE": False,
+    # BULK_DELETE_BATCH_SIZE: number of records deleted per query
+    # by bulk deletion (None for a single query)
+    "BULK_DELETE_BATCH_SIZE": None,
     # ENABLE_PATCH_ALL: enable/disable patch by queryset
     "ENABLE_PATCH_ALL": False,
+    # ENABLE_STREAMING: enable/disable streamed list responses
+    # (requested with `?stream=true`)
+    "ENABLE_STREAMING": False,
+    # STREAMING_CHUNK_SIZE: number of records serialized at a time
+    # in streamed list responses
+    "STREAMING_CHUNK_SIZE": 1000,
+    # PREFETCH_CHUNK_SIZE: maximum number of IDs in a single `IN` lookup
+    # when FastQuery merges prefetched relations (None to disable chunking)
+    "PREFETCH_CHUNK_SIZE": 1000,
+    # PREFETCH_MAX_WORKERS: number of threads used to run the queries of
+    # sibling FastQuery prefetches concurrently (0 to run them serially).
+    # The threads are shared by all requests, and each keeps its own
+    # database connection open until the process exits.
+    "PREFETCH_MAX_WORKERS": 0,
+    # ENABLE_SINGLE_QUERY_M2M: fetch many-to-many prefetches in a single
+    # query through the join table, unless the prefetch queryset is
+    # filtered, sliced or uses DISTINCT ON
+    "ENABLE_SINGLE_QUERY_M2M": True,
+    # FILTER_KEY_CACHE_SIZE: number of filter keys cached by serializer
+    # class, so that filter field names are not rewritten on every request
+    # (0 to disable); assumes a serializer class always has the same fields
+    "FILTER_KEY_CACHE_SIZE": 1024,
+    # ORDERING_CACHE_SIZE: number of sort term orderings cached by serializer
+    # class, so that sort terms are not resolved on every request
+    # (0 to disable); assumes a serializer class always has the same fields
+    "ORDERING_CACHE_SIZE": 1024,
     # DEFER_MANY_RELATIONS: automatically defer many-relations, unless
     # `deferred=False` is explicitly set on the field.
     "DEFER_MANY_RELATIONS": False,
@@ -46,9 +121,25 @@ DYNAMIC_REST = {
     # PAGE_SIZE_QUERY_PARAM: global setting for the page size query parameter.
     # Can be overriden at the viewset level.
     "PAGE_SIZE_QUERY_PARAM": "per_page",
+    # CURSOR_QUERY_PARAM: global setting for the cursor query parameter
+    # used by keyset pagination.
+    # Can be overriden at the viewset level.
+    "CURSOR_QUERY_PARAM": "cursor",
     # EXCLUDE_COUNT_QUERY_PARAM: global setting for the query parameter
     # that disables counting during PageNumber pagination
     "EXCLUDE_COUNT_QUERY_PARAM": "exclude_count",
+    # COUNT_STRATEGY: global setting for how total results are counted
+    # for pagination metadata: ExactCount, CachedCount or EstimatedCount
+    # from dynamic_rest.counts (or a path to a custom strategy class).
+    # Can be overriden at the viewset level with `count_strategy`.
+    "COUNT_STRATEGY": "dynamic_rest.counts.ExactCount",
+    # COUNT_CACHE_ALIAS: cache used by the CachedCount strategy
+    "COUNT_CACHE_ALIAS": "default",
+    # COUNT_CACHE_TIMEOUT: seconds that CachedCount keeps counts
+    "COUNT_CACHE_TIMEOUT": 60,
+    # COUNT_ESTIMATE_THRESHOLD: EstimatedCount counts exactly when
+    # the estimate is below this number of results
+    "COUNT_ESTIMATE_THRESHOLD": 1000,
     # ADDITIONAL_PRIMARY_RESOURCE_PREFIX: String to prefix additional
     # instances of the primary resource when sideloading.
     "ADDITIONAL_PRIMARY_RESOURCE_PREFIX": "+",
@@ -59,6 +150,12 @@ DYNAMIC_REST = {
     # Enables caching of serializer fields to speed up serializer usage
     # Needs to also be configured on a per-serializer basis
     "ENABLE_FIELDS_CACHE": False,
+    # FIELDS_CACHE_MAX_ENTRIES: maximum number of field sets kept in each
+    # of the fields caches (least-recently-used are evicted first)
+    "FIELDS_CACHE_MAX_ENTRIES": 512,
+    # FIELDS_CACHE_MAX_SIZE: maximum number of field objects kept
+    # across all entries of each of the fields caches
+    "FIELDS_CACHE_MAX_SIZE": 16384,
     # Enables use of hashid fields
     "ENABLE_HASHID_FIELDS": False,
     # Salt value to salt hash ids.
@@ -69,6 +166,7 @@ DYNAMIC_REST = {
 
 # Attributes where the value should be a class (or path to a class)
 CLASS_ATTRS = [
+    "COUNT_STRATEGY",
     "LIST_SERIALIZER_CLASS",
 ]
 
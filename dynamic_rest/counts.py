@@ -0,0 +1,143 @@
+"""Count strategies used for pagination metadata.
+
+A count strategy returns the total number of results of a paginated
+queryset, and whether that number is approximate. The strategy is
+selected with the COUNT_STRATEGY setting, or per viewset with a
+`count_strategy` attribute.
+"""
+import hashlib
+import inspect
+import json
+
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.inspect import method_has_no_args
+
+from dynamic_rest.conf import settings
+from dynamic_rest.prefetch import FastQuery
+
+
+def _get_queryset(object_list):
+    """Return the Django QuerySet of an object list, if it has one."""
+    if isinstance(object_list, FastQuery):
+        return object_list.queryset
+    if isinstance(object_list, QuerySet):
+        return object_list
+    return None
+
+
+class ExactCount(object):
+    """Count results exactly, with `COUNT(*)` for querysets."""
+
+    # True if this strategy never returns approximate counts
+    exact = True
+
+    def count(self, object_list):
+        """Return a (count, approximate) tuple for an object list."""
+        c = getattr(object_list, "count", None)
+        if callable(c) and not inspect.isbuiltin(c) and method_has_no_args(c):
+            return c(), False
+        return len(object_list), False
+
+
+class CachedCount(ExactCount):
+    """Cache exact counts per query, for COUNT_CACHE_TIMEOUT seconds.
+
+    Counts are cached in the COUNT_CACHE_ALIAS cache, keyed by the SQL
+    and parameters of the query (without ordering), so equivalent
+    filters share a count. Counts read from the cache may be stale,
+    and are reported as approximate.
+    """
+
+    exact = False
+    key_prefix = "dynamic_rest:count"
+
+    def get_cache_key(self, queryset):
+        """Return the cache key of a queryset, or None."""
+        try:
+            sql, params = queryset.order_by().query.sql_with_params()
+        except EmptyResultSet:
+            return None
+        signature = f"{queryset.db}:{sql}:{params!r}"
+        digest = hashlib.sha1(signature.encode()).hexdigest()
+        return f"{self.key_prefix}:{digest}"
+
+    def count(self, object_list):
+        """Return a (count, approximate) tuple for an object list."""
+        queryset = _get_queryset(object_list)
+        key = None if queryset is None else self.get_cache_key(queryset)
+        if key is None:
+            return super().count(object_list)
+
+        cache = caches[settings.COUNT_CACHE_ALIAS]
+        count = cache.get(key)
+        if count is not None:
+            return count, True
+
+        count, _ = super().count(object_list)
+        cache.set(key, count, settings.COUNT_CACHE_TIMEOUT)
+        return count, False
+
+
+class EstimatedCount(ExactCount):
+    """Estimate counts with the database planner.
+
+    On PostgreSQL, unfiltered queries are estimated from the table's
+    `reltuples` statistic and other queries from the row estimate of
+    `EXPLAIN`. Estimates below COUNT_ESTIMATE_THRESHOLD, and counts on
+    other databases, are exact.
+    """
+
+    exact = False
+
+    def get_estimate(self, queryset):
+        """Return the planner's row estimate for a queryset, or None."""
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return None
+
+        queryset = queryset.order_by()
+        meta = queryset.model._meta  # pylint: disable=protected-access
+        query = queryset.query
+        with connection.cursor() as cursor:
+            if not query.where and not query.distinct and not query.combinator:
+                cursor.execute(
+                    "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                    [connection.ops.quote_name(meta.db_table)],
+                )
+                row = cursor.fetchone()
+                # tables that have never been analyzed have no statistics
+                if row and row[0] >= 0:
+                    return int(row[0])
+
+            try:
+                sql, params = query.sql_with_params()
+            except EmptyResultSet:
+                return 0
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    def count(self, object_list):
+        """Return a (count, approximate) tuple for an object list."""
+        queryset = _get_queryset(object_list)
+        estimate = None if queryset is None else self.get_estimate(queryset)
+        if estimate is None or estimate < settings.COUNT_ESTIMATE_THRESHOLD:
+            return super().count(object_list)
+        return estimate, True
+
+
+def get_count_strategy(view=None, default=None):
+    """Return the count strategy of a view.
+
+    Arguments:
+        view: A view that may set `count_strategy` to a strategy class.
+        default: The strategy class used if the view does not set one,
+            by default COUNT_STRATEGY.
+    """
+    strategy = getattr(view, "count_strategy", None) or default
+    return (strategy or settings.COUNT_STRATEGY)()
@@ -2,9 +2,14 @@
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from dynamic_rest.caches import LRUCache
+from dynamic_rest.conf import settings
 from dynamic_rest.meta import get_model_field, is_model_field
 from dynamic_rest.related import RelatedObject
 
+# (query key, field class) by (serializer class, field, operator)
+QUERY_KEYS = LRUCache(max_entries=lambda: settings.FILTER_KEY_CACHE_SIZE)
+
 
 class FilterNode(object):
     """A node in a filter tree."""
@@ -103,6 +108,32 @@ class FilterNode(object):
 
         return "__".join(rewritten), field
 
+    def get_query_key(self, serializer):
+        """Get the filter key and the class of the filtered field.
+
+        Like `generate_query_key`, but the result is cached by serializer
+        class, so the serializer fields are only walked once per filter.
+        The cache holds at most FILTER_KEY_CACHE_SIZE entries, dropping
+        the least recently used ones.
+
+        Arguments:
+            serializer: A DRF serializer
+
+        Returns:
+            A (filter key, field class) tuple.
+        """
+        if not settings.FILTER_KEY_CACHE_SIZE:
+            key, field = self.generate_query_key(serializer)
+            return key, type(field)
+
+        cache_key = (type(serializer), tuple(self.field), self.operator)
+        result = QUERY_KEYS.get(cache_key)
+        if result is None:
+            key, field = self.generate_query_key(serializer)
+            result = (key, type(field))
+            QUERY_KEYS.set(cache_key, result)
+        return result
+
 
 class TreeMap(dict):
     """Tree structure implemented with nested dictionaries."""
@@ -4,6 +4,7 @@ import importlib
 
 import orjson
 from django.core.exceptions import ObjectDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.utils.functional import cached_property
 from rest_framework import fields
 from rest_framework.exceptions import ParseError, ValidationError
@@ -23,6 +24,18 @@ from dynamic_rest.utils import (
     internal_id_from_model_and_external_id,
 )
 
+# Serializer context key of the related instances resolved for a bulk payload,
+# as a dict of related models to dicts of primary keys to instances (or None).
+RELATED_INSTANCES = "related_instances"
+
+
+def _to_pk(model, value):
+    """Convert a serialized ID to a primary key of a model, or None."""
+    try:
+        return model._meta.pk.to_python(value)  # pylint: disable=protected-access
+    except (DjangoValidationError, TypeError, ValueError):
+        return None
+
 
 class DynamicField(CacheableFieldMixin, fields.Field):
     """Generic field base to capture additional custom field attributes."""
@@ -313,30 +326,94 @@ class DynamicRelationField(WithRelationalFieldMixin, DynamicField):
 
         return serializer.to_representation(instance)
 
-    def to_internal_value_single(self, data, serializer):
-        """Return the underlying object, given the serialized form."""
+    def _get_related_instances(self, related_model):
+        """Return the related instances resolved for a bulk payload, or None.
+
+        Instances are shared through the serializer context (see
+        `WithDynamicSerializerMixin.resolve_related_instances`).
+        """
+        instances = self.context.get(RELATED_INSTANCES)
+        if instances is None:
+            return None
+        return instances.setdefault(related_model, {})
+
+    def resolve_related(self, related_model, values, instances=None):
+        """Resolve related IDs to instances with a single query.
+
+        Arguments:
+            related_model: The related model.
+            values: A list of serialized related IDs.
+            instances: A dict of already resolved instances, updated
+                in place.
+
+        Returns:
+            A dict mapping resolved primary keys to their instance, or
+            to None if no instance exists. IDs that are not valid
+            primary keys are left out.
+        """
+        if instances is None:
+            instances = {}
+        pks = set()
+        for value in values:
+            if isinstance(value, related_model):
+                continue
+            pk = _to_pk(related_model, value)
+            if pk is not None and pk not in instances:
+                pks.add(pk)
+        if pks:
+            found = related_model.objects.in_bulk(pks)
+            for pk in pks:
+                instances[pk] = found.get(pk)
+        return instances
+
+    def to_internal_value_single(self, data, serializer, instances=None):
+        """Return the underlying object, given the serialized form.
+
+        Arguments:
+            data: The serialized related ID.
+            serializer: The related serializer.
+            instances: Related instances resolved ahead of time
+                (see `resolve_related`), if any.
+        """
         related_model = serializer.Meta.model
         if isinstance(data, related_model):
             return data
+        if instances is None:
+            instances = self._get_related_instances(related_model)
+        pk = _to_pk(related_model, data) if instances else None
+        if pk is not None and pk in instances:
+            instance = instances[pk]
+            if instance is None:
+                raise self._get_not_found_error(related_model, data)
+            return instance
         try:
             instance = related_model.objects.get(pk=data)
         except related_model.DoesNotExist as exc:
-            # TODO: This causes issues with 400 errors
-            # Investigate usage and make it return a dict of errors instead.
-            raise ValidationError(
-                f"Invalid value for '{self.field_name}': {related_model.__name__}"
-                f" object with ID={data} not found"
-            ) from exc
+            raise self._get_not_found_error(related_model, data) from exc
         return instance
 
+    def _get_not_found_error(self, related_model, data):
+        """Return the error raised for a related ID that does not exist."""
+        # TODO: This causes issues with 400 errors
+        # Investigate usage and make it return a dict of errors instead.
+        return ValidationError(
+            f"Invalid value for '{self.field_name}': {related_model.__name__}"
+            f" object with ID={data} not found"
+        )
+
     def to_internal_value(self, data):
         """Return the underlying object(s), given the serialized form."""
         if self.kwargs["many"]:
             serializer = self.serializer.child
             if not isinstance(data, list):
                 raise ParseError(f"'{self.field_name}' value must be a list")
+            related_model = serializer.Meta.model
+            instances = self.resolve_related(
+                related_model, data, self._get_related_instances(related_model)
+            )
             return [
-                self.to_internal_value_single(instance, serializer) for instance in data
+                self.to_internal_value_single(instance, serializer, instances)
+                for instance in data
             ]
         return self.to_internal_value_single(data, self.serializer)
 
@@ -1,13 +1,25 @@
 """Fast Filter Backend."""
 from django.db.models import Model, QuerySet
+from rest_framework.request import Request
 
 from dynamic_rest.filters.base import DynamicFilterBackend
-from dynamic_rest.prefetch import FastPrefetch, FastQuery
+from dynamic_rest.prefetch import FastPrefetch, FastQuery, IdentityMap
 from dynamic_rest.serializers import DynamicModelSerializer
 
 
 class FastDynamicFilterBackend(DynamicFilterBackend):
-    """A DRF filter backend that constructs DREST querysets."""
+    """A DRF filter backend that constructs DREST querysets.
+
+    The FastQuery objects built for a request share an identity map,
+    so that rows reached through several relations are fetched once.
+    """
+
+    identity_map = None
+
+    def filter_queryset(self, request: Request, queryset: QuerySet, view) -> FastQuery:
+        """Filter the queryset."""
+        self.identity_map = IdentityMap()
+        return super().filter_queryset(request, queryset, view)
 
     def _create_prefetch(self, source: str, queryset: QuerySet) -> FastPrefetch:
         """Create a Prefetch object."""
@@ -22,12 +34,14 @@ class FastDynamicFilterBackend(DynamicFilterBackend):
         if not isinstance(queryset, FastQuery):
             queryset = FastQuery(queryset)
 
+        queryset.identity_map = self.identity_map
         return queryset
 
     def _make_model_queryset(self, model: Model) -> FastQuery:
         """Make a queryset for a model."""
-        queryset = super()._make_model_queryset(model)
-        return FastQuery(queryset)
+        queryset = FastQuery(super()._make_model_queryset(model))
+        queryset.identity_map = self.identity_map
+        return queryset
 
     def _serializer_filter(
         self, serializer: DynamicModelSerializer, queryset: QuerySet
@@ -10,12 +10,65 @@ from rest_framework.filters import OrderingFilter
 from rest_framework.request import Request
 from rest_framework.serializers import SerializerMetaclass
 
+from dynamic_rest.caches import LRUCache
+from dynamic_rest.conf import settings
 from dynamic_rest.fields import DynamicRelationField
 
 if TYPE_CHECKING:
     from dynamic_rest.viewsets import DynamicModelViewSet
 
 
+# Orderings (or "" for invalid terms) by (serializer class, term)
+ORDERINGS = LRUCache(max_entries=lambda: settings.ORDERING_CACHE_SIZE)
+
+
+def get_ordering_for_term(
+    serializer_class: SerializerMetaclass, term: str
+) -> str | None:
+    """Return the ordering (model field chain) for a term, or None if invalid.
+
+    The term is a serializer field chain, e.g. `location.name`. Results
+    are cached by serializer class, so serializers are only built the
+    first time a term is resolved.
+    """
+    key = (serializer_class, term)
+    ordering = ORDERINGS.get(key)
+    if ordering is None:
+        ordering = _resolve_ordering(serializer_class, term) or ""
+        ORDERINGS.set(key, ordering)
+    return ordering or None
+
+
+def _resolve_ordering(serializer_class: SerializerMetaclass, term: str) -> str | None:
+    """Resolve the ordering for a term by walking serializer fields."""
+    serializer = serializer_class()
+    serializer_chain = term.split(".")
+
+    model_chain = []
+
+    for segment in serializer_chain[:-1]:
+        field = serializer.get_all_fields().get(segment)
+
+        if not (
+            field and field.source != "*" and isinstance(field, DynamicRelationField)
+        ):
+            return None
+
+        model_chain.append(field.source or segment)
+
+        serializer = field.serializer_class()
+
+    last_segment = serializer_chain[-1]
+    last_field = serializer.get_all_fields().get(last_segment)
+
+    if not last_field or last_field.source == "*":
+        return None
+
+    model_chain.append(last_field.source or last_segment)
+
+    return "__".join(model_chain)
+
+
 class DynamicSortingFilter(OrderingFilter):
     """Subclass of DRF's OrderingFilter.
 
@@ -49,8 +102,8 @@ class DynamicSortingFilter(OrderingFilter):
         This method overwrites the DRF default, so it can parse the array.
         """
         if params := view.get_request_feature(view.SORT):
-            if len(params) == 1 and params[0].strip() == '?':
-                return ['?']
+            if len(params) == 1 and params[0].strip() == "?":
+                return ["?"]
 
             fields = [param.strip() for param in params]
             valid_ordering, invalid_ordering = self.remove_invalid_fields(
@@ -106,34 +159,7 @@ class DynamicSortingFilter(OrderingFilter):
         if not self._is_allowed_term(term, view):
             return None
 
-        serializer = self._get_serializer_class(view)()
-        serializer_chain = term.split(".")
-
-        model_chain = []
-
-        for segment in serializer_chain[:-1]:
-            field = serializer.get_all_fields().get(segment)
-
-            if not (
-                field
-                and field.source != "*"
-                and isinstance(field, DynamicRelationField)
-            ):
-                return None
-
-            model_chain.append(field.source or segment)
-
-            serializer = field.serializer_class()
-
-        last_segment = serializer_chain[-1]
-        last_field = serializer.get_all_fields().get(last_segment)
-
-        if not last_field or last_field.source == "*":
-            return None
-
-        model_chain.append(last_field.source or last_segment)
-
-        return "__".join(model_chain)
+        return get_ordering_for_term(self._get_serializer_class(view), term)
 
     def _is_allowed_term(self, term: str, view: "DynamicModelViewSet") -> bool:
         """Check if a term is allowed to be ordered on."""
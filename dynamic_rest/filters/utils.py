@@ -41,8 +41,8 @@ def rewrite_filters(
     """Rewrite filter keys to use model field names."""
     out = {}
     for node in filters.values():
-        filter_key, field = node.generate_query_key(serializer)
-        if isinstance(field, RestFrameworkBooleanField):
+        filter_key, field_class = node.get_query_key(serializer)
+        if issubclass(field_class, RestFrameworkBooleanField):
             node.value = is_truthy(node.value)
         out[filter_key] = node.value
     return out
@@ -60,7 +60,7 @@ def clause_to_q(clause: tuple[str, str | int], serializer: DynamicModelSerialize
     if operator == "eq":
         operator = None
     node = FilterNode(parts, operator, value)
-    key, _ = node.generate_query_key(serializer)
+    key, _ = node.get_query_key(serializer)
     q = Q(**{key: node.value})
     if negate:
         q = ~q
@@ -51,6 +51,21 @@ def get_model_relationships(meta) -> dict:
     return {o.get_accessor_name(): o for o in chain(related_objs, related_m2m_objs)}
 
 
+@lru_cache()
+def get_bulk_update_fields(meta) -> frozenset:
+    """Return the names of the fields `QuerySet.bulk_update` can write.
+
+    These are the concrete fields of a model, other than its primary key,
+    by name and by attribute name.
+    """
+    return frozenset(
+        name
+        for f in meta.concrete_fields
+        if not f.primary_key
+        for name in (f.name, f.attname)
+    )
+
+
 @lru_cache()
 def get_virtual_fields(meta) -> dict | None:
     """Return a dictionary of all virtual fields on a model."""
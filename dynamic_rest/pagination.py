@@ -1,15 +1,28 @@
 """This module contains custom pagination classes."""
+import base64
+import binascii
+import datetime
+import json
 from collections import OrderedDict
+from collections.abc import Mapping
+from math import ceil
 
+from django.core.exceptions import FieldDoesNotExist
 from django.core.paginator import InvalidPage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
 from django.utils.functional import cached_property
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 from dynamic_rest.conf import settings
+from dynamic_rest.counts import get_count_strategy
 from dynamic_rest.paginator import DynamicPaginator
+from dynamic_rest.prefetch import FastQuery
 
 
 class DynamicPageNumberPagination(PageNumberPagination):
@@ -25,6 +38,9 @@ class DynamicPageNumberPagination(PageNumberPagination):
     max_page_size = settings.MAX_PAGE_SIZE
     page_size = settings.PAGE_SIZE or api_settings.PAGE_SIZE
     django_paginator_class = DynamicPaginator
+    # count strategy class; defaults to COUNT_STRATEGY,
+    # and can be overriden by setting `count_strategy` on the view
+    count_strategy = None
 
     def get_page_metadata(self):
         """Return metadata about the current page."""
@@ -36,6 +52,8 @@ class DynamicPageNumberPagination(PageNumberPagination):
         if not self.exclude_count:
             meta["total_results"] = page.paginator.count
             meta["total_pages"] = page.paginator.num_pages
+            if not page.paginator.count_strategy.exact:
+                meta["approximate_count"] = page.paginator.count_is_approximate
         else:
             meta["more_pages"] = self.more_pages
         return meta
@@ -71,7 +89,7 @@ class DynamicPageNumberPagination(PageNumberPagination):
             page_number = paginator.num_pages
         return page_number
 
-    def paginate_queryset(self, queryset, request, **__):
+    def paginate_queryset(self, queryset, request, view=None, **__):
         """Paginate a queryset.
 
         If required, either returning a page object,
@@ -86,7 +104,10 @@ class DynamicPageNumberPagination(PageNumberPagination):
         self.request = request
         exclude = self.exclude_count
         paginator = self.django_paginator_class(
-            queryset, page_size, exclude_count=exclude
+            queryset,
+            page_size,
+            exclude_count=exclude,
+            count_strategy=get_count_strategy(view, self.count_strategy),
         )
         page_number = self.get_page_number(request, paginator)
 
@@ -111,3 +132,264 @@ class DynamicPageNumberPagination(PageNumberPagination):
             else:
                 self.more_pages = False
         return result
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """JSON encoder for cursor values.
+
+    Unlike DjangoJSONEncoder, times are encoded with full precision,
+    so that they compare exactly when the cursor is decoded.
+    """
+
+    def default(self, o):
+        """Encode a cursor value."""
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class DynamicKeysetPagination(DynamicPageNumberPagination):
+    """Keyset (cursor) pagination.
+
+    Instead of an OFFSET, each page is selected with a filter on the
+    sort keys of the last row of the previous page, so deep pages are
+    as fast as the first one. The queryset's ordering (e.g. from `sort[]`)
+    is respected, with the primary key added as a tie-breaker.
+
+    The cursor of the next page is returned in the `meta` envelope as
+    `next_cursor`, and is passed back in the CURSOR_QUERY_PARAM parameter.
+    """
+
+    cursor_query_param = settings.CURSOR_QUERY_PARAM
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_ordering(self, queryset):
+        """Return the ordering of a queryset, ending with the primary key."""
+        query = queryset.query
+        ordering = list(query.order_by)
+        if not ordering and query.default_ordering:
+            ordering = list(query.get_meta().ordering)
+
+        pk = query.get_meta().pk
+        pk_names = ("pk", pk.name, pk.attname)
+        for term in ordering:
+            if not isinstance(term, str) or term == "?":
+                raise ValidationError(
+                    "Keyset pagination requires ordering by field names."
+                )
+            if term.lstrip("-") in pk_names:
+                # terms after the primary key cannot affect the ordering
+                return ordering[: ordering.index(term) + 1]
+        ordering.append("pk")
+        return ordering
+
+    def encode_cursor(self, ordering, values):
+        """Encode an opaque cursor."""
+        data = json.dumps([ordering, values], cls=CursorEncoder)
+        return base64.urlsafe_b64encode(data.encode()).decode()
+
+    def decode_cursor(self, ordering, cursor):
+        """Decode a cursor, checking that it matches the ordering."""
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            cursor_ordering, values = data
+        except (binascii.Error, TypeError, ValueError) as exc:
+            raise NotFound(self.invalid_cursor_message) from exc
+        if cursor_ordering != ordering or len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def get_cursor_filter(self, ordering, values, nulls_largest=False):
+        """Return a filter for the rows that come after the cursor values.
+
+        Arguments:
+            ordering: The ordering of the queryset, ending with the primary key.
+            values: The sort key values of the last row before the cursor.
+            nulls_largest: Whether the database sorts nulls after all
+                other values in ascending order (as PostgreSQL does).
+        """
+        query = Q(pk__in=[])
+        equal = Q()
+        for term, value in zip(ordering, values):
+            field = term.lstrip("-")
+            descending = term.startswith("-")
+            nulls_last = nulls_largest != descending
+            if value is not None:
+                lookup = "lt" if descending else "gt"
+                after = Q(**{f"{field}__{lookup}": value})
+                if nulls_last:
+                    after |= Q(**{f"{field}__isnull": True})
+                query |= equal & after
+                equal &= Q(**{field: value})
+            else:
+                if not nulls_last:
+                    query |= equal & Q(**{f"{field}__isnull": False})
+                equal &= Q(**{f"{field}__isnull": True})
+        return query
+
+    def get_nulls_largest(self, queryset):
+        """Return True if the database of a queryset sorts nulls last."""
+        if isinstance(queryset, FastQuery):
+            queryset = queryset.queryset
+        return connections[queryset.db].features.nulls_order_largest
+
+    def get_row_value(self, model, row, path):
+        """Return the value of a sort field of a fetched row.
+
+        Follows `__` paths through related objects that were fetched with
+        the row, and returns the same value `values_list(path)` would.
+
+        Arguments:
+            model: The model of the row.
+            row: A model instance or a FastObject.
+            path: The name of the sort field.
+        Raises:
+            KeyError if the value was not fetched with the row.
+        """
+        parts = path.split("__")
+        value = row
+        for i, part in enumerate(parts):
+            meta = model._meta  # pylint: disable=protected-access
+            try:
+                field = meta.pk if part == "pk" else meta.get_field(part)
+            except FieldDoesNotExist:
+                raise KeyError(path) from None
+            if not field.concrete or field.many_to_many:
+                raise KeyError(path)
+
+            last = i == len(parts) - 1
+            if isinstance(value, Mapping):
+                if field.attname in value and (last or not field.is_relation):
+                    value = value[field.attname]
+                elif field.name in value:
+                    value = value[field.name]
+                else:
+                    raise KeyError(path)
+            elif field.is_relation and not last and field.is_cached(value):
+                value = field.get_cached_value(value)
+            elif field.attname in value.__dict__:
+                value = value.__dict__[field.attname]
+            else:
+                raise KeyError(path)
+
+            if not field.is_relation or value is None:
+                if not last and value is None:
+                    return None
+                continue
+            if last:
+                # values_list returns the key of related objects
+                if isinstance(value, Mapping):
+                    value = value[field.target_field.attname]
+                elif isinstance(value, field.related_model):
+                    value = getattr(value, field.target_field.attname)
+            elif not isinstance(value, (Mapping, field.related_model)):
+                # only the key of the related object was fetched
+                raise KeyError(path)
+            model = field.related_model
+        return value
+
+    def get_cursor_values(self, queryset, ordering, row):
+        """Return the sort key values of a row of a queryset.
+
+        The values are read from the fetched row where possible, and
+        queried only if the row does not have all of them.
+        """
+        if isinstance(queryset, FastQuery):
+            queryset = queryset.queryset
+        fields = [term.lstrip("-") for term in ordering]
+        try:
+            return [self.get_row_value(queryset.model, row, field) for field in fields]
+        except KeyError:
+            pass
+        return list(
+            queryset.prefetch_related(None).filter(pk=row.pk).values_list(*fields)[0]
+        )
+
+    def get_page_metadata(self):
+        """Return metadata about the current page."""
+        meta = {
+            "per_page": self.get_page_size(self.request),
+            "next_cursor": self.next_cursor,
+        }
+        if not self.exclude_count:
+            meta["total_results"] = self.count
+            meta["total_pages"] = self.total_pages
+            if not self.counter.exact:
+                meta["approximate_count"] = self.count_is_approximate
+        else:
+            meta["more_pages"] = self.more_pages
+        return meta
+
+    def get_paginated_response(self, data):
+        """Return a paginated response."""
+        meta = self.get_page_metadata()
+        if isinstance(data, list):
+            result = OrderedDict()
+            if not self.exclude_count:
+                result["count"] = self.count
+            result["next"] = self.get_next_link()
+            result["previous"] = None
+            result["results"] = data
+            result["meta"] = meta
+        else:
+            result = data
+            if "meta" in result:
+                result["meta"].update(meta)
+            else:
+                result["meta"] = meta
+        return Response(result)
+
+    def get_next_link(self):
+        """Return the link to the next page."""
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_previous_link(self):
+        """Return the link to the previous page (not supported)."""
+        return None
+
+    def paginate_queryset(self, queryset, request, view=None, **__):
+        """Paginate a queryset, returning the rows after the cursor.
+
+        Returns `None` if pagination is not configured for this view.
+        """
+        if "exclude_count" in self.__dict__:
+            self.__dict__.pop("exclude_count")
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        self.request = request
+
+        ordering = self.get_ordering(queryset)
+        queryset = queryset.order_by(*ordering)
+        if not self.exclude_count:
+            self.counter = get_count_strategy(view, self.count_strategy)
+            self.count, self.count_is_approximate = self.counter.count(queryset)
+            self.total_pages = max(1, ceil(self.count / page_size))
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            values = self.decode_cursor(ordering, cursor)
+            queryset = queryset.filter(
+                self.get_cursor_filter(
+                    ordering, values, self.get_nulls_largest(queryset)
+                )
+            )
+
+        # fetch one extra row to determine if more pages are available
+        base = queryset._clone()  # pylint: disable=protected-access
+        result = list(queryset[: page_size + 1])
+        self.more_pages = len(result) > page_size
+        result = result[:page_size]
+        self.next_cursor = (
+            self.encode_cursor(
+                ordering, self.get_cursor_values(base, ordering, result[-1])
+            )
+            if self.more_pages
+            else None
+        )
+        return result
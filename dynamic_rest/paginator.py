@@ -2,21 +2,28 @@
 # adapted from Django's django.core.paginator (3.2+ compatible)
 # adds support for the "exclude_count" parameter
 
-import inspect
 from math import ceil
 
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
 from django.utils.functional import cached_property
-from django.utils.inspect import method_has_no_args
 from django.utils.translation import gettext_lazy as _
 
+from dynamic_rest.counts import ExactCount
+
 
 class DynamicPaginator(Paginator):
     """A subclass of Paginator that supports dynamic page sizes."""
 
     def __init__(self, *args, **kwargs):
-        """Initialise the DynamicPaginator."""
+        """Initialise the DynamicPaginator.
+
+        Accepts two extra keyword arguments: `exclude_count`, and
+        `count_strategy`, the strategy used to count objects
+        (by default, an exact count).
+        """
         self.exclude_count = kwargs.pop("exclude_count", False)
+        self.count_strategy = kwargs.pop("count_strategy", None) or ExactCount()
+        self.count_is_approximate = False
         super().__init__(*args, **kwargs)
 
     def validate_number(self, number):
@@ -58,10 +65,8 @@ class DynamicPaginator(Paginator):
             # always return 0, count should not be called
             return 0
 
-        c = getattr(self.object_list, "count", None)
-        if callable(c) and not inspect.isbuiltin(c) and method_has_no_args(c):
-            return c()
-        return len(self.object_list)
+        count, self.count_is_approximate = self.count_strategy.count(self.object_list)
+        return count
 
     @cached_property
     def num_pages(self):
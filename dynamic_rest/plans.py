@@ -0,0 +1,182 @@
+"""Query plans of dynamic requests.
+
+Used by `WithDynamicViewSetMixin` when a request has `debug=plan` (or
+`debug=explain`) and ENABLE_QUERY_PLAN is set: the queries run while
+handling the request are recorded, and returned in the response along
+with the SQL of the root queryset and of each of its prefetches.
+"""
+import time
+from contextlib import ExitStack
+
+from django.core.exceptions import EmptyResultSet
+from django.db import DatabaseError, connections, transaction
+from django.db.models import Prefetch
+
+from dynamic_rest.prefetch import FastQuery
+
+PLAN = "plan"
+EXPLAIN = "explain"
+
+
+def get_queryset_sql(queryset):
+    """Return the SQL of a queryset, with parameters interpolated."""
+    try:
+        return str(queryset.query)
+    except EmptyResultSet:
+        return None
+
+
+def get_prefetch_plan(queryset):
+    """Return the SQL of a queryset and of its (nested) prefetches.
+
+    Arguments:
+        queryset: A QuerySet or FastQuery.
+
+    Returns:
+        A dict with the model, SQL and prefetches of the queryset,
+        where prefetches map prefetched fields to their own plans.
+    """
+    if isinstance(queryset, FastQuery):
+        prefetches = {
+            prefetch.field: prefetch.query for prefetch in queryset.prefetches.values()
+        }
+        queryset = queryset.queryset
+    else:
+        lookups = getattr(queryset, "_prefetch_related_lookups", ())
+        prefetches = {
+            lookup.prefetch_to: lookup.queryset
+            for lookup in lookups
+            if isinstance(lookup, Prefetch)
+        }
+        prefetches.update(
+            (lookup, None) for lookup in lookups if isinstance(lookup, str)
+        )
+
+    meta = queryset.model._meta  # pylint: disable=protected-access
+    return {
+        "model": meta.label,
+        "sql": get_queryset_sql(queryset),
+        "prefetches": {
+            field: get_prefetch_plan(prefetch) if prefetch is not None else None
+            for field, prefetch in prefetches.items()
+        },
+    }
+
+
+class ExecuteWrapper(object):
+    """Base class of execute wrappers installed on all database connections.
+
+    Subclasses implement `__call__` as described for Django's
+    `connection.execute_wrapper`. Wrappers only apply to the connections
+    of the thread that starts them.
+    """
+
+    _stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        """Run a query."""
+        return execute(sql, params, many, context)
+
+    def start(self):
+        """Install the wrapper."""
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+
+    def stop(self):
+        """Uninstall the wrapper."""
+        if self._stack is not None:
+            self._stack.close()
+            self._stack = None
+
+    def __enter__(self):
+        """Install the wrapper."""
+        self.start()
+        return self
+
+    def __exit__(self, *_):
+        """Uninstall the wrapper."""
+        self.stop()
+
+
+class QueryPlanRecorder(ExecuteWrapper):
+    """Record the queries run on all database connections.
+
+    Queries are recorded with their duration and, where the database
+    reports it, their row count. Queries run on other threads (e.g.
+    concurrent prefetches) are not recorded.
+
+    Usage:
+        with QueryPlanRecorder() as recorder:
+            ...
+        recorder.queries
+    """
+
+    def __init__(self, explain=False):
+        """Initialize the recorder.
+
+        Arguments:
+            explain: If True, queries are also explained
+                (with EXPLAIN) when recording stops.
+        """
+        self.explain = explain
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        """Run and record a query (as a connection execute wrapper)."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            rowcount = getattr(context["cursor"], "rowcount", -1)
+            self.queries.append(
+                {
+                    "alias": context["connection"].alias,
+                    "sql": sql,
+                    "params": None if many else params,
+                    "time": round(duration * 1000, 3),
+                    "rows": rowcount if rowcount >= 0 else None,
+                }
+            )
+
+    def stop(self):
+        """Stop recording, and explain the recorded queries if needed."""
+        if self._stack is not None:
+            super().stop()
+            if self.explain:
+                for query in self.queries:
+                    query["explain"] = self.get_explain(query)
+
+    @staticmethod
+    def get_explain(query):
+        """Return the EXPLAIN output of a recorded SELECT query, or None."""
+        sql = query["sql"]
+        if query["params"] is None or not sql.lstrip().upper().startswith("SELECT"):
+            return None
+        connection = connections[query["alias"]]
+        prefix = connection.ops.explain_query_prefix()
+        try:
+            # use a savepoint, so a failure does not break the transaction
+            with transaction.atomic(using=query["alias"]), connection.cursor() as c:
+                c.execute(f"{prefix} {sql}", query["params"])
+                rows = c.fetchall()
+        except DatabaseError as exc:
+            return f"{exc.__class__.__name__}: {exc}"
+        return "\n".join(" ".join(str(value) for value in row) for row in rows)
+
+    def get_plan(self, queryset=None):
+        """Return the plan of a request.
+
+        Arguments:
+            queryset: The filtered root queryset of the request, if any.
+
+        Returns:
+            A dict with the recorded queries, their total time, and the
+            prefetch plan of the queryset.
+        """
+        return {
+            "queries": self.queries,
+            "time": round(sum(query["time"] for query in self.queries), 3),
+            "queryset": get_prefetch_plan(queryset) if queryset is not None else None,
+        }
@@ -1,29 +1,157 @@
 """Prefetching for FastQuery."""
+import atexit
 import copy
+import threading
 import traceback
 from collections import defaultdict
-from functools import lru_cache
+from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor
 
-from django.db import models
-from django.db.models import Prefetch, QuerySet
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, models
+from django.db.models import F, Prefetch, QuerySet
+from django.test.signals import setting_changed
 
-from dynamic_rest.meta import get_model_field_and_type
+from dynamic_rest.conf import settings
+from dynamic_rest.meta import get_model_field, get_model_field_and_type
 
+# Marks a key that is part of a row's layout, but not set on the row.
+MISSING = object()
 
-class FastObject(dict):
-    """FastObject is a dict-like object that allows for dot notation."""
+# Set on threads that run concurrent prefetches.
+_prefetch_local = threading.local()
 
-    def __init__(self, *args, **kwargs):
-        """Initialise the FastObject."""
-        self.pk_field = kwargs.pop("pk_field", "id")
-        super().__init__(*args)
+# Thread pool that runs concurrent prefetches, created on first use.
+_executor = None
+_executor_lock = threading.Lock()
+
+# Annotation holding the local ID of remote rows in single-query m2m fetches.
+M2M_LOCAL_ID = "_dynamic_rest_local_id"
+
+
+class FastLayout(object):
+    """The column layout shared by the FastObject rows of a query."""
+
+    __slots__ = ("index", "pk_field")
+
+    def __init__(self, names=(), pk_field="id"):
+        """Initialise the FastLayout.
+
+        Arguments:
+            names: The row's column names, followed by the names
+                of values that are set later (e.g. prefetches).
+            pk_field: The name of the primary key column.
+        """
+        self.index = {}
+        for name in names:
+            self.index.setdefault(name, len(self.index))
+        self.pk_field = pk_field
+
+
+class FastObject(MutableMapping):
+    """FastObject is a compact, dict-like row that allows for dot notation.
+
+    Rows store their values in a list, and share a FastLayout that maps
+    keys to positions, instead of each holding a dict of their own.
+    """
+
+    __slots__ = ("_layout", "_values")
+
+    def __init__(self, data=(), pk_field="id"):
+        """Initialise the FastObject from a mapping or key-value pairs."""
+        data = dict(data)
+        object.__setattr__(self, "_layout", FastLayout(data, pk_field))
+        object.__setattr__(self, "_values", list(data.values()))
+
+    @classmethod
+    def from_values(cls, layout, values):
+        """Create a FastObject from a shared layout and a list of values."""
+        obj = cls.__new__(cls)
+        object.__setattr__(obj, "_layout", layout)
+        object.__setattr__(obj, "_values", values)
+        return obj
+
+    @property
+    def pk_field(self):
+        """Return the name of the pk field."""
+        return self._layout.pk_field
 
     @property
     def pk(self):
         """Return the pk."""
-        return self[self.pk_field]
+        return self[self._layout.pk_field]
+
+    def __getitem__(self, key):
+        """Get an item."""
+        try:
+            value = self._values[self._layout.index[key]]
+        except (KeyError, IndexError):
+            raise KeyError(key) from None
+        if value is MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        """Set an item, adding the key to the layout if necessary."""
+        index = self._layout.index
+        i = index.get(key)
+        if i is None:
+            i = index[key] = len(index)
+        values = self._values
+        if i >= len(values):
+            values.extend([MISSING] * (i + 1 - len(values)))
+        values[i] = value
+
+    def __delitem__(self, key):
+        """Delete an item."""
+        self[key]  # pylint: disable=pointless-statement
+        self._values[self._layout.index[key]] = MISSING
+
+    def __contains__(self, key):
+        """Check whether the row has a key."""
+        i = self._layout.index.get(key)
+        values = self._values
+        return i is not None and i < len(values) and values[i] is not MISSING
+
+    def get(self, key, default=None):
+        """Get an item, or a default."""
+        i = self._layout.index.get(key)
+        values = self._values
+        if i is None or i >= len(values) or values[i] is MISSING:
+            return default
+        return values[i]
+
+    def __iter__(self):
+        """Iterate over the row's keys."""
+        values = self._values
+        for key, i in self._layout.index.items():
+            if i < len(values) and values[i] is not MISSING:
+                yield key
+
+    def __len__(self):
+        """Return the number of keys."""
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        """Return a string representation of the row."""
+        return repr(self.to_dict())
+
+    def to_dict(self):
+        """Return the row as a dict, in a single pass over its values."""
+        values = self._values
+        size = len(values)
+        return {
+            key: values[i]
+            for key, i in self._layout.index.items()
+            if i < size and values[i] is not MISSING
+        }
+
+    def copy(self):
+        """Return a shallow copy of the row."""
+        return self.from_values(self._layout, list(self._values))
+
+    __copy__ = copy
 
-    @lru_cache()
     def _slow_getattr(self, name):
         """Get an attribute."""
         if "." in name:
@@ -39,6 +167,9 @@ class FastObject(dict):
 
     def __getattr__(self, name):
         """Get an attribute."""
+        if name in FastObject.__slots__:
+            # not initialised yet, e.g. while unpickling
+            raise AttributeError(name)
         try:
             return self[name]
         except KeyError:
@@ -47,10 +178,15 @@ class FastObject(dict):
 
     def __setattr__(self, name, value):
         """Set an attribute."""
-        if name not in ("pk_field", "pk"):
-            self[name] = value
+        if name in FastObject.__slots__:
+            object.__setattr__(self, name, value)
+        elif name == "pk_field":
+            layout = FastLayout(self._layout.index, pk_field=value)
+            object.__setattr__(self, "_layout", layout)
+        elif name == "pk":
+            raise AttributeError("can't set attribute 'pk'")
         else:
-            super().__setattr__(name, value)
+            self[name] = value
 
 
 class SlowObject(dict):
@@ -101,6 +237,106 @@ class FastList(list):
         return self
 
 
+def get_prefetch_executor():
+    """Return the thread pool that runs concurrent prefetches.
+
+    The pool is shared by all requests of the process, and its workers
+    keep their database connections open between prefetches.
+    """
+    global _executor  # pylint: disable=global-statement
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PREFETCH_MAX_WORKERS,
+                thread_name_prefix="dynamic-rest-prefetch",
+            )
+        return _executor
+
+
+def shutdown_prefetch_executor():
+    """Close the database connections of the prefetch workers and stop them."""
+    global _executor  # pylint: disable=global-statement
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is None:
+        return
+
+    workers = len(executor._threads)  # pylint: disable=protected-access
+    if workers:
+        # connections can only be closed by the thread that opened them:
+        # the barrier makes each worker run exactly one of these tasks
+        barrier = threading.Barrier(workers)
+
+        def close_connections():
+            barrier.wait()
+            connections.close_all()
+
+        for _ in range(workers):
+            executor.submit(close_connections)
+    executor.shutdown(wait=True)
+
+
+def _settings_changed(*_, **kwargs):
+    """Restart the prefetch workers when DREST settings change."""
+    if kwargs["setting"] == "DYNAMIC_REST":
+        shutdown_prefetch_executor()
+
+
+atexit.register(shutdown_prefetch_executor)
+setting_changed.connect(_settings_changed)
+
+
+class IdentityMap(object):
+    """Rows fetched by FastQuery, keyed by (model, pk).
+
+    An identity map can be shared by the FastQuery objects of a request,
+    so that rows of the same model reached through different relations
+    are fetched and built once. Each row is stored with the keys of the
+    filters it was fetched with, which it is known to match.
+
+    Concurrent prefetches of a request read and add rows from worker
+    threads, so access to the map is locked.
+    """
+
+    def __init__(self):
+        """Initialise the IdentityMap."""
+        self.rows = {}
+        self._lock = threading.Lock()
+
+    def get(self, model, pk, names, filter_key):
+        """Return the row of a model with the given pk, or None.
+
+        Rows missing any of the given column names, or not known to
+        match the filters of `filter_key`, are not returned.
+        """
+        with self._lock:
+            entry = self.rows.get((model, pk))
+            if entry is None:
+                return None
+            row, filter_keys = entry
+            if filter_key and filter_key not in filter_keys:
+                return None
+        if not all(name in row for name in names):
+            return None
+        return row
+
+    def add(self, model, rows, filter_key):
+        """Add rows of a model, fetched with the filters of `filter_key`.
+
+        Rows already in the map are kept.
+        """
+        with self._lock:
+            for row in rows:
+                if isinstance(row, FastObject):
+                    _, filter_keys = self.rows.setdefault((model, row.pk), (row, set()))
+                    filter_keys.add(filter_key)
+
+    def clear(self):
+        """Remove all rows."""
+        with self._lock:
+            self.rows.clear()
+
+
 class FastPrefetch(object):
     """FastPrefetch is a prefetch object that allows for dot notation."""
 
@@ -186,12 +422,14 @@ class FastQueryCompatMixin(object):
 
         return self
 
-    def only(self, *fields):  # pylint: disable=unused-argument
-        """Only support not implemented.
+    def only(self, *fields):
+        """Select only the given fields (as with QuerySet.only).
 
-        # TODO: support this for realz
-        self.fields = set(self.fields) + set(fields)
+        The primary key, and the columns needed to merge prefetches,
+        are always selected.
         """
+        self.fields = set(fields)
+        self.queryset = self.queryset.only(*fields)
         return self
 
     def exclude(self, *args, **kwargs):
@@ -247,6 +485,20 @@ class FastQueryCompatMixin(object):
         """Clone the queryset."""
         new = copy.copy(self)
         new.queryset = new.queryset._clone()  # pylint: disable=protected-access
+        if new.fields is not None:
+            new.fields = set(new.fields)
+        # prefetch queries are filtered (in place) when they are merged
+        new.prefetches = {
+            field: FastPrefetch(
+                prefetch.field,
+                prefetch.query._clone()  # pylint: disable=protected-access
+                if prefetch.query is not None
+                else None,
+            )
+            for field, prefetch in new.prefetches.items()
+        }
+        new._data = None  # pylint: disable=protected-access
+        new._my_ids = None  # pylint: disable=protected-access
         return new
 
     def _get_django_queryset(self):
@@ -283,6 +535,7 @@ class FastQuery(FastQueryCompatMixin, object):
         self.pk_field = queryset.model._meta.pk.attname
         self._data = None
         self._my_ids = None
+        self.identity_map = None
 
     def execute(self):
         """Execute."""
@@ -296,12 +549,21 @@ class FastQuery(FastQueryCompatMixin, object):
         use_fastquery = getattr(self.model, "USE_FASTQUERY", True)
 
         if use_fastquery:
-            data = list(qs.values())
+            names = self._get_value_fields(qs)
+            layout = FastLayout(names + list(self.prefetches), self.pk_field)
+            unset = [MISSING] * (len(layout.index) - len(names))
+            make = FastObject.from_values
+            data = FastList(
+                make(layout, [*values, *unset]) for values in qs.values_list(*names)
+            )
+
+            if self.identity_map is not None:
+                filter_key = self._get_filter_key(qs)
+                if filter_key is not None:
+                    self.identity_map.add(self.model, data, filter_key)
 
             self.merge_prefetch(data)
-            self._data = FastList(
-                map(lambda obj: FastObject(obj, pk_field=self.pk_field), data)
-            )
+            self._data = data
         else:
 
             def make_prefetch(fast_prefetch):
@@ -322,6 +584,49 @@ class FastQuery(FastQueryCompatMixin, object):
 
         return self._data
 
+    def _require_fields(self, *attnames):
+        """Make sure the given columns are selected by a projection."""
+        if self.fields is not None:
+            self.fields.update(attnames)
+
+    def _get_value_fields(self, queryset):
+        """Return the names of the columns to select from a queryset.
+
+        Columns are returned by attname (e.g. `user_id`), as with `values()`.
+        Extra selects and annotations are always selected, as with `only()`.
+        """
+        meta = self.model._meta  # pylint: disable=protected-access
+        query = queryset.query
+        if self.fields is None:
+            return [
+                *query.extra_select,
+                *(f.attname for f in meta.concrete_fields),
+                *query.annotation_select,
+            ]
+
+        names = {meta.pk.attname}
+        for name in self.fields:
+            if name == "pk":
+                continue
+            try:
+                field = get_model_field(self.model, name)
+            except AttributeError:
+                continue
+            if getattr(field, "concrete", False) and not field.many_to_many:
+                names.add(field.attname)
+
+        # foreign keys are needed to merge forward relations
+        for prefetch in self.prefetches.values():
+            field, rel_type = get_model_field_and_type(self.model, prefetch.field)
+            if rel_type in ("fk", "o2o"):
+                names.add(field.attname)
+
+        return [
+            *query.extra_select,
+            *(f.attname for f in meta.concrete_fields if f.attname in names),
+            *query.annotation_select,
+        ]
+
     def __iter__(self):
         """Allow this to be cast to an iterable.
 
@@ -358,17 +663,23 @@ class FastQuery(FastQueryCompatMixin, object):
         return self
 
     def merge_prefetch(self, data):
-        """Merge prefetches into data."""
+        """Merge prefetches into data.
+
+        The queries of all prefetches are run first, concurrently if
+        PREFETCH_MAX_WORKERS allows it, then their results are merged
+        into data in order.
+        """
         model = self.queryset.model
 
         rel_func_map = {
-            "fk": self.merge_fk,
-            "o2o": self.merge_o2o,
-            "o2or": self.merge_o2or,
-            "m2m": self.merge_m2m,
-            "m2o": self.merge_m2o,
+            "fk": (self.fetch_fk, self.merge_fk),
+            "o2o": (self.fetch_fk, self.merge_o2o),
+            "o2or": (self.fetch_o2or, self.merge_o2or),
+            "m2m": (self.fetch_m2m, self.merge_m2m),
+            "m2o": (self.fetch_o2or, self.merge_m2o),
         }
 
+        merges = []
         for prefetch in self.prefetches.values():
             # TODO: here we assume we're dealing with Prefetch objects
             #       we could support field notation as well.
@@ -378,11 +689,54 @@ class FastQuery(FastQueryCompatMixin, object):
                 # TODO: maybe raise?
                 continue
 
-            func = rel_func_map[rel_type]
-            func(data, field, prefetch)
+            fetch, merge = rel_func_map[rel_type]
+            merges.append((fetch, merge, field, prefetch))
+
+        if self._use_concurrent_prefetch(len(merges)):
+            # compute IDs once, before they are read by worker threads
+            self._get_my_ids(data)
+            executor = get_prefetch_executor()
+            futures = [
+                executor.submit(
+                    self._run_concurrent_fetch, fetch, data, field, prefetch
+                )
+                for fetch, _, field, prefetch in merges
+            ]
+            fetched = [future.result() for future in futures]
+        else:
+            fetched = [None] * len(merges)
+
+        for (_, merge, field, prefetch), result in zip(merges, fetched):
+            merge(data, field, prefetch, fetched=result)
 
         return data
 
+    def _use_concurrent_prefetch(self, num_prefetches):
+        """Return True if sibling prefetches should run concurrently."""
+        if num_prefetches < 2 or (settings.PREFETCH_MAX_WORKERS or 0) < 2:
+            return False
+        if getattr(_prefetch_local, "in_worker", False):
+            # nested prefetches run serially within their worker
+            return False
+        # other connections cannot see the writes of an open transaction
+        return not connections[self.queryset.db].in_atomic_block
+
+    @staticmethod
+    def _run_concurrent_fetch(fetch, *args):
+        """Run a prefetch query in a worker thread.
+
+        Each worker uses its own database connection, which is kept open
+        for later prefetches, unless the query fails.
+        """
+        _prefetch_local.in_worker = True
+        try:
+            return fetch(*args)
+        except Exception:
+            connections.close_all()
+            raise
+        finally:
+            _prefetch_local.in_worker = False
+
     def _make_id_map(self, items, pk_field="id"):
         """Make an ID map."""
         return {item[pk_field]: item for item in items}
@@ -397,48 +751,163 @@ class FastQuery(FastQueryCompatMixin, object):
 
         return self._my_ids
 
-    def merge_fk(self, data, field, prefetch):
-        """Merge a foreign key."""
+    @staticmethod
+    def _chunk_ids(ids):
+        """Split IDs into lists of at most PREFETCH_CHUNK_SIZE IDs."""
+        ids = list(ids)
+        chunk_size = settings.PREFETCH_CHUNK_SIZE
+        if not chunk_size or len(ids) <= chunk_size:
+            return [ids]
+        return [ids[i : i + chunk_size] for i in range(0, len(ids), chunk_size)]
+
+    def _execute_in(self, query, lookup, ids):
+        """Execute a FastQuery filtered by `<lookup>__in=<ids>`.
+
+        Large ID sets are fetched in chunks, one query per chunk.
+        Rows of `pk` lookups found in the identity map are reused.
+        """
+        filter_key = None
+        reused = FastList()
+        if lookup == "pk":
+            ids, reused, filter_key = self._get_reusable_rows(query, ids)
+            if not ids:
+                return reused
+
+        chunks = self._chunk_ids(ids)
+        if len(chunks) == 1:
+            data = query.filter(**{f"{lookup}__in": chunks[0]}).execute()
+        else:
+            data = FastList()
+            for chunk in chunks:
+                # pylint: disable=protected-access
+                chunk_query = query._clone().filter(**{f"{lookup}__in": chunk})
+                data.extend(chunk_query.execute())
+
+        if filter_key is not None:
+            # the rows also match the filters without the ID lookup
+            query.identity_map.add(query.model, data, filter_key)
+        if reused:
+            reused.extend(data)
+            return reused
+        return data
+
+    @staticmethod
+    def _get_reusable_rows(query, ids):
+        """Split IDs into IDs to fetch, and rows from the identity map.
+
+        Returns the IDs to fetch, the reused rows, and the filter key of
+        the query (None if rows cannot be reused).
+
+        Rows can only be reused by queries without prefetches, which
+        the rows may not have, and without limits or DISTINCT ON, which
+        may exclude them.
+        """
+        # pylint: disable=protected-access
+        if (
+            query.identity_map is None
+            or query.prefetches
+            or query.queryset.query.is_sliced
+            or query.queryset.query.distinct_fields
+            or not getattr(query.model, "USE_FASTQUERY", True)
+        ):
+            return ids, FastList(), None
+        filter_key = query._get_filter_key(query.queryset)
+        if filter_key is None:
+            return ids, FastList(), None
+
+        names = query._get_value_fields(query.queryset)
+        missing = []
+        reused = FastList()
+        for pk in ids:
+            row = query.identity_map.get(query.model, pk, names, filter_key)
+            if row is None:
+                missing.append(pk)
+            else:
+                reused.append(row)
+        return missing, reused, filter_key
+
+    @staticmethod
+    def _get_filter_key(queryset):
+        """Return a key of the filters of a queryset, or None.
+
+        Querysets without filters have an empty key, and combined
+        querysets (e.g. unions) have no key.
+        """
+        query = queryset.query
+        if query.combinator:
+            return None
+        if not query.where:
+            return ""
+        try:
+            sql, params = query.get_compiler(queryset.db).compile(query.where)
+        except EmptyResultSet:
+            return None
+        return f"{sql}:{params!r}"
+
+    def _values_list_in(self, queryset, lookup, ids, *fields):
+        """Return `values_list(*fields)` of a queryset, in chunks.
+
+        The queryset is filtered by `<lookup>__in=<ids>` one chunk of ids
+        at a time.
+        """
+        values = []
+        for chunk in self._chunk_ids(ids):
+            chunk_qs = queryset.filter(**{f"{lookup}__in": chunk})
+            values.extend(chunk_qs.values_list(*fields))
+        return values
+
+    def fetch_fk(self, data, field, prefetch):
+        """Fetch the remote objects of a foreign key."""
         # Strategy: pull out field_id values from each row, pass to
         #           prefetch queryset using `pk__in`.
-
         id_field = field.attname
         ids = {row[id_field] for row in data if id_field in row}
-        prefetched_data = prefetch.query.get_ids(ids).execute()
-        id_map = self._make_id_map(prefetched_data)
+        return self._execute_in(prefetch.query, "pk", ids)
+
+    def merge_fk(self, data, field, prefetch, fetched=None):
+        """Merge a foreign key."""
+        if fetched is None:
+            fetched = self.fetch_fk(data, field, prefetch)
+        id_map = self._make_id_map(fetched)
 
+        id_field = field.attname
         for row in data:
             row[field.name] = id_map.get(row[id_field], None)
 
         return data
 
-    def merge_o2o(self, data, field, prefetch):
+    def merge_o2o(self, data, field, prefetch, fetched=None):
         """Merge a one-to-one."""
         # Same as FK.
-        return self.merge_fk(data, field, prefetch)
+        return self.merge_fk(data, field, prefetch, fetched=fetched)
 
-    def merge_o2or(self, data, field, prefetch, m2o_mode=False):
-        """Merge a one-to-one remote."""
+    def fetch_o2or(self, data, field, prefetch):
+        """Fetch the remote objects of a one-to-one remote."""
         # Strategy: get my IDs, filter remote model for rows pointing at
         #           my IDs.
-        #           For m2o_mode, account for there many objects, while
-        #           for o2or only support one reverse object.
-
         my_ids = self._get_my_ids(data)
 
         # If prefetching User.profile, construct filter like:
         #   Profile.objects.filter(user__in=<user_ids>)
         remote_field = field.remote_field.attname
-        remote_filter_key = f"{remote_field}__in"
-        filter_args = {remote_filter_key: my_ids}
 
-        # Fetch remote objects
-        remote_objects = prefetch.query.filter(**filter_args).execute()
+        # Fetch remote objects, with the reference to us
+        prefetch.query._require_fields(remote_field)  # pylint: disable=protected-access
+        return self._execute_in(prefetch.query, remote_field, my_ids)
+
+    def merge_o2or(self, data, field, prefetch, m2o_mode=False, fetched=None):
+        """Merge a one-to-one remote."""
+        # For m2o_mode, account for there many objects, while
+        # for o2or only support one reverse object.
+        if fetched is None:
+            fetched = self.fetch_o2or(data, field, prefetch)
+        my_ids = self._get_my_ids(data)
+        remote_field = field.remote_field.attname
         id_map = self._make_id_map(data, pk_field=self.pk_field)
 
         field_name = prefetch.field
         reverse_found = []  # IDs of local objects that were reversed
-        for remote_obj in remote_objects:
+        for remote_obj in fetched:
             # Pull out ref on remote object pointing at us, and
             # get local object. There *should* always be a matching
             # local object because the remote objects were filtered
@@ -464,8 +933,12 @@ class FastQuery(FastQueryCompatMixin, object):
 
         return data
 
-    def merge_m2m(self, data, field, prefetch):
-        """Merge a many-to-many."""
+    def fetch_m2m(self, data, field, prefetch):
+        """Fetch the joins and remote objects of a many-to-many.
+
+        Returns a (joins, remote objects) tuple, where joins are
+        (remote ID, local ID) pairs.
+        """
         # Strategy: pull out all my IDs, do a reverse filter on remote object.
         # e.g.: If prefetching User.groups, do
         #       Groups.filter(users__in=<user_ids>)
@@ -479,23 +952,99 @@ class FastQuery(FastQueryCompatMixin, object):
         )
         reverse_field = field.remote_field.name
 
+        if (
+            reverse_field is not None
+            and settings.ENABLE_SINGLE_QUERY_M2M
+            and self._is_plain_query(base_qs)
+        ):
+            return self._fetch_m2m_joined(my_ids, prefetch, reverse_field)
+
         if reverse_field is None:
             # Note: We can't just reuse self.queryset here because it's
             #       been sliced already.
             filters = {f"{field.attname}__isnull": False}
-            qs = self.queryset.model.objects.filter(pk__in=my_ids, **filters)
-            joins = list(qs.values_list(field.attname, self.pk_field))
+            qs = self.queryset.model.objects.filter(**filters)
+            joins = self._values_list_in(qs, "pk", my_ids, field.attname, self.pk_field)
         else:
             # Get reverse mapping (for User.groups, get Group.users)
             # Note: `qs` already has base filter applied on remote model.
-            filters = {f"{reverse_field}__in": my_ids}
-            joins = list(
-                base_qs.filter(**filters).values_list(remote_pk_field, reverse_field)
+            joins = self._values_list_in(
+                base_qs, reverse_field, my_ids, remote_pk_field, reverse_field
             )
 
         # Fetch remote objects, as values.
         remote_ids = {o[0] for o in joins}
-        remote_objects = prefetch.query.get_ids(remote_ids).execute()
+        remote_objects = self._execute_in(prefetch.query, "pk", remote_ids)
+        return joins, remote_objects
+
+    @staticmethod
+    def _is_plain_query(queryset):
+        """Return True if a queryset has no filters, limits or DISTINCT ON.
+
+        A plain DISTINCT (as added to nested querysets by the filter
+        backend) does not change which rows are related to each ID.
+        """
+        query = queryset.query
+        return not (
+            query.where
+            or query.distinct_fields
+            or query.is_sliced
+            or query.combinator
+            or query.extra
+        )
+
+    def _fetch_m2m_joined(self, my_ids, prefetch, reverse_field):
+        """Fetch the joins and remote objects of a many-to-many in one query.
+
+        Remote rows are selected through the join table, annotated with
+        the local ID they are related to, and de-duplicated by remote ID.
+        Nested prefetches are merged into the de-duplicated rows.
+        """
+        query = prefetch.query
+        remote_pk_field = query.pk_field
+
+        rows = FastList()
+        for chunk in self._chunk_ids(my_ids):
+            # pylint: disable=protected-access
+            chunk_query = query._clone()
+            chunk_query.prefetches = {}
+            chunk_query.identity_map = None
+            chunk_query._require_fields(M2M_LOCAL_ID)
+            chunk_query.filter(**{f"{reverse_field}__in": chunk}).annotate(
+                **{M2M_LOCAL_ID: F(reverse_field)}
+            )
+            rows.extend(chunk_query.execute())
+
+        joins = []
+        remote_objects = FastList()
+        seen = set()
+        for row in rows:
+            remote_id = row[remote_pk_field]
+            joins.append((remote_id, row.pop(M2M_LOCAL_ID)))
+            if remote_id not in seen:
+                seen.add(remote_id)
+                remote_objects.append(row)
+
+        if query.prefetches:
+            query._clone().merge_prefetch(  # pylint: disable=protected-access
+                remote_objects
+            )
+        if query.identity_map is not None:
+            filter_key = query._get_filter_key(  # pylint: disable=protected-access
+                query.queryset
+            )
+            if filter_key is not None:
+                query.identity_map.add(query.model, remote_objects, filter_key)
+        return joins, remote_objects
+
+    def merge_m2m(self, data, field, prefetch, fetched=None):
+        """Merge a many-to-many."""
+        if fetched is None:
+            fetched = self.fetch_m2m(data, field, prefetch)
+        joins, remote_objects = fetched
+        remote_pk_field = (
+            prefetch.query.model._meta.pk.attname  # pylint: disable=protected-access
+        )
         id_map = self._make_id_map(remote_objects, pk_field=remote_pk_field)
 
         # Create mapping of local ID -> remote objects
@@ -511,7 +1060,7 @@ class FastQuery(FastQueryCompatMixin, object):
 
         return data
 
-    def merge_m2o(self, data, field, prefetch):
+    def merge_m2o(self, data, field, prefetch, fetched=None):
         """Merge a many-to-one."""
         # Same as o2or but allow for many reverse objects.
-        return self.merge_o2or(data, field, prefetch, m2o_mode=True)
+        return self.merge_o2or(data, field, prefetch, m2o_mode=True, fetched=fetched)
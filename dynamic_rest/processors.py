@@ -1,14 +1,25 @@
 """This module contains response processors."""
+import logging
 from collections import defaultdict
 
-from rest_framework.serializers import ListSerializer
+from rest_framework.serializers import BaseSerializer, ListSerializer
 from rest_framework.utils.serializer_helpers import ReturnDict
 
 from dynamic_rest.conf import settings
+from dynamic_rest.fields import DynamicGenericRelationField, DynamicRelationField
 from dynamic_rest.tagged import TaggedDict
 
 POST_PROCESSORS = {}
 
+# Fields whose representations may contain sideloadable data.
+RELATION_FIELD_TYPES = (
+    BaseSerializer,
+    DynamicGenericRelationField,
+    DynamicRelationField,
+)
+
+logger = logging.getLogger(__name__)
+
 
 def register_post_processor(func):
     """Register a post processor function.
@@ -42,6 +53,12 @@ class SideloadingProcessor(object):
     Side-loaded records are returned under top-level
     response keys and produces responses that are
     typically smaller than their nested equivalent.
+
+    Attributes:
+        sideload_counts: Number of distinct records sideloaded,
+            per resource key.
+        merge_counts: Number of duplicate records merged into an
+            already sideloaded record, per resource key.
     """
 
     def __init__(self, serializer, data):
@@ -55,6 +72,12 @@ class SideloadingProcessor(object):
             serializer = serializer.child
         self.data = defaultdict(list)
         self.seen = defaultdict(set)
+        # resource key -> pk key -> sideloaded record
+        self.index = defaultdict(dict)
+        self.sideload_counts = defaultdict(int)
+        self.merge_counts = defaultdict(int)
+        # serializer -> keys of its relation fields
+        self.relation_keys = {}
         self.plural_name = serializer.get_plural_name()
         self.name = serializer.get_name()
 
@@ -65,6 +88,13 @@ class SideloadingProcessor(object):
         resource_name = self.name if isinstance(data, dict) else self.plural_name
         self.data[resource_name] = data
 
+        if self.sideload_counts:
+            logger.debug(
+                "Sideloaded %s, merged %s",
+                dict(self.sideload_counts),
+                dict(self.merge_counts),
+            )
+
     @staticmethod
     def is_dynamic(data):
         """Check whether the given data dictionary is a DREST structure.
@@ -74,72 +104,119 @@ class SideloadingProcessor(object):
         """
         return isinstance(data, TaggedDict)
 
-    def process(self, obj, parent=None, parent_key=None, depth=0):
-        """Recursively process the data for sideloading.
+    def get_relation_keys(self, serializer):
+        """Return the representation keys that may hold sideloadable data.
+
+        These are the keys of the serializer's relation and serializer fields.
+
+        Returns None if the serializer's fields are not known, in which case
+        every value of the representation is traversed.
+        """
+        try:
+            return self.relation_keys[serializer]
+        except KeyError:
+            pass
+        except TypeError:
+            # unhashable serializer
+            return None
+
+        fields = getattr(serializer, "fields", None)
+        if fields is None:
+            keys = None
+        else:
+            keys = tuple(
+                name
+                for name, field in fields.items()
+                if isinstance(field, RELATION_FIELD_TYPES)
+            )
+        self.relation_keys[serializer] = keys
+        return keys
+
+    def process(self, obj):
+        """Process the data for sideloading.
 
         Converts the nested representation into a side-loaded representation.
+        Only the relation positions of each tagged representation are
+        traversed, using an explicit stack rather than recursion. Nested
+        objects are sideloaded before the objects that contain them.
+        """
+        # stack of (obj, parent, parent_key, depth, visited)
+        stack = [(obj, None, None, 0, False)]
+        while stack:
+            obj, parent, parent_key, depth, visited = stack.pop()
+            if visited:
+                self.sideload(obj, parent, parent_key, depth)
+            elif isinstance(obj, list):
+                # traverse into lists of objects, in order
+                for key in range(len(obj) - 1, -1, -1):
+                    stack.append((obj[key], obj, key, depth, False))
+            elif isinstance(obj, dict):
+                dynamic = self.is_dynamic(obj)
+                if not dynamic and not isinstance(obj, ReturnDict):
+                    continue
+
+                if dynamic and not getattr(obj, "embed", False):
+                    stack.append((obj, parent, parent_key, depth, True))
+
+                keys = self.get_relation_keys(getattr(obj, "serializer", None))
+                if keys is None:
+                    keys = list(obj.keys())
+                for key in reversed(keys):
+                    o = obj.get(key)
+                    if isinstance(o, (list, dict)):
+                        # lists or dicts in relation positions are relations
+                        stack.append((o, obj, key, depth + 1, False))
+
+    def sideload(self, obj, parent, parent_key, depth):
+        """Sideload a tagged representation whose relations are processed.
+
+        Replaces the object with a reference to its primary key in `parent`.
         """
-        if isinstance(obj, list):
-            for key, o in enumerate(obj):
-                # traverse into lists of objects
-                self.process(o, parent=obj, parent_key=key, depth=depth)
-        elif isinstance(obj, dict):
-            dynamic = self.is_dynamic(obj)
-            returned = isinstance(obj, ReturnDict)
-            if not dynamic and not returned:
-                return
-            # recursively check all fields
-            for key, o in obj.items():
-                if isinstance(o, (list, dict)):
-                    # lists or dicts indicate a relation
-                    self.process(o, parent=obj, parent_key=key, depth=depth + 1)
-
-            if not dynamic or getattr(obj, "embed", False):
-                return
-
-            serializer = obj.serializer
-            name = serializer.get_plural_name()
-            instance = getattr(obj, "instance", serializer.instance)
-            instance_pk = instance.pk if instance else None
-            pk = getattr(obj, "pk_value", instance_pk) or instance_pk
-
-            # For polymorphic relations, `pk` can be a dict, so use the
-            # string representation (dict isn't hashable).
-            pk_key = repr(pk)
-
-            # sideloading
-            seen = True
-            seen_set = self.seen[name]
-            # if this object has not yet been seen
-            if pk_key not in seen_set:
-                seen = False
-                seen_set.add(pk_key)
-
-            # prevent sideloading the primary objects
-            if depth == 0:
-                return
-
-            # TODO: spec out the exact behavior for secondary instances of
-            # the primary resource
-
-            # if the primary resource is embedded, add it to a prefixed key
-            if name == self.plural_name:
-                name = f"{settings.ADDITIONAL_PRIMARY_RESOURCE_PREFIX}{name}"
-
-            if not seen:
-                # allocate a top-level key in the data for this resource
-                # type
-
-                # move the object into a new top-level bucket
-                # and mark it as seen
-                self.data[name].append(obj)
-            else:
-                # obj side-loaded, but maybe with other fields
-                for o in self.data[name]:
-                    if o.instance.pk == pk:
-                        o.update(obj)
-                        break
-
-            # replace the object with a reference
-            if parent is not None and parent_key is not None:
-                parent[parent_key] = pk
+        serializer = obj.serializer
+        name = serializer.get_plural_name()
+        instance = getattr(obj, "instance", serializer.instance)
+        instance_pk = instance.pk if instance else None
+        pk = getattr(obj, "pk_value", instance_pk) or instance_pk
+
+        # For polymorphic relations, `pk` can be a dict, so use the
+        # string representation (dict isn't hashable).
+        pk_key = repr(pk)
+
+        # sideloading
+        seen = True
+        seen_set = self.seen[name]
+        # if this object has not yet been seen
+        if pk_key not in seen_set:
+            seen = False
+            seen_set.add(pk_key)
+
+        # prevent sideloading the primary objects
+        if depth == 0:
+            return
+
+        # TODO: spec out the exact behavior for secondary instances of
+        # the primary resource
+
+        # if the primary resource is embedded, add it to a prefixed key
+        if name == self.plural_name:
+            name = f"{settings.ADDITIONAL_PRIMARY_RESOURCE_PREFIX}{name}"
+
+        if not seen:
+            # allocate a top-level key in the data for this resource
+            # type
+
+            # move the object into a new top-level bucket
+            # and mark it as seen
+            self.data[name].append(obj)
+            self.index[name][pk_key] = obj
+            self.sideload_counts[name] += 1
+        else:
+            # obj side-loaded, but maybe with other fields
+            record = self.index[name].get(pk_key)
+            if record is not None:
+                record.update(obj)
+                self.merge_counts[name] += 1
+
+        # replace the object with a reference
+        if parent is not None and parent_key is not None:
+            parent[parent_key] = pk
@@ -1,5 +1,94 @@
 """This module contains custom renderer classes."""
-from rest_framework.renderers import BrowsableAPIRenderer
+import decimal
+import math
+from functools import partial
+
+import orjson
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+
+from dynamic_rest.conf import settings
+from dynamic_rest.prefetch import FastObject
+
+# orjson options matching the output of DRF's compact, unicode JSONRenderer.
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+
+def has_non_finite_floats(data):
+    """Return True if `data` contains NaN or infinite floats.
+
+    orjson renders these as null, where JSONRenderer either rejects them
+    or renders them as NaN/Infinity, depending on STRICT_JSON.
+    """
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, decimal.Decimal):
+            if not value.is_finite():
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, FastObject):
+            stack.extend(value.to_dict().values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+class DynamicJSONRenderer(JSONRenderer):
+    """Renderer class that serializes JSON with orjson.
+
+    Dict and list subclasses such as ReturnDict, TaggedDict and FastList
+    are serialized directly, as are UUIDs and datetimes. FastObject rows
+    are converted to dicts, and other types (e.g. Decimal or lazy strings)
+    are converted by the encoder class, as with JSONRenderer.
+
+    Output that orjson cannot produce (indented, non-compact or ASCII-only
+    JSON, integers wider than 64 bits) is rendered by JSONRenderer instead.
+    NaN and infinite floats are rendered as null, unless
+    ORJSON_STRICT_FLOATS is enabled.
+    """
+
+    def default(self, obj, encoder=None):
+        """Convert objects that orjson does not support natively."""
+        if isinstance(obj, FastObject):
+            return obj.to_dict()
+        return (encoder or self.encoder_class()).default(obj)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render `data` into JSON, returning a bytestring."""
+        if data is None:
+            return b""
+
+        if (
+            self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        default = partial(self.default, encoder=self.encoder_class())
+        try:
+            ret = orjson.dumps(data, default=default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if (
+            settings.ORJSON_STRICT_FLOATS
+            and b"null" in ret
+            and has_non_finite_floats(data)
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # As with JSONRenderer, escape U+2028 and U+2029 to ensure we output
+        # JSON that is a strict javascript subset.
+        if b"\xe2\x80" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+        return ret
 
 
 class DynamicBrowsableAPIRenderer(BrowsableAPIRenderer):
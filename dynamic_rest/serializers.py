@@ -2,9 +2,10 @@
 import copy
 import inspect
 import os
+from typing import NamedTuple
 
 import inflection
-from django.db import models
+from django.db import models, router, transaction
 from django.utils.functional import cached_property
 from rest_framework import __version__ as drf_version
 from rest_framework import exceptions
@@ -12,28 +13,93 @@ from rest_framework import fields as drf_fields
 from rest_framework import serializers
 from rest_framework.fields import SkipField
 from rest_framework.relations import RelatedField
+from rest_framework.utils import model_meta
 from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
 
-from dynamic_rest import prefetch
+from dynamic_rest import codegen, columns, prefetch
 from dynamic_rest.bases import (
     CacheableFieldMixin,
     DynamicSerializerBase,
     resettable_cached_property,
 )
+from dynamic_rest.caches import LRUCache
 from dynamic_rest.conf import settings
-from dynamic_rest.fields import DynamicGenericRelationField, DynamicRelationField
+from dynamic_rest.fields import (
+    RELATED_INSTANCES,
+    DynamicGenericRelationField,
+    DynamicRelationField,
+)
 from dynamic_rest.links import merge_link_object
-from dynamic_rest.meta import get_model_table
+from dynamic_rest.meta import get_bulk_update_fields, get_model_table
 from dynamic_rest.processors import SideloadingProcessor, post_process
 from dynamic_rest.tagged import TaggedDict
 from dynamic_rest.utils import external_id_from_model_and_internal_id
 
 OPTS = {"ENABLE_FIELDS_CACHE": os.environ.get("ENABLE_FIELDS_CACHE", False)}
-FIELDS_CACHE = {}
+ALL_FIELDS_CACHE = LRUCache(
+    max_entries=lambda: settings.FIELDS_CACHE_MAX_ENTRIES,
+    max_size=lambda: settings.FIELDS_CACHE_MAX_SIZE,
+)
+FIELDS_CACHE = LRUCache(
+    max_entries=lambda: settings.FIELDS_CACHE_MAX_ENTRIES,
+    max_size=lambda: settings.FIELDS_CACHE_MAX_SIZE,
+)
+FIELD_PLANS_MAX_SIZE = 1024
+FIELD_PLANS = LRUCache(max_entries=FIELD_PLANS_MAX_SIZE)
 DRF_VERSION = drf_version.split(".")
 OLD_DRF = int(DRF_VERSION[0]) <= 3 and int(DRF_VERSION[1]) < 5
 
 
+class FieldPlan(NamedTuple):
+    """A compiled description of a serializer's dynamic field set.
+
+    Plans are computed once per serializer class and request shape
+    and then shared by every serializer instance with that shape,
+    so that `get_fields` does not have to resolve deferred and flagged
+    fields (or clone the entire field set) on each instantiation.
+
+    Attributes:
+        fields: Names of the fields to render, in declaration order.
+        read_only: Names of fields flagged by `Meta.read_only_fields`.
+        untrimmed: Names of fields flagged by `Meta.untrimmed_fields`.
+        immutable: Names of fields that are read-only unless creating.
+    """
+
+    fields: tuple
+    read_only: frozenset
+    untrimmed: frozenset
+    immutable: frozenset
+
+
+# Per-instance state that views of nested serializers must not share.
+_SERIALIZER_STATE = ("fields", "_data", "_errors", "_validated_data")
+
+
+def _bind_field_view(field):
+    """Return a per-instance view of a field from `_all_fields`.
+
+    The view is a shallow copy with its cached state reset, which is
+    enough to let it be bound and flagged without affecting the original.
+    Fields that were already bound are unbound, and nested serializers
+    drop their own field set, so that both are rebuilt for the view.
+    """
+    view = copy.copy(field)
+    if hasattr(view, "reset"):
+        view.reset()
+
+    if hasattr(field, "source_attrs"):
+        view.source = getattr(field, "_kwargs", {}).get("source")
+        del view.source_attrs
+
+    if isinstance(view, serializers.BaseSerializer):
+        for attr in _SERIALIZER_STATE:
+            view.__dict__.pop(attr, None)
+        if isinstance(view, serializers.ListSerializer):
+            view.child = _bind_field_view(field.child)
+            view.child.bind(field_name="", parent=view)
+    return view
+
+
 class WithResourceKeyMixin(object):
     """Mixin for serializers that have a resource key."""
 
@@ -65,9 +131,70 @@ class DynamicListSerializer(
     def to_representation(self, data):
         """Delegates to the child serializer."""
         iterable = data.all() if isinstance(data, models.Manager) else data
+        if settings.ENABLE_COLUMNAR_SERIALIZATION:
+            return self.batch_to_representation(iterable)
         child = self.child
         return [child.to_representation(item) for item in iterable]
 
+    def _supports_batch(self):
+        """Check whether the child can be represented column by column."""
+        child = self.child
+        clazz = child.__class__
+        return (
+            getattr(child, "enable_optimization", False)
+            and not child.id_only()
+            and all(
+                getattr(clazz, name) is getattr(WithDynamicSerializerMixin, name)
+                for name in (
+                    "to_representation",
+                    "_to_representation",
+                    "_faster_to_representation",
+                )
+            )
+        )
+
+    def batch_to_representation(self, instances):
+        """Represent a list of instances one column at a time.
+
+        Each readable field of the child is read and represented for all
+        instances in a single pass, and rows are only assembled at the end.
+        This produces the same output as calling the child's
+        `to_representation` for each instance, which is what happens if
+        the child or the instances do not support batching.
+
+        Arguments:
+            instances: An iterable of model instances or FastObject rows.
+        Returns:
+            List of representations.
+        """
+        child = self.child
+        instances = list(instances)
+        cols = (
+            columns.get_columns(child, instances)
+            if instances and self._supports_batch()
+            else None
+        )
+        if cols is None:
+            return [child.to_representation(item) for item in instances]
+
+        skip = columns.SKIP
+        result = []
+        for i, instance in enumerate(instances):
+            representation = {}
+            for name, values in cols:
+                value = values[i]
+                if value is not skip:
+                    representation[name] = value
+            result.append(
+                child._cache_representation(  # pylint: disable=protected-access
+                    instance,
+                    child._tag_representation(  # pylint: disable=protected-access
+                        representation, instance
+                    ),
+                )
+            )
+        return result
+
     def get_model(self):
         """Get the child's model."""
         return self.child.get_model()
@@ -84,6 +211,14 @@ class DynamicListSerializer(
         """Get the child's rendering mode."""
         return self.child.id_only()
 
+    def to_internal_value(self, data):
+        """Resolve the related IDs of all items before validating them."""
+        child = self.child
+        if isinstance(data, list) and hasattr(child, "resolve_related_instances"):
+            self._context.setdefault(RELATED_INSTANCES, {})
+            child.resolve_related_instances(data)
+        return super().to_internal_value(data)
+
     @resettable_cached_property
     def data(self):  # pylint: disable=invalid-overridden-method
         """Get the data, after performing post-processing if necessary."""
@@ -95,8 +230,12 @@ class DynamicListSerializer(
         )
         return post_process(processed_data)
 
-    def update(self, queryset, validated_data):  # pylint: disable=arguments-renamed
-        """Update a queryset with validated data."""
+    def _get_objects_to_update(self, queryset, validated_data):
+        """Find the objects of a queryset to update with validated data.
+
+        Returns:
+            A list of (object, data) tuples.
+        """
         lookup_attr = getattr(self.child.Meta, "update_lookup_field", "id")
 
         lookup_objects = {
@@ -125,17 +264,79 @@ class DynamicListSerializer(
                 f"{keys_len} != {object_update_count}."
             )
 
+        return [
+            (
+                object_to_update,
+                lookup_objects.get(str(getattr(object_to_update, lookup_attr))),
+            )
+            for object_to_update in objects_to_update
+        ]
+
+    def update(self, queryset, validated_data):  # pylint: disable=arguments-renamed
+        """Update a queryset with validated data."""
         updated_objects = []
-        for object_to_update in objects_to_update:
-            lookup_key = getattr(object_to_update, lookup_attr)
-            lookup_key = str(lookup_key)
-            data = lookup_objects.get(lookup_key)
+        for object_to_update, data in self._get_objects_to_update(
+            queryset, validated_data
+        ):
             # Use model serializer to actually update the model
             # in case that method is overwritten.
             updated_objects.append(self.child.update(object_to_update, data))
 
         return updated_objects
 
+    def bulk_update(self, queryset, validated_data, batch_size=None):
+        """Update a queryset with validated data, using QuerySet.bulk_update.
+
+        Unlike `update`, this does not call the child's `update` or the
+        model's `save`, and does not send signals. Only the fields present
+        in the validated data are written, and many-to-many values are set
+        once the rows are updated.
+
+        Data that `QuerySet.bulk_update` cannot write, i.e. values of
+        fields that are neither concrete model fields nor to-many
+        relations, is written with `update` instead.
+
+        Arguments:
+            queryset: The queryset of the objects to update.
+            validated_data: A list of validated data, one per object.
+            batch_size: The number of rows updated per query, or None.
+
+        Returns:
+            The list of updated objects.
+        """
+        model = self.get_model()
+        relations = model_meta.get_field_info(model).relations
+        meta = model._meta  # pylint: disable=protected-access
+        writable = get_bulk_update_fields(meta).union(
+            name for name, relation in relations.items() if relation.to_many
+        )
+        # the lookup field is popped by `_get_objects_to_update`
+        writable |= {getattr(self.child.Meta, "update_lookup_field", "id")}
+        if any(attr not in writable for data in validated_data for attr in data):
+            return self.update(queryset, validated_data)
+
+        with transaction.atomic(using=router.db_for_write(model)):
+            updates = self._get_objects_to_update(queryset, validated_data)
+            fields = set()
+            many_to_many = []
+            for object_to_update, data in updates:
+                for attr, value in data.items():
+                    if attr in relations and relations[attr].to_many:
+                        many_to_many.append((object_to_update, attr, value))
+                    else:
+                        setattr(object_to_update, attr, value)
+                        fields.add(attr)
+            updated_objects = [object_to_update for object_to_update, _ in updates]
+            if fields and updated_objects:
+                manager = model._default_manager  # pylint: disable=protected-access
+                manager.bulk_update(
+                    updated_objects, sorted(fields), batch_size=batch_size
+                )
+            for object_to_update, attr, value in many_to_many:
+                getattr(object_to_update, attr).set(value)
+
+        return updated_objects
+
 
 class WithDynamicSerializerMixin(
     CacheableFieldMixin, WithResourceKeyMixin, DynamicSerializerBase
@@ -361,27 +562,25 @@ class WithDynamicSerializerMixin(
         """Get the request method."""
         return self.get_request_attribute("method", "").upper()
 
+    def _is_fields_cache_enabled(self):
+        """Return True if this serializer's fields should be cached."""
+        return settings.ENABLE_FIELDS_CACHE and self.ENABLE_FIELDS_CACHE
+
     @resettable_cached_property
     def _all_fields(self):
         """Returns the entire serializer field set.
 
         Does not respect dynamic field inclusions/exclusions.
         """
-        clazz = self.__class__
-        if (
-            not settings.ENABLE_FIELDS_CACHE
-            or not self.ENABLE_FIELDS_CACHE
-            or clazz not in FIELDS_CACHE
-        ):
-            all_fields = super().get_fields()
-
-            if settings.ENABLE_FIELDS_CACHE and self.ENABLE_FIELDS_CACHE:
-                FIELDS_CACHE[clazz] = all_fields
+        if self._is_fields_cache_enabled():
+            key = self.__class__
+            cached = ALL_FIELDS_CACHE.get(key)
+            if cached is None:
+                cached = super().get_fields()
+                ALL_FIELDS_CACHE.set(key, cached, size=len(cached))
+            all_fields = {k: _bind_field_view(field) for k, field in cached.items()}
         else:
-            all_fields = copy.copy(FIELDS_CACHE[clazz])
-            for k, field in all_fields.items():
-                if hasattr(field, "reset"):
-                    field.reset()
+            all_fields = super().get_fields()
 
         for k, field in all_fields.items():
             field.field_name = k
@@ -434,27 +633,34 @@ class WithDynamicSerializerMixin(
                 continue
             setattr(field, attr, value)
 
-    def get_fields(self):
-        """Returns the serializer's field set.
-
-        If `dynamic` is True, respects field inclusions/exclusions.
-        Otherwise, reverts back to standard DRF behavior.
-        """
-        all_fields = self.get_all_fields()
-        if self.dynamic is False:
-            return all_fields
-
-        if self.id_only():
-            return {}
+    def _get_field_plan_key(self, all_fields):
+        """Return the key identifying this instance's field plan."""
+        request_fields = self.request_fields
+        shape = (
+            tuple((name, include is False) for name, include in request_fields.items())
+            if request_fields
+            else ()
+        )
+        signature = tuple(
+            (
+                name,
+                getattr(field, "deferred", None),
+                getattr(field, "many", None),
+                getattr(field, "immutable", None),
+            )
+            for name, field in all_fields.items()
+        )
+        return self.__class__, signature, shape, settings.DEFER_MANY_RELATIONS
 
-        serializer_fields = copy.deepcopy(all_fields)
+    def _compile_field_plan(self, all_fields):
+        """Resolve request overrides and Meta flags into a `FieldPlan`."""
         request_fields = self.request_fields
-        deferred = self._get_deferred_field_names(serializer_fields)
+        deferred = self._get_deferred_field_names(all_fields)
 
         # apply request overrides
         if request_fields:
             for name, include in request_fields.items():
-                if name not in serializer_fields:
+                if name not in all_fields:
                     raise exceptions.ParseError(
                         f'"{name}" is not a valid field name for "{self.get_name()}".'
                     )
@@ -463,36 +669,93 @@ class WithDynamicSerializerMixin(
                 elif include is False:
                     deferred.add(name)
 
-        for name in deferred:
-            serializer_fields.pop(name)
+        fields = tuple(name for name in all_fields if name not in deferred)
+        included = {name: all_fields[name] for name in fields}
 
         # Set read_only flags based on read_only_fields meta list.
         # Here to cover DynamicFields not covered by DRF.
         ro_fields = getattr(self.Meta, "read_only_fields", [])
-        self.flag_fields(serializer_fields, ro_fields, "read_only", True)
-
         pw_fields = getattr(self.Meta, "untrimmed_fields", [])
+
+        # Note: Immutable fields override `read_only` if both are set, to
+        #       allow inferred DRF fields to be made immutable.
+        immutable_field_names = self._get_flagged_field_names(included, "immutable")
+
+        return FieldPlan(
+            fields=fields,
+            read_only=frozenset(name for name in ro_fields if name in included),
+            untrimmed=frozenset(name for name in pw_fields if name in included),
+            immutable=frozenset(immutable_field_names),
+        )
+
+    def get_field_plan(self):
+        """Return the `FieldPlan` for this serializer's request fields."""
+        all_fields = self.get_all_fields()
+        key = self._get_field_plan_key(all_fields)
+        plan = FIELD_PLANS.get(key)
+        if plan is None:
+            plan = self._compile_field_plan(all_fields)
+            FIELD_PLANS.set(key, plan)
+        return plan
+
+    def _build_fields(self):
+        """Build flagged, unbound views of the fields in the field plan."""
+        all_fields = self.get_all_fields()
+        plan = self.get_field_plan()
+        fields = {name: _bind_field_view(all_fields[name]) for name in plan.fields}
+
+        self.flag_fields(fields, plan.read_only, "read_only", True)
         self.flag_fields(
-            serializer_fields,
-            pw_fields,
+            fields,
+            plan.untrimmed,
             "trim_whitespace",
             False,
         )
 
         # Toggle read_only flags for immutable fields.
-        # Note: This overrides `read_only` if both are set, to allow
-        #       inferred DRF fields to be made immutable.
-        immutable_field_names = self._get_flagged_field_names(
-            serializer_fields, "immutable"
-        )
         self.flag_fields(
-            serializer_fields,
-            immutable_field_names,
+            fields,
+            plan.immutable,
             "read_only",
             value=self.get_request_method() != "POST",
         )
+        return fields
 
-        return serializer_fields
+    def get_fields(self):
+        """Returns the serializer's field set.
+
+        If `dynamic` is True, respects field inclusions/exclusions.
+        Otherwise, reverts back to standard DRF behavior.
+
+        If the fields cache is enabled, the resolved field set is shared
+        between all serializers of the same class, request fields and
+        request method, and each serializer binds its own views of it.
+        """
+        if self.dynamic is False:
+            return self.get_all_fields()
+
+        if self.id_only():
+            return {}
+
+        if not self._is_fields_cache_enabled():
+            return self._build_fields()
+
+        request_fields = self.request_fields
+        key = (
+            self.__class__,
+            tuple((name, include is False) for name, include in request_fields.items())
+            if request_fields
+            else (),
+            self.get_request_method(),
+        )
+        cached = FIELDS_CACHE.get(key)
+        if cached is None:
+            cached = self._build_fields()
+            for field in cached.values():
+                # do not keep this serializer alive through the cache
+                field.parent = None
+            FIELDS_CACHE.set(key, cached, size=len(cached))
+        return {name: _bind_field_view(field) for name, field in cached.items()}
 
     def is_field_sideloaded(self, field_name):
         """Check if a field is side-loaded."""
@@ -623,6 +886,11 @@ class WithDynamicSerializerMixin(
 
         return ret
 
+    @cached_property
+    def _compiled_to_representation(self):
+        """Return the code-generated representation function."""
+        return codegen.compile_representation(self)
+
     @resettable_cached_property
     def obj_cache(self):
         """Cache for objects."""
@@ -630,13 +898,8 @@ class WithDynamicSerializerMixin(
         #       function only needs to return the initial value.
         return {}
 
-    def _to_representation(self, instance):
-        """Uncached `to_representation`."""
-        if self.enable_optimization:
-            representation = self._faster_to_representation(instance)
-        else:
-            representation = super().to_representation(instance)
-
+    def _tag_representation(self, representation, instance):
+        """Add links and debug information, and tag the representation."""
         if settings.ENABLE_LINKS:
             # TODO: Make this function configurable to support other
             #       formats like JSON API link objects.
@@ -653,6 +916,27 @@ class WithDynamicSerializerMixin(
             representation, serializer=self, instance=instance, embed=self.embed
         )
 
+    def _to_representation(self, instance):
+        """Uncached `to_representation`."""
+        if self.enable_optimization:
+            if settings.ENABLE_COMPILED_REPRESENTATIONS:
+                representation = self._compiled_to_representation(instance)
+            else:
+                representation = self._faster_to_representation(instance)
+        else:
+            representation = super().to_representation(instance)
+
+        return self._tag_representation(representation, instance)
+
+    def _cache_representation(self, instance, representation):
+        """Return the object-cached representation of an instance."""
+        pk = getattr(instance, "pk", None)
+        if not settings.ENABLE_SERIALIZER_OBJECT_CACHE or pk is None:
+            return representation
+        if pk not in self.obj_cache:
+            self.obj_cache[pk] = representation
+        return self.obj_cache[pk]
+
     def to_representation(self, instance):
         """Modified to_representation method. Optionally may cache objects.
 
@@ -669,13 +953,7 @@ class WithDynamicSerializerMixin(
                 )
             return instance.pk
 
-        pk = getattr(instance, "pk", None)
-        representation = self._to_representation(instance)
-        if not settings.ENABLE_SERIALIZER_OBJECT_CACHE or pk is None:
-            return representation
-        if pk not in self.obj_cache:
-            self.obj_cache[pk] = representation
-        return self.obj_cache[pk]
+        return self._cache_representation(instance, self._to_representation(instance))
 
     def to_internal_value(self, data):
         """Modified to_internal_value method."""
@@ -699,6 +977,36 @@ class WithDynamicSerializerMixin(
 
         return value
 
+    def resolve_related_instances(self, entries):
+        """Resolve the related IDs referenced by a bulk payload.
+
+        The IDs of all writable relation fields across all entries are
+        resolved with a single query per related model, and shared with
+        the relation fields of all serializers using the same context.
+
+        Arguments:
+            entries: A list of serialized objects.
+        """
+        instances = self.context.get(RELATED_INSTANCES)
+        if instances is None:
+            return
+        related = {}
+        for field in self._writable_fields:
+            related_model = (
+                field.get_model() if isinstance(field, DynamicRelationField) else None
+            )
+            if related_model is None:
+                continue
+            values = related.setdefault(related_model, ([], field))[0]
+            for entry in entries:
+                if isinstance(entry, dict) and field.field_name in entry:
+                    value = entry[field.field_name]
+                    values.extend(value if isinstance(value, list) else [value])
+        for related_model, (values, field) in related.items():
+            field.resolve_related(
+                related_model, values, instances.setdefault(related_model, {})
+            )
+
     def save(self, *args, **kwargs):
         """Serializer save that address prefetch issues."""
         update = getattr(self, "instance", None) is not None
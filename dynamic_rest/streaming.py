@@ -0,0 +1,162 @@
+"""Streaming serialization of large lists.
+
+Used by `DynamicModelViewSet.list` when a streamed response is requested:
+the primary resource is serialized and rendered one chunk of rows at a
+time, and sideloaded records are collected (and de-duplicated) across
+chunks and rendered after the primary list.
+"""
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+
+from dynamic_rest.pagination import DynamicKeysetPagination
+from dynamic_rest.prefetch import FastQuery
+from dynamic_rest.processors import SideloadingProcessor, post_process
+
+
+def get_pks(queryset):
+    """Return the distinct primary keys of a queryset, in order."""
+    if isinstance(queryset, FastQuery):
+        queryset = queryset.queryset
+    pks = queryset.prefetch_related(None).values_list("pk", flat=True)
+    return list(dict.fromkeys(pks))
+
+
+def iter_pks(queryset, chunk_size):
+    """Iterate over the primary keys of a queryset in chunks, in order.
+
+    Each chunk is selected with a keyset filter on the sort keys of the
+    last row of the previous chunk (as with DynamicKeysetPagination), so
+    only one chunk of keys is held at a time. Querysets that are not
+    ordered by field names (e.g. randomly) have all their keys fetched
+    at once instead.
+
+    Arguments:
+        queryset: A QuerySet or FastQuery.
+        chunk_size: The maximum number of keys in a chunk.
+
+    Yields:
+        Lists of distinct primary keys.
+    """
+    if isinstance(queryset, FastQuery):
+        queryset = queryset.queryset
+    paginator = DynamicKeysetPagination()
+    try:
+        ordering = paginator.get_ordering(queryset)
+    except ValidationError:
+        pks = get_pks(queryset)
+        for start in range(0, len(pks), chunk_size):
+            yield pks[start : start + chunk_size]
+        return
+
+    nulls_largest = paginator.get_nulls_largest(queryset)
+    fields = [term.lstrip("-") for term in ordering]
+    keys = (
+        queryset.prefetch_related(None).order_by(*ordering).values_list("pk", *fields)
+    )
+    values = None
+    while True:
+        chunk = keys
+        if values is not None:
+            cursor_filter = paginator.get_cursor_filter(ordering, values, nulls_largest)
+            chunk = chunk.filter(cursor_filter)
+        rows = list(chunk[:chunk_size])
+        if rows:
+            yield list(dict.fromkeys(row[0] for row in rows))
+        if len(rows) < chunk_size:
+            return
+        values = list(rows[-1][1:])
+
+
+def iter_chunks(queryset, chunk_size):
+    """Iterate over the rows of a queryset in chunks.
+
+    The primary keys of each chunk are selected with `iter_pks`, and its
+    rows are fetched with their own `pk__in` query, so prefetches
+    configured on the queryset are applied one chunk at a time. The
+    identity map of a FastQuery is cleared after each chunk.
+
+    Arguments:
+        queryset: A QuerySet or FastQuery.
+        chunk_size: The maximum number of rows in a chunk.
+
+    Yields:
+        Lists of rows, in queryset order.
+    """
+    for chunk_pks in iter_pks(queryset, chunk_size):
+        chunk = queryset._clone()  # pylint: disable=protected-access
+        chunk = chunk.filter(pk__in=chunk_pks)
+        positions = {pk: i for i, pk in enumerate(chunk_pks)}
+        yield sorted(chunk, key=lambda row, positions=positions: positions[row.pk])
+        if getattr(queryset, "identity_map", None) is not None:
+            queryset.identity_map.clear()
+
+
+def stream_list(get_serializer, queryset, chunk_size, renderer=None):
+    """Serialize and render a list of rows as a stream of JSON fragments.
+
+    Without an envelope, the output is a JSON list of the primary
+    resource. With an envelope, the output is an object that holds the
+    primary resource, followed by one list of records for each type of
+    sideloaded resource.
+
+    Registered post-processors are applied to the response in parts:
+    once per chunk of the primary resource (in an envelope of its own,
+    if the output has one), then once to the sideloaded records.
+
+    Arguments:
+        get_serializer: A callable that returns a list serializer
+            for a chunk of rows, e.g. `view.get_serializer`.
+        queryset: A QuerySet or FastQuery.
+        chunk_size: The number of rows serialized at a time.
+        renderer: The renderer used to encode records,
+            by default a JSONRenderer.
+
+    Yields:
+        Byte strings that make up the JSON document.
+    """
+    renderer = renderer or JSONRenderer()
+    processor = None
+    envelope = None
+    count = 0
+    for chunk in iter_chunks(queryset, chunk_size):
+        serializer = get_serializer(chunk, many=True)
+        data = serializer.to_representation(chunk)
+        if envelope is None:
+            envelope = serializer.child.envelope
+            if envelope:
+                processor = SideloadingProcessor(serializer, data)
+                # only sideloaded records are kept between chunks
+                del processor.data[processor.plural_name]
+                yield b"{" + renderer.render(processor.plural_name) + b":["
+            else:
+                yield b"["
+        elif processor is not None:
+            processor.process(data)
+
+        if processor is not None:
+            data = post_process({processor.plural_name: data})[processor.plural_name]
+        else:
+            data = post_process(data)
+
+        for record in data:
+            if count:
+                yield b","
+            yield renderer.render(record)
+            count += 1
+
+    if envelope is None:
+        # no rows: render an empty envelope
+        serializer = get_serializer([], many=True)
+        envelope = serializer.child.envelope
+        if envelope:
+            data = {serializer.child.get_plural_name(): []}
+        else:
+            data = []
+        yield renderer.render(post_process(data))
+        return
+
+    yield b"]"
+    if processor is not None:
+        for name, records in post_process(dict(processor.data)).items():
+            yield b"," + renderer.render(name) + b":" + renderer.render(records)
+        yield b"}"
@@ -3,22 +3,30 @@ from __future__ import annotations
 
 import json
 import logging
-from typing import Protocol, runtime_checkable
+from typing import NamedTuple, Protocol, runtime_checkable
 
-from django.core.exceptions import ObjectDoesNotExist
-from django.db import IntegrityError, transaction
-from django.http import QueryDict
+from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist
+from django.db import IntegrityError, connections, models, router, transaction
+from django.http import QueryDict, StreamingHttpResponse
+from django.utils.datastructures import MultiValueDict
 from rest_framework import exceptions, status, viewsets
 from rest_framework.exceptions import ValidationError
-from rest_framework.renderers import BaseRenderer, BrowsableAPIRenderer
+from rest_framework.renderers import BaseRenderer, BrowsableAPIRenderer, JSONRenderer
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.utils import model_meta
 
+from dynamic_rest.budgets import QueryBudget
 from dynamic_rest.conf import settings
+from dynamic_rest.fields import RELATED_INSTANCES
 from dynamic_rest.filters import DynamicFilterBackend, DynamicSortingFilter
+from dynamic_rest.meta import get_bulk_update_fields
 from dynamic_rest.metadata import DynamicMetadata
 from dynamic_rest.pagination import DynamicPageNumberPagination
+from dynamic_rest.plans import EXPLAIN, PLAN, QueryPlanRecorder
 from dynamic_rest.processors import SideloadingProcessor
+from dynamic_rest.renderers import DynamicJSONRenderer
+from dynamic_rest.streaming import stream_list
 from dynamic_rest.utils import is_truthy
 
 UPDATE_REQUEST_METHODS = ("PUT", "PATCH", "POST")
@@ -28,38 +36,45 @@ PATCH = "PATCH"
 logger = logging.getLogger(__name__)
 
 
-def _extract_object_params(
-    request: Request, name: str, raw: bool = False
-) -> dict | None:
-    """Extract object params, return as dict.
+class ObjectParams(NamedTuple):
+    """The parsed query params of an object-type feature, e.g. `filter{}`.
+
+    Attributes:
+        params: A dict of keys to lists of values, e.g. `{"name": ["foo"]}`
+            for `filter{name}=foo`.
+        raw: The values of the feature's own param (e.g. `filter{}`), if any.
+        error: The first malformed key, if any.
+    """
 
-    Always returns None if raw??? # TODO: Make sure this makes sense.
+    params: dict
+    raw: list | None = None
+    error: str | None = None
+
+
+def _parse_object_params(params) -> dict[str, ObjectParams]:
+    """Parse the params of all object-type features in one pass.
 
     Args:
-        request: Request object.
-        name: Name of the object.
-        raw: Raw flag.
+        params: An iterable of (name, values) tuples.
 
     Returns:
-        dict | None: Parsed object params.
+        dict: Parsed object params by feature name (e.g. `filter{}`).
     """
-    params = request.query_params.lists()
-    logger.debug("Extracting object params: %s", name)
-    params_map = {}
-    original_name = name
-    prefix = name[:-1]
-    offset = len(prefix)
-    logger.debug("Name: %s, Prefix: %s, Offset: %s", name, prefix, offset)
-
+    parsed = {}
     for param_name, value in params:
-        if param_name == original_name:
-            if raw and value:
-                # filter{} as object
-                return json.loads(value[0])
-            else:
-                continue
-
-        if not param_name.startswith(prefix):
+        offset = param_name.find("{")
+        if offset < 0:
+            continue
+        offset += 1
+        name = param_name[:offset] + "}"
+        object_params = parsed.get(name)
+        if object_params is None:
+            object_params = parsed[name] = ObjectParams({})
+
+        if param_name == name:
+            # filter{} as object
+            if object_params.raw is None and value:
+                parsed[name] = object_params._replace(raw=value)
             continue
 
         if param_name.endswith("}"):
@@ -71,9 +86,9 @@ def _extract_object_params(
         else:
             # malformed argument like:
             # filter{foo=bar
-            raise exceptions.ParseError(
-                f'"{param_name}" is not a well-formed filter key.'
-            )
+            if object_params.error is None:
+                parsed[name] = object_params._replace(error=param_name)
+            continue
         if param_name.endswith(".in"):
             temp_value = []
             for v in value:
@@ -83,9 +98,61 @@ def _extract_object_params(
                 else:
                     temp_value.append(v)
             value = temp_value
-        params_map[param_name] = value
-    logger.debug("Extracted object params: %s", params_map)
-    return None if raw else params_map
+        object_params.params[param_name] = value
+    return parsed
+
+
+def _get_object_params(
+    object_params: ObjectParams | None, raw: bool = False
+) -> dict | None:
+    """Return the value of an object-type feature.
+
+    Args:
+        object_params: Parsed object params.
+        raw: Raw flag.
+
+    Returns:
+        dict | None: The JSON object passed as the feature's own param
+            if raw (or None if there is none), otherwise the params.
+    """
+    if object_params is None:
+        return None if raw else {}
+    if raw and object_params.raw:
+        return json.loads(object_params.raw[0])
+    if object_params.error is not None:
+        raise exceptions.ParseError(
+            f'"{object_params.error}" is not a well-formed filter key.'
+        )
+    if raw:
+        return None
+    return {key: list(values) for key, values in object_params.params.items()}
+
+
+def _extract_object_params(
+    request: Request, name: str, raw: bool = False
+) -> dict | None:
+    """Extract the value of an object-type feature from a request.
+
+    If raw, return the JSON object passed as the feature's own param
+    (e.g. `filter{}={"name": "foo"}`), or None if there is none.
+    Otherwise, return the feature's params by key (e.g. `{"name": ["foo"]}`
+    for `filter{name}=foo`), raising a ParseError for malformed keys.
+
+    Args:
+        request: Request object.
+        name: Name of the feature, e.g. `filter{}`.
+        raw: Whether to return the feature's own JSON object.
+
+    Returns:
+        dict | None: The value of the feature.
+    """
+    query_params = request.query_params
+    logger.debug("Extracting object params: %s", name)
+    if isinstance(query_params, QueryParams):
+        object_params = query_params.get_object_params(name)
+    else:
+        object_params = _parse_object_params(query_params.lists()).get(name)
+    return _get_object_params(object_params, raw=raw)
 
 
 def handle_encodings(request: Request) -> QueryParams:
@@ -123,18 +190,61 @@ class QueryParams(QueryDict):
     Instantiated from a DRF Request object, and returns
      a mutable QueryDict subclass. Also adds methods that
      might be useful for our use-case.
+
+    The params of object-type features (e.g. `filter{}`) are parsed
+    together the first time one of them is requested, and the values of
+    other features (e.g. `include[]` or `page`) are cached the first time
+    they are requested. Both are cleared when the params are changed.
     """
 
+    _object_params = None
+    _feature_values = None
+
     def __init__(self, query_params, *args, **kwargs):
         """Initialize the QueryParams object."""
+        kwargs["mutable"] = True
+        if isinstance(query_params, MultiValueDict):
+            # copy the values, rather than encoding and parsing them again
+            kwargs.setdefault("encoding", getattr(query_params, "encoding", None))
+            super().__init__(None, *args, **kwargs)
+            for key, values in query_params.lists():
+                self.setlist(key, list(values))
+            return
         if hasattr(query_params, "urlencode"):
             query_string = query_params.urlencode()
         else:
             assert isinstance(query_params, (str, bytes))
             query_string = query_params
-        kwargs["mutable"] = True
         super().__init__(query_string, *args, **kwargs)
 
+    def get_object_params(self, name: str) -> ObjectParams | None:
+        """Return the parsed params of an object-type feature, if any.
+
+        Arguments:
+            name: The name of the feature, e.g. `filter{}`.
+        """
+        if self._object_params is None:
+            self._object_params = _parse_object_params(self.lists())
+        return self._object_params.get(name)
+
+    def get_feature_values(self, name: str) -> tuple:
+        """Return the values of an array-type or single-type feature.
+
+        Arguments:
+            name: The name of the feature, e.g. `include[]` or `page`.
+        """
+        if self._feature_values is None:
+            self._feature_values = {}
+        values = self._feature_values.get(name)
+        if values is None:
+            values = self._feature_values[name] = tuple(self.getlist(name))
+        return values
+
+    def _changed(self):
+        """Invalidate the parsed object params and cached feature values."""
+        self._object_params = None
+        self._feature_values = None
+
     def add(self, key, value):
         """Add a key/value pair to the QueryDict.
 
@@ -151,6 +261,46 @@ class QueryParams(QueryDict):
         else:
             self.appendlist(key, value)
 
+    def __setitem__(self, key, value):
+        """Set a value, and invalidate the parsed object params."""
+        super().__setitem__(key, value)
+        self._changed()
+
+    def __delitem__(self, key):
+        """Delete a key, and invalidate the parsed object params."""
+        super().__delitem__(key)
+        self._changed()
+
+    def setlist(self, key, list_):
+        """Set a list of values, and invalidate the parsed object params."""
+        super().setlist(key, list_)
+        self._changed()
+
+    def setlistdefault(self, key, default_list=None):
+        """Get or set a list of values, and invalidate the parsed object params."""
+        self._changed()
+        return super().setlistdefault(key, default_list)
+
+    def appendlist(self, key, value):
+        """Append a value, and invalidate the parsed object params."""
+        super().appendlist(key, value)
+        self._changed()
+
+    def pop(self, key, *args):
+        """Remove a key, and invalidate the parsed object params."""
+        self._changed()
+        return super().pop(key, *args)
+
+    def popitem(self):
+        """Remove an item, and invalidate the parsed object params."""
+        self._changed()
+        return super().popitem()
+
+    def clear(self):
+        """Remove all items, and invalidate the parsed object params."""
+        super().clear()
+        self._changed()
+
 
 @runtime_checkable
 class HasRequestProperty(Protocol):
@@ -169,6 +319,48 @@ class HasInitializeRequest(Protocol):
         return super().initialize_request(request, *args, **kwargs)
 
 
+@runtime_checkable
+class HasInitial(Protocol):
+    """Protocol for initial method."""
+
+    # pylint: disable=W0246
+    def initial(self, request: Request, *args, **kwargs) -> None:
+        """Run anything that needs to occur prior to calling the handler."""
+        return super().initial(request, *args, **kwargs)
+
+
+@runtime_checkable
+class HasFinalizeResponse(Protocol):
+    """Protocol for finalize_response method."""
+
+    # pylint: disable=W0246
+    def finalize_response(
+        self, request: Request, response: Response, *args, **kwargs
+    ) -> Response:
+        """Return the final response object."""
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+@runtime_checkable
+class HasDispatch(Protocol):
+    """Protocol for dispatch method."""
+
+    # pylint: disable=W0246
+    def dispatch(self, request, *args, **kwargs):
+        """Dispatch a request to its handler."""
+        return super().dispatch(request, *args, **kwargs)
+
+
+@runtime_checkable
+class HasFilterQueryset(Protocol):
+    """Protocol for filter_queryset method."""
+
+    # pylint: disable=W0246
+    def filter_queryset(self, queryset):
+        """Filter a queryset with the filter backends."""
+        return super().filter_queryset(queryset)
+
+
 @runtime_checkable
 class HasGetRenderers(Protocol):
     """Protocol for get_renderers method."""
@@ -180,7 +372,13 @@ class HasGetRenderers(Protocol):
 
 
 class WithDynamicViewSetMixin(
-    HasInitializeRequest, HasGetRenderers, HasRequestProperty
+    HasInitializeRequest,
+    HasInitial,
+    HasFinalizeResponse,
+    HasDispatch,
+    HasFilterQueryset,
+    HasGetRenderers,
+    HasRequestProperty,
 ):
     """A ViewSet that can support dynamic API features.
 
@@ -192,6 +390,8 @@ class WithDynamicViewSetMixin(
     DEBUG = "debug"
     SIDELOADING = "sideloading"
     PATCH_ALL = "patch-all"
+    BULK_UPDATE = "bulk-update"
+    STREAM = "stream"
     INCLUDE = "include[]"
     EXCLUDE = "exclude[]"
     FILTER = "filter{}"
@@ -212,9 +412,17 @@ class WithDynamicViewSetMixin(
         SORT,
         SIDELOADING,
         PATCH_ALL,
+        STREAM,
     )
     meta = None
     filter_backends = (DynamicFilterBackend, DynamicSortingFilter)
+    plan_recorder = None
+    plan_queryset = None
+    # maximum number of queries per request (defaults to QUERY_BUDGET)
+    query_budget = None
+    # "log" or "reject" (defaults to QUERY_BUDGET_ACTION)
+    query_budget_action = None
+    query_budget_tracker = None
 
     def initialize_request(self, request: Request, *args, **kwargs) -> Request:
         """Initialize the request object.
@@ -235,13 +443,75 @@ class WithDynamicViewSetMixin(
         request.GET = handle_encodings(request)
         return super().initialize_request(request, *args, **kwargs)
 
+    def initial(self, request: Request, *args, **kwargs) -> None:
+        """Start recording queries for query plans and budgets.
+
+        Recording starts once the request is authenticated and allowed.
+        """
+        super().initial(request, *args, **kwargs)
+        if plan := self.get_request_plan():
+            self.plan_recorder = QueryPlanRecorder(explain=plan == EXPLAIN)
+            self.plan_recorder.start()
+        if tracker := self.get_query_budget():
+            self.query_budget_tracker = tracker
+            tracker.start()
+
+    def finalize_response(
+        self, request: Request, response: Response, *args, **kwargs
+    ) -> Response:
+        """Add the query plan to the response, if one was requested."""
+        recorder = self.plan_recorder
+        if recorder is not None:
+            # stop before explaining, so EXPLAIN queries are not recorded
+            recorder.stop()
+            data = getattr(response, "data", None)
+            if isinstance(data, dict):
+                data["plan"] = recorder.get_plan(self.plan_queryset)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def dispatch(self, request, *args, **kwargs):
+        """Dispatch a request, then stop recording its queries.
+
+        Recording is stopped even if the handler raises an exception
+        that DRF does not handle. Requests that exceeded their query
+        budget or ran N+1 queries are logged.
+        """
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            tracker = self.query_budget_tracker
+            if tracker is not None:
+                self.query_budget_tracker = None
+                tracker.stop()
+                tracker.report(self.request)
+            recorder = self.plan_recorder
+            if recorder is not None:
+                self.plan_recorder = None
+                recorder.stop()
+
+    def filter_queryset(self, queryset):
+        """Filter a queryset, keeping it for the query plan if needed."""
+        queryset = super().filter_queryset(queryset)
+        if self.plan_recorder is not None:
+            self.plan_queryset = queryset
+        return queryset
+
     def get_renderers(self) -> list[BaseRenderer]:
         """Optionally block Browsable API rendering.
 
+        DRF's JSONRenderer is replaced by DynamicJSONRenderer,
+        unless ENABLE_ORJSON_RENDERER is disabled.
+
         Returns:
             list[BaseRenderer]: List of renderers.
         """
         renderers = super().get_renderers()
+        if settings.ENABLE_ORJSON_RENDERER:
+            # replace JSONRenderer itself, not subclasses that customize it
+            renderers = [
+                DynamicJSONRenderer() if r.__class__ is JSONRenderer else r
+                for r in renderers
+            ]
         if settings.ENABLE_BROWSABLE_API is False:
             return [r for r in renderers if not isinstance(r, BrowsableAPIRenderer)]
         return renderers
@@ -258,9 +528,14 @@ class WithDynamicViewSetMixin(
         """
         name_is_feature = name in self.features
         request = self.request
+        query_params = request.query_params
         if "[]" in name:
             logger.debug("Using array-type feature: %s", name)
-            return request.query_params.getlist(name) if name_is_feature else None
+            if not name_is_feature:
+                return None
+            if isinstance(query_params, QueryParams):
+                return list(query_params.get_feature_values(name))
+            return query_params.getlist(name)
         elif "{}" in name:
             logger.debug(
                 "Using object-type feature (keys are not consistent): %s", name
@@ -271,7 +546,12 @@ class WithDynamicViewSetMixin(
                 else {}
             )
         logger.debug("Using single-type feature: %s", name)
-        return request.query_params.get(name) if name_is_feature else None
+        if not name_is_feature:
+            return None
+        if isinstance(query_params, QueryParams):
+            values = query_params.get_feature_values(name)
+            return values[-1] if values else None
+        return query_params.get(name)
 
     def get_queryset(self, queryset=None):  # pylint: disable=unused-argument
         """Returns a queryset for this request.
@@ -327,7 +607,7 @@ class WithDynamicViewSetMixin(
         if not patch_all:
             return None
         patch_all = patch_all.lower()
-        if patch_all == "query":
+        if patch_all in ("query", "bulk"):
             pass
         elif is_truthy(patch_all):
             patch_all = True
@@ -337,16 +617,62 @@ class WithDynamicViewSetMixin(
             )
         return patch_all
 
+    def get_request_bulk_update(self):
+        """Get request bulk-update value ("loop" or "bulk")."""
+        mode = self.get_request_feature(self.BULK_UPDATE)
+        if not mode:
+            return None
+        mode = mode.lower()
+        if mode not in ("loop", "bulk"):
+            raise exceptions.ParseError(f'"{mode}" is not valid for {self.BULK_UPDATE}')
+        return mode
+
     def get_request_debug(self):
         """Get request debug value."""
+        if self.get_request_plan():
+            return None
         debug = self.get_request_feature(self.DEBUG)
         return is_truthy(debug) if debug is not None else None
 
+    def get_query_budget(self):
+        """Return a QueryBudget for this request, or None.
+
+        A budget is used if the viewset's `query_budget` or QUERY_BUDGET
+        is set, or if N+1 detection is enabled by N_PLUS_ONE_THRESHOLD.
+        """
+        budget = self.query_budget
+        if budget is None:
+            budget = settings.QUERY_BUDGET
+        threshold = settings.N_PLUS_ONE_THRESHOLD
+        if budget is None and not threshold:
+            return None
+        return QueryBudget(
+            budget=budget,
+            action=self.query_budget_action or settings.QUERY_BUDGET_ACTION,
+            threshold=threshold,
+        )
+
+    def get_request_plan(self):
+        """Get the requested query plan: "plan", "explain" or None.
+
+        Query plans are only returned if ENABLE_QUERY_PLAN is set.
+        """
+        if not settings.ENABLE_QUERY_PLAN:
+            return None
+        debug = self.get_request_feature(self.DEBUG)
+        debug = debug.lower() if debug else None
+        return debug if debug in (PLAN, EXPLAIN) else None
+
     def get_request_sideloading(self):
         """Get request sideloading value."""
         sideloading = self.get_request_feature(self.SIDELOADING)
         return is_truthy(sideloading) if sideloading is not None else None
 
+    def get_request_stream(self):
+        """Get request stream value."""
+        stream = self.get_request_feature(self.STREAM)
+        return is_truthy(stream) if stream is not None else None
+
     def is_update(self):
         """Return True if the request is an update request."""
         return self.request and self.request.method.upper() in UPDATE_REQUEST_METHODS
@@ -467,8 +793,42 @@ class DynamicModelViewSet(WithDynamicViewSetMixin, viewsets.ModelViewSet):
     """A ModelViewSet that supports dynamic API features."""
 
     ENABLE_BULK_PARTIAL_CREATION = settings.ENABLE_BULK_PARTIAL_CREATION
+    ENABLE_BULK_CREATE = settings.ENABLE_BULK_CREATE
+    BULK_CREATE_BATCH_SIZE = settings.BULK_CREATE_BATCH_SIZE
     ENABLE_BULK_UPDATE = settings.ENABLE_BULK_UPDATE
+    BULK_UPDATE_MODE = settings.BULK_UPDATE_MODE
+    BULK_UPDATE_BATCH_SIZE = settings.BULK_UPDATE_BATCH_SIZE
+    ENABLE_BULK_DELETE = settings.ENABLE_BULK_DELETE
+    BULK_DELETE_BATCH_SIZE = settings.BULK_DELETE_BATCH_SIZE
     ENABLE_PATCH_ALL = settings.ENABLE_PATCH_ALL
+    ENABLE_STREAMING = settings.ENABLE_STREAMING
+    STREAMING_CHUNK_SIZE = settings.STREAMING_CHUNK_SIZE
+
+    def list(self, request, *args, **kwargs):
+        """List model instances.
+
+        If ENABLE_STREAMING is set and the request has a truthy
+        `stream` parameter, the response is streamed instead:
+        instances are serialized STREAMING_CHUNK_SIZE at a time,
+        without pagination, and sideloaded records are rendered
+        after the primary resource. This bounds the memory needed
+        to export large lists.
+        """
+        if not self.ENABLE_STREAMING or not self.get_request_stream():
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        return StreamingHttpResponse(
+            stream_list(
+                self.get_serializer,
+                queryset,
+                self.STREAMING_CHUNK_SIZE,
+                renderer=(
+                    DynamicJSONRenderer() if settings.ENABLE_ORJSON_RENDERER else None
+                ),
+            ),
+            content_type="application/json",
+        )
 
     def _get_bulk_payload(self, request):
         """Get bulk payload from request."""
@@ -490,9 +850,24 @@ class DynamicModelViewSet(WithDynamicViewSetMixin, viewsets.ModelViewSet):
             partial=partial,
         )
         serializer.is_valid(raise_exception=True)
-        self.perform_update(serializer)
+        mode = self.get_request_bulk_update() or self.BULK_UPDATE_MODE
+        if mode == "bulk":
+            self.perform_bulk_update(serializer)
+        else:
+            self.perform_update(serializer)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    def perform_bulk_update(self, serializer):
+        """Update the instances of a list serializer with bulk_update.
+
+        See `DynamicListSerializer.bulk_update`.
+        """
+        serializer.instance = serializer.bulk_update(
+            serializer.instance,
+            serializer.validated_data,
+            batch_size=self.BULK_UPDATE_BATCH_SIZE,
+        )
+
     def _validate_patch_all(self, data):
         """Validate patch-all data."""
         if not isinstance(data, dict):
@@ -533,19 +908,53 @@ class DynamicModelViewSet(WithDynamicViewSetMixin, viewsets.ModelViewSet):
                     updated += 1
                 return updated
         except IntegrityError as e:
-            raise ValidationError(
-                "Failed to update records:\n" f"{str(e)}\n" f"Data: {str(data)}"
-            ) from e
+            raise self._get_patch_all_error(e, data) from e
+
+    def _patch_all_bulk(self, queryset, data):
+        """Update by QuerySet.bulk_update."""
+        meta = queryset.model._meta  # pylint: disable=protected-access
+        if not get_bulk_update_fields(meta).issuperset(data):
+            # only concrete fields can be written with bulk_update
+            return self._patch_all_loop(queryset, data)
+
+        # update loaded records with a query per batch
+        manager = queryset.model._default_manager  # pylint: disable=protected-access
+        try:
+            with transaction.atomic():
+                records = list(queryset)
+                for record in records:
+                    for k, v in data.items():
+                        setattr(record, k, v)
+                if records:
+                    manager.bulk_update(
+                        records, list(data), batch_size=self.BULK_UPDATE_BATCH_SIZE
+                    )
+                return len(records)
+        except IntegrityError as e:
+            raise self._get_patch_all_error(e, data) from e
+
+    @staticmethod
+    def _get_patch_all_error(error, data):
+        """Return the validation error for a failed patch-all update."""
+        return ValidationError(
+            "Failed to update records:\n" f"{str(error)}\n" f"Data: {str(data)}"
+        )
 
-    def _patch_all(self, data, query=False):
-        """Update all records in a queryset."""
+    def _patch_all(self, data, mode=True):
+        """Update all records in a queryset.
+
+        Arguments:
+            data: The patch-all data.
+            mode: "query", "bulk", or True (to update in a loop).
+        """
         queryset = self.filter_queryset(self.get_queryset())
         data = self._validate_patch_all(data)
-        updated = (
-            self._patch_all_query(queryset, data)
-            if query
-            else self._patch_all_loop(queryset, data)
-        )
+        if mode == "query":
+            updated = self._patch_all_query(queryset, data)
+        elif mode == "bulk":
+            updated = self._patch_all_bulk(queryset, data)
+        else:
+            updated = self._patch_all_loop(queryset, data)
         return Response({"meta": {"updated": updated}}, status=status.HTTP_200_OK)
 
     def update(self, request, *args, **kwargs):
@@ -577,6 +986,20 @@ class DynamicModelViewSet(WithDynamicViewSetMixin, viewsets.ModelViewSet):
               - This will be fast, but may break data constraints that
                are controlled by signals
               - This is considered unsafe but useful in certain situations
+            bulk: records will be fetched, and then updated
+             with a query per BULK_UPDATE_BATCH_SIZE records
+              - The `QuerySet.bulk_update` method will be called and model
+               signals will not run
+              - This is faster than the transaction loop, and only writes
+               the patched fields
+              - Fields that are not concrete model fields are updated
+               in the transaction loop instead
+
+        Records updated by ID are saved in a transaction loop, unless
+        BULK_UPDATE_MODE is "bulk", in which case they are updated with
+        `QuerySet.bulk_update` as well. Viewsets that add BULK_UPDATE to
+        their `features` let the mode be chosen per request, with the
+        "bulk-update" query parameter ("loop" or "bulk").
 
         The server's successful response to a patch-all request
         will NOT include any individual records.
@@ -613,7 +1036,7 @@ class DynamicModelViewSet(WithDynamicViewSetMixin, viewsets.ModelViewSet):
             if self.ENABLE_PATCH_ALL and patch_all:
                 # patch-all update
                 data = request.data
-                return self._patch_all(data, query=patch_all == "query")
+                return self._patch_all(data, mode=patch_all)
             else:
                 # bulk payload update
                 partial = "partial" in kwargs
@@ -638,13 +1061,23 @@ class DynamicModelViewSet(WithDynamicViewSetMixin, viewsets.ModelViewSet):
 
     def _create_many(self, data):
         """Create many model instances in bulk."""
+        if self.ENABLE_BULK_CREATE and self._can_bulk_create():
+            return self._bulk_create_many(data)
+        return self._create_many_serially(data)
+
+    def _create_many_serially(self, data):
+        """Create many model instances, one at a time."""
         items = []
         errors = []
-        result = {}
         serializers = []
 
+        # Share related instances between the serializers of all entries.
+        context = self.get_serializer_context()
+        context[RELATED_INSTANCES] = {}
+        self.get_serializer(context=context).resolve_related_instances(data)
+
         for entry in data:
-            serializer = self.get_serializer(data=entry)
+            serializer = self.get_serializer(data=entry, context=context)
             try:
                 serializer.is_valid(raise_exception=True)
             except exceptions.ValidationError as e:
@@ -660,6 +1093,10 @@ class DynamicModelViewSet(WithDynamicViewSetMixin, viewsets.ModelViewSet):
                 self.perform_create(serializer)
                 items.append(serializer.to_representation(serializer.instance))
 
+        return self._get_create_many_response(items, errors)
+
+    def _get_create_many_response(self, items, errors):
+        """Return the response to a bulk creation."""
         # Populate serialized data to the result.
         result = SideloadingProcessor(self.get_serializer(), items).data
 
@@ -671,6 +1108,169 @@ class DynamicModelViewSet(WithDynamicViewSetMixin, viewsets.ModelViewSet):
 
         return Response(result, status=code)
 
+    def _can_bulk_create(self):
+        """Return True if created rows can be inserted with bulk_create.
+
+        This requires a database that returns the primary keys of
+        rows inserted in bulk.
+        """
+        model = self.get_serializer_class().get_model()
+        connection = connections[router.db_for_write(model)]
+        return connection.features.can_return_rows_from_bulk_insert
+
+    def _bulk_create_many(self, data):
+        """Create many model instances with bulk_create.
+
+        All entries are validated by the child of a single list
+        serializer, and the created instances are represented
+        by that list serializer.
+
+        Entries are validated independently, so entries that conflict
+        with each other can fail to insert. In that case, with partial
+        creation the entries are created one at a time instead, and
+        without it the request is rejected.
+        """
+        serializer = self.get_serializer(data=data, many=True)
+        serializer._context[RELATED_INSTANCES] = {}  # pylint: disable=protected-access
+        child = serializer.child
+        child.resolve_related_instances(data)
+
+        validated_data = []
+        errors = []
+        for entry in data:
+            try:
+                validated_data.append(child.run_validation(entry))
+            except exceptions.ValidationError as e:
+                errors.append({"detail": str(e), "source": entry})
+
+        items = []
+        if validated_data and (self.ENABLE_BULK_PARTIAL_CREATION or not errors):
+            try:
+                instances = self.perform_bulk_create(serializer, validated_data)
+            except IntegrityError as e:
+                if self.ENABLE_BULK_PARTIAL_CREATION:
+                    return self._create_many_serially(data)
+                raise ValidationError(
+                    "Failed to create records:\n" f"{str(e)}\n" f"Data: {str(data)}"
+                ) from e
+            items = serializer.to_representation(instances)
+        return self._get_create_many_response(items, errors)
+
+    def perform_bulk_create(self, serializer, validated_data):
+        """Create model instances from validated data with bulk_create.
+
+        Unlike `perform_create`, this does not call the serializer's
+        `create` or the model's `save`, and does not send signals.
+        Many-to-many values are set once the rows are inserted, with one
+        insert into the through table of each relation where possible.
+
+        Arguments:
+            serializer: The list serializer of the created instances.
+            validated_data: A list of validated data, one per instance.
+
+        Returns:
+            The list of created instances.
+        """
+        model = serializer.child.get_model()
+        relations = model_meta.get_field_info(model).relations
+        instances = []
+        many_to_many = []
+        for data in validated_data:
+            data = dict(data)
+            many_to_many.append(
+                {
+                    name: data.pop(name)
+                    for name, relation in relations.items()
+                    if relation.to_many and name in data
+                }
+            )
+            instances.append(model(**data))
+
+        with transaction.atomic(using=router.db_for_write(model)):
+            model._default_manager.bulk_create(  # pylint: disable=protected-access
+                instances, batch_size=self.BULK_CREATE_BATCH_SIZE
+            )
+            through_rows = {}
+            for instance, values in zip(instances, many_to_many):
+                for name, value in values.items():
+                    through = self._get_m2m_through(model, name)
+                    if through:
+                        through_rows.setdefault(through, []).extend(
+                            self._get_through_rows(*through, instance, value)
+                        )
+                    else:
+                        getattr(instance, name).set(value)
+
+            for (through, _, _), rows in through_rows.items():
+                manager = through._default_manager  # pylint: disable=protected-access
+                manager.bulk_create(rows, batch_size=self.BULK_CREATE_BATCH_SIZE)
+        return instances
+
+    @staticmethod
+    def _get_m2m_through(model, name):
+        """Return the through model of a many-to-many relation, if generated.
+
+        Arguments:
+            model: A model class.
+            name: The name of a to-many relation of the model, or its
+                accessor name for reverse relations.
+
+        Returns:
+            A tuple of the through model and the names of its foreign keys
+            to `model` and to the related model, or None for relations that
+            are not many-to-many or have a custom or symmetrical through model.
+        """
+        meta = model._meta  # pylint: disable=protected-access
+        try:
+            field = meta.get_field(name)
+        except FieldDoesNotExist:
+            field = None
+        if isinstance(field, models.ManyToManyField):
+            source, target = field.m2m_field_name(), field.m2m_reverse_field_name()
+        else:
+            field = next(
+                (
+                    rel.field
+                    for rel in meta.related_objects
+                    if rel.many_to_many and rel.get_accessor_name() == name
+                ),
+                None,
+            )
+            if field is None:
+                return None
+            source, target = field.m2m_reverse_field_name(), field.m2m_field_name()
+
+        through = field.remote_field.through
+        if (
+            not through._meta.auto_created  # pylint: disable=protected-access
+            or field.remote_field.symmetrical
+        ):
+            return None
+        return through, source, target
+
+    @staticmethod
+    def _get_through_rows(through, source, target, instance, values):
+        """Return the through model rows that relate an instance to values.
+
+        Arguments:
+            through: The through model of a many-to-many relation.
+            source: The name of the through model's foreign key to the instance.
+            target: The name of its foreign key to the related model.
+            instance: A newly created instance.
+            values: Related instances or their keys, as accepted by `set`.
+        """
+        meta = through._meta  # pylint: disable=protected-access
+        target_field = meta.get_field(target)
+        targets = {}
+        for value in values:
+            if isinstance(value, models.Model):
+                value = getattr(value, target_field.target_field.attname)
+            targets.setdefault(value, None)
+        return [
+            through(**{source: instance, target_field.attname: value})
+            for value in targets
+        ]
+
     def create(self, request, *args, **kwargs):
         """Create one or more model instances.
 
@@ -714,16 +1314,60 @@ class DynamicModelViewSet(WithDynamicViewSetMixin, viewsets.ModelViewSet):
             return self._create_many(bulk_payload)
         return super().create(request, *args, **kwargs)
 
+    def _get_bulk_lookups(self, data):
+        """Get the lookup values of the records of a bulk payload.
+
+        Records are looked up by the view's `lookup_field`, which is
+        serialized as "id" when it is the primary key.
+        """
+        lookup_field = self.lookup_field
+        key = "id" if lookup_field == "pk" else lookup_field
+        try:
+            return [entry[key] for entry in data]
+        except (KeyError, TypeError) as e:
+            raise ValidationError(
+                f'Bulk payload records must be objects with "{key}"'
+            ) from e
+
     def _destroy_many(self, data):
         """Destroy many model instances in bulk."""
         instances = (
-            self.get_queryset().filter(id__in=[d["id"] for d in data]).distinct()
+            self.get_queryset()
+            .filter(**{f"{self.lookup_field}__in": self._get_bulk_lookups(data)})
+            .distinct()
         )
-        for instance in instances:
-            self.check_object_permissions(self.request, instance)
-            self.perform_destroy(instance)
+        if self.ENABLE_BULK_DELETE:
+            instances = list(instances)
+            for instance in instances:
+                self.check_object_permissions(self.request, instance)
+            self.perform_bulk_destroy(instances)
+        else:
+            for instance in instances:
+                self.check_object_permissions(self.request, instance)
+                self.perform_destroy(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    def perform_bulk_destroy(self, instances):
+        """Delete model instances with QuerySet.delete.
+
+        Unlike `perform_destroy`, this does not call the model's `delete`.
+        Cascades are collected once per BULK_DELETE_BATCH_SIZE instances,
+        and model signals still run.
+
+        Arguments:
+            instances: The list of instances to delete.
+        """
+        if not instances:
+            return
+        model = type(instances[0])
+        pks = [instance.pk for instance in instances]
+        batch_size = self.BULK_DELETE_BATCH_SIZE or len(pks)
+        with transaction.atomic(using=router.db_for_write(model)):
+            for i in range(0, len(pks), batch_size):
+                model._default_manager.filter(  # pylint: disable=protected-access
+                    pk__in=pks[i : i + batch_size]
+                ).delete()
+
     def destroy(self, request, *args, **kwargs):
         """Either delete a single or many model instances in bulk.
 
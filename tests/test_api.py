@@ -6,11 +6,19 @@ from urllib.parse import quote, quote_plus
 
 from django.db import connection
 from django.test import override_settings
+from mock import patch
 from rest_framework.exceptions import ErrorDetail
 
+from dynamic_rest.filters import DynamicSortingFilter
+from dynamic_rest.filters.fast import FastDynamicFilterBackend
+from dynamic_rest.filters.sorting import ORDERINGS
+from dynamic_rest.pagination import DynamicKeysetPagination
+from dynamic_rest.prefetch import FastPrefetch, FastQuery
+from dynamic_rest.processors import register_post_processor
 from tests.models import Cat, Group, Location, Permission, Profile, User
 from tests.serializers import NestedEphemeralSerializer, PermissionSerializer
 from tests.setup import create_fixture
+from tests.viewsets import DogViewSet, UserLocationViewSet
 
 if os.getenv("DATABASE_URL"):
     from tests.test_cases import ResetAPITestCase as TestCase
@@ -885,6 +893,31 @@ class TestUsersAPI(TestCase):
         data = json.loads(response.content.decode("utf-8"))
         self.assertEqual([3, 2, 1, 1], [row["location"] for row in data["users"]])
 
+    def test_sort_relation_field_cached(self):
+        """Test sort terms are resolved once per serializer class."""
+        ORDERINGS.clear()
+        url = "/users/?sort[]=location.name"
+        for _ in range(2):
+            response = self.client.get(url)
+            self.assertEqual(200, response.status_code)
+        self.assertEqual(1, len(ORDERINGS))
+        with patch("dynamic_rest.filters.sorting._resolve_ordering") as resolve:
+            response = self.client.get(url)
+        resolve.assert_not_called()
+        data = json.loads(response.content.decode("utf-8"))
+        self.assertEqual([1, 1, 2, 3], [row["location"] for row in data["users"]])
+
+    def test_sort_cache_disabled(self):
+        """Test sort terms are resolved on every request without a cache."""
+        with override_settings(
+            DYNAMIC_REST={"ENABLE_LINKS": False, "ORDERING_CACHE_SIZE": 0}
+        ):
+            response = self.client.get("/users/?sort[]=location.name")
+            self.assertEqual(200, response.status_code)
+            self.assertEqual(0, len(ORDERINGS))
+            data = json.loads(response.content.decode("utf-8"))
+            self.assertEqual([1, 1, 2, 3], [row["location"] for row in data["users"]])
+
     def test_sort_relation_field_many(self):
         """Test sort relation field many."""
         url = "/locations/?sort[]=friendly_cats.name"
@@ -1182,6 +1215,86 @@ class TestUserLocationsAPI(TestCase):
         self.assertFalse(isinstance(location, dict))
 
 
+@override_settings(DYNAMIC_REST={"ENABLE_LINKS": False})
+class TestStreamingAPI(TestCase):
+    """Test streamed list responses."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.fixture = create_fixture()
+
+    def _get_streamed(self, url):
+        """Get a streamed response, with records streamed two at a time."""
+        with patch.object(UserLocationViewSet, "ENABLE_STREAMING", True), patch.object(
+            UserLocationViewSet, "STREAMING_CHUNK_SIZE", 2
+        ):
+            response = self.client.get(url)
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(response.streaming)
+        return json.loads(b"".join(response.streaming_content).decode("utf-8"))
+
+    def test_stream_matches_list(self):
+        """Test streamed responses match regular responses."""
+        url = "/user_locations/?sideloading=true&sort[]=-id"
+        expected = json.loads(self.client.get(url).content.decode("utf-8"))
+        # streamed responses are not paginated
+        del expected["meta"]
+        content = self._get_streamed(url + "&stream=true")
+        self.assertEqual(expected, content)
+        self.assertEqual([4, 3, 2, 1], [u["id"] for u in content["user_locations"]])
+        self.assertEqual([1, 2], sorted(g["id"] for g in content["groups"]))
+
+    def test_stream_fast_query(self):
+        """Test streamed responses of FastQuery querysets match regular ones."""
+        url = "/user_locations/?sideloading=true&include[]=location.&sort[]=id"
+        backends = (FastDynamicFilterBackend, DynamicSortingFilter)
+        with patch.object(UserLocationViewSet, "filter_backends", backends):
+            expected = json.loads(self.client.get(url).content.decode("utf-8"))
+            del expected["meta"]
+            content = self._get_streamed(url + "&stream=true")
+        self.assertEqual(expected, content)
+        self.assertEqual(
+            [user.location_id for user in self.fixture.users],
+            [user["location"] for user in content["user_locations"]],
+        )
+        self.assertEqual(3, len(content["locations"]))
+
+    @patch.dict("dynamic_rest.processors.POST_PROCESSORS", {})
+    def test_stream_post_processors(self):
+        """Test post-processors are applied to streamed responses."""
+
+        @register_post_processor
+        def mark_records(data):
+            """Mark records, and add a top-level key."""
+            for name, records in list(data.items()):
+                for record in records:
+                    record["marked"] = name
+            data["post_processed"] = True
+            return data
+
+        url = "/user_locations/?sideloading=true&sort[]=-id"
+        expected = json.loads(self.client.get(url).content.decode("utf-8"))
+        del expected["meta"]
+        content = self._get_streamed(url + "&stream=true")
+        self.assertEqual(expected, content)
+        self.assertTrue(content["post_processed"])
+        self.assertEqual(
+            {"user_locations"}, {u["marked"] for u in content["user_locations"]}
+        )
+        self.assertEqual({"groups"}, {g["marked"] for g in content["groups"]})
+
+    def test_stream_empty(self):
+        """Test streamed responses without records."""
+        content = self._get_streamed("/user_locations/?filter{id}=0&stream=true")
+        self.assertEqual({"user_locations": []}, content)
+
+    def test_stream_disabled(self):
+        """Test the stream parameter is ignored unless streaming is enabled."""
+        response = self.client.get("/user_locations/?stream=true")
+        self.assertEqual(200, response.status_code)
+        self.assertFalse(response.streaming)
+
+
 class TestLinks(TestCase):
     """Test links."""
 
@@ -1552,6 +1665,90 @@ class TestDogsAPI(TestCase):
         # sort field is specified
         self.assertEqual(400, response.status_code)
 
+    @patch.object(DogViewSet, "pagination_class", DynamicKeysetPagination)
+    def test_keyset_pagination(self):
+        """Test keyset pagination."""
+        url = "/dogs/?sort[]=-name&per_page=2"
+        ids = []
+        metas = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(200, response.status_code)
+            content = json.loads(response.content.decode("utf-8"))
+            ids.extend(dog["id"] for dog in content["dogs"])
+            meta = content["meta"]
+            metas.append(meta)
+            cursor = meta["next_cursor"]
+            url = f"/dogs/?sort[]=-name&per_page=2&cursor={cursor}" if cursor else None
+
+        # the primary key breaks ties between the two Spikes
+        self.assertEqual([3, 5, 4, 1, 2], ids)
+        self.assertEqual(
+            [(2, 5, 3)] * 3,
+            [(m["per_page"], m["total_results"], m["total_pages"]) for m in metas],
+        )
+
+    @patch.object(DogViewSet, "pagination_class", DynamicKeysetPagination)
+    def test_keyset_pagination_exclude_count(self):
+        """Test keyset pagination with exclude_count."""
+        url = "/dogs/?sort[]=name&per_page=4&exclude_count=1"
+        # 1 query for dogs, 0 for the cursor, 0 for count
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        content = json.loads(response.content.decode("utf-8"))
+        self.assertEqual([2, 1, 4, 3], [dog["id"] for dog in content["dogs"]])
+        meta = content["meta"]
+        self.assertTrue(meta["more_pages"])
+        self.assertNotIn("total_results", meta)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(f"{url}&cursor={meta['next_cursor']}")
+        content = json.loads(response.content.decode("utf-8"))
+        self.assertEqual([5], [dog["id"] for dog in content["dogs"]])
+        self.assertEqual(
+            {"per_page": 4, "next_cursor": None, "more_pages": False},
+            content["meta"],
+        )
+
+    def test_keyset_cursor_values(self):
+        """Test keyset cursor values are read from the fetched rows."""
+        paginator = DynamicKeysetPagination()
+        queryset = User.objects.all()
+        ordering = ["-location__name", "location", "pk"]
+        user = queryset.select_related("location").get(name="0")
+        fields = [term.lstrip("-") for term in ordering]
+        expected = list(queryset.filter(pk=user.pk).values_list(*fields)[0])
+        with self.assertNumQueries(0):
+            values = paginator.get_cursor_values(queryset, ordering, user)
+        self.assertEqual(expected, values)
+
+        # FastObject rows and their prefetched relations
+        rows = FastQuery(queryset.filter(pk=user.pk)).prefetch_related(
+            FastPrefetch("location", Location.objects.all())
+        )
+        row = list(rows)[0]
+        with self.assertNumQueries(0):
+            values = paginator.get_cursor_values(queryset, ordering, row)
+        self.assertEqual(expected, values)
+
+        # values that were not fetched with the row are queried
+        user = queryset.only("id").get(pk=user.pk)
+        with self.assertNumQueries(1):
+            values = paginator.get_cursor_values(queryset, ordering, user)
+        self.assertEqual(expected, values)
+
+    @patch.object(DogViewSet, "pagination_class", DynamicKeysetPagination)
+    def test_keyset_pagination_invalid_cursor(self):
+        """Test keyset pagination with invalid cursors."""
+        response = self.client.get("/dogs/?sort[]=name&per_page=2")
+        cursor = json.loads(response.content.decode("utf-8"))["meta"]["next_cursor"]
+
+        # cursors are only valid for the ordering they were created with
+        response = self.client.get(f"/dogs/?sort[]=-name&per_page=2&cursor={cursor}")
+        self.assertEqual(404, response.status_code)
+        response = self.client.get("/dogs/?per_page=2&cursor=invalid")
+        self.assertEqual(404, response.status_code)
+
 
 class TestHorsesAPI(TestCase):
     """Tests for sorting on default fields and limit sorting fields."""
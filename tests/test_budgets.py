@@ -0,0 +1,114 @@
+"""Tests for dynamic_rest.budgets."""
+import json
+import os
+
+from django.db import connection
+from django.test import override_settings
+from mock import patch
+from rest_framework import serializers
+
+from dynamic_rest.budgets import REJECT, QueryBudget, QueryBudgetExceeded, get_sql_shape
+from tests.models import Group, User
+from tests.setup import create_fixture
+from tests.viewsets import UserViewSet
+
+if os.getenv("DATABASE_URL"):
+    from tests.test_cases import ResetAPITestCase as TestCase
+else:
+    from tests.test_cases import APITestCase as TestCase
+
+
+class GroupCountField(serializers.Field):
+    """A field that runs one query per row."""
+
+    def to_representation(self, value):
+        """Count the groups of a user."""
+        return Group.objects.filter(users=value).count()
+
+
+class UserGroupCountSerializer(serializers.Serializer):
+    """A serializer with a field that runs one query per row."""
+
+    group_count = GroupCountField(source="pk")
+
+
+@override_settings(DYNAMIC_REST={"ENABLE_LINKS": False})
+class TestQueryBudget(TestCase):
+    """Test case for query budgets."""
+
+    def setUp(self):
+        """Set up test case."""
+        self.fixture = create_fixture()
+
+    def test_sql_shape(self):
+        """Test IN lists of any length have the same shape."""
+        self.assertEqual(
+            get_sql_shape('SELECT 1 FROM "t" WHERE "t"."id" IN (%s, %s, %s)'),
+            get_sql_shape('SELECT 1 FROM "t" WHERE "t"."id" IN (%s)'),
+        )
+
+    def test_repeated_queries(self):
+        """Test repeated queries are reported with their fields."""
+        users = list(User.objects.all())
+        with QueryBudget(threshold=3) as budget:
+            UserGroupCountSerializer(users, many=True).data  # noqa
+        self.assertEqual(len(users), budget.count)
+        repeated = budget.get_repeated_queries()
+        self.assertEqual(1, len(repeated))
+        self.assertEqual(len(users), repeated[0]["count"])
+        self.assertEqual(
+            ["UserGroupCountSerializer.group_count"], repeated[0]["fields"]
+        )
+
+    def test_reject(self):
+        """Test queries over budget are rejected."""
+        with self.assertRaises(QueryBudgetExceeded):
+            with QueryBudget(budget=1, action=REJECT):
+                list(User.objects.all())
+                list(User.objects.all())
+
+    @override_settings(
+        DYNAMIC_REST={
+            "ENABLE_LINKS": False,
+            "QUERY_BUDGET": 1,
+            "QUERY_BUDGET_ACTION": "reject",
+        }
+    )
+    def test_reject_request(self):
+        """Test requests over budget are rejected."""
+        response = self.client.get("/users/")
+        self.assertEqual(200, response.status_code)
+
+        with self.assertLogs("dynamic_rest.budgets", "WARNING"):
+            response = self.client.get("/users/?include[]=groups.")
+        self.assertEqual(400, response.status_code)
+        content = json.loads(response.content.decode("utf-8"))
+        self.assertIn("query budget", content["detail"])
+
+        with patch.object(UserViewSet, "query_budget", 2):
+            response = self.client.get("/users/?include[]=groups.")
+        self.assertEqual(200, response.status_code)
+
+    @override_settings(
+        DYNAMIC_REST={
+            "ENABLE_LINKS": False,
+            "QUERY_BUDGET": 0,
+            "QUERY_BUDGET_ACTION": "reject",
+        }
+    )
+    def test_handler_error(self):
+        """Test budgets stop when the handler raises an exception."""
+        self.client.raise_request_exception = False
+        with patch.object(UserViewSet, "list", side_effect=RuntimeError):
+            response = self.client.get("/users/")
+        self.assertEqual(500, response.status_code)
+        self.assertEqual([], connection.execute_wrappers)
+        self.assertEqual(4, User.objects.count())
+
+    @override_settings(DYNAMIC_REST={"ENABLE_LINKS": False, "QUERY_BUDGET": 1})
+    def test_log_request(self):
+        """Test requests over budget are logged."""
+        with self.assertLogs("dynamic_rest.budgets", "WARNING") as logs:
+            response = self.client.get("/users/?include[]=groups.")
+        self.assertEqual(200, response.status_code)
+        self.assertIn("ran 2 queries (budget: 1)", logs.output[0])
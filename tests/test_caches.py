@@ -0,0 +1,140 @@
+"""Tests for dynamic_rest.caches."""
+import os
+
+from django.test import override_settings
+
+from dynamic_rest.caches import LRUCache
+from dynamic_rest.serializers import (
+    ALL_FIELDS_CACHE,
+    FIELDS_CACHE,
+    DynamicModelSerializer,
+)
+from tests.models import User
+from tests.serializers import GroupSerializer, LocationSerializer, UserSerializer
+
+if os.getenv("DATABASE_URL"):
+    from tests.test_cases import ResetTestCase as TestCase
+else:
+    from tests.test_cases import TestCase
+
+
+class TestLRUCache(TestCase):
+    """Test case for dynamic_rest.caches.LRUCache."""
+
+    def test_get_counts_hits_and_misses(self):
+        """Test get counts hits and misses."""
+        cache = LRUCache()
+        self.assertIsNone(cache.get("a"))
+        cache.set("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(
+            cache.stats(),
+            {"hits": 1, "misses": 1, "evictions": 0, "entries": 1, "size": 1},
+        )
+
+    def test_evicts_least_recently_used_entry(self):
+        """Test evicts least recently used entry."""
+        cache = LRUCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_evicts_by_size(self):
+        """Test evicts by size."""
+        cache = LRUCache(max_size=lambda: 10)
+        cache.set("a", 1, size=6)
+        cache.set("b", 2, size=6)
+        self.assertEqual(len(cache), 1)
+        self.assertIn("b", cache)
+
+        # entries larger than the cache are never stored
+        cache.set("c", 3, size=11)
+        self.assertNotIn("c", cache)
+        self.assertEqual(cache.stats()["size"], 6)
+
+    def test_cleared_on_setting_changed(self):
+        """Test cleared on setting changed."""
+        cache = LRUCache()
+        cache.set("a", 1)
+        with override_settings(DYNAMIC_REST={"ENABLE_LINKS": False}):
+            self.assertNotIn("a", cache)
+
+
+class CachedUserSerializer(UserSerializer):
+    """User serializer that opts in to the fields cache."""
+
+    ENABLE_FIELDS_CACHE = True
+
+
+@override_settings(DYNAMIC_REST={"ENABLE_FIELDS_CACHE": True})
+class TestFieldsCache(TestCase):
+    """Test case for the serializer fields cache."""
+
+    def test_fields_are_cached_per_request_shape(self):
+        """Test fields are cached per request shape."""
+        hits = FIELDS_CACHE.hits
+        s1 = CachedUserSerializer(request_fields={"permissions": True})
+        s2 = CachedUserSerializer(request_fields={"permissions": True})
+        self.assertEqual(list(s1.fields.keys()), list(s2.fields.keys()))
+        self.assertIn("permissions", s2.fields)
+        self.assertEqual(FIELDS_CACHE.hits, hits + 1)
+
+        # each cache only holds its own kind of entry
+        self.assertIn(CachedUserSerializer, ALL_FIELDS_CACHE)
+        self.assertFalse(any(key is CachedUserSerializer for key in FIELDS_CACHE._data))
+
+        # fields are bound separately to each serializer
+        self.assertIsNot(s1.fields["name"], s2.fields["name"])
+        self.assertIs(s1.fields["name"].parent, s1)
+        self.assertIs(s2.fields["name"].parent, s2)
+
+    def test_fields_cache_opt_in(self):
+        """Test serializers must opt in to the fields cache."""
+
+        class UncachedUserSerializer(UserSerializer):
+            pass
+
+        UncachedUserSerializer().fields  # pylint: disable=expression-not-assigned
+        self.assertNotIn(UncachedUserSerializer, ALL_FIELDS_CACHE)
+        self.assertFalse(
+            any(key[0] is UncachedUserSerializer for key in FIELDS_CACHE._data)
+        )
+
+        with override_settings(DYNAMIC_REST={"ENABLE_FIELDS_CACHE": False}):
+            CachedUserSerializer().fields  # pylint: disable=W0104
+            self.assertNotIn(CachedUserSerializer, ALL_FIELDS_CACHE)
+
+    def test_nested_serializers_are_bound_as_views(self):
+        """Test nested serializers are bound as views of the cached fields."""
+
+        class NestedUserSerializer(DynamicModelSerializer):
+            ENABLE_FIELDS_CACHE = True
+
+            class Meta:
+                model = User
+                name = "user"
+                fields = ("id", "location_detail", "groups_detail")
+
+            location_detail = LocationSerializer(source="location", read_only=True)
+            groups_detail = GroupSerializer(source="groups", many=True, read_only=True)
+
+        s1 = NestedUserSerializer()
+        s2 = NestedUserSerializer()
+        for name in ("location_detail", "groups_detail"):
+            self.assertIsNot(s1.fields[name], s2.fields[name])
+            self.assertIs(s1.fields[name].parent, s1)
+            self.assertIs(s2.fields[name].parent, s2)
+            self.assertEqual(s2.fields[name].source, s1.fields[name].source)
+
+        location = s2.fields["location_detail"]
+        self.assertIsNot(location.fields, s1.fields["location_detail"].fields)
+        self.assertIs(location.fields["name"].parent, location)
+
+        groups = s2.fields["groups_detail"]
+        self.assertIsNot(groups.child, s1.fields["groups_detail"].child)
+        self.assertIs(groups.child.parent, groups)
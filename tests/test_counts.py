@@ -0,0 +1,119 @@
+"""Tests for dynamic_rest.counts."""
+import json
+import os
+
+from django.core.cache import cache
+from django.test import override_settings
+from mock import MagicMock, patch
+
+from dynamic_rest.counts import (
+    CachedCount,
+    EstimatedCount,
+    ExactCount,
+    get_count_strategy,
+)
+from dynamic_rest.prefetch import FastQuery
+from tests.models import Dog
+from tests.setup import create_fixture
+from tests.viewsets import DogViewSet
+
+if os.getenv("DATABASE_URL"):
+    from tests.test_cases import ResetAPITestCase as TestCase
+else:
+    from tests.test_cases import APITestCase as TestCase
+
+
+class TestCountStrategies(TestCase):
+    """Test case for count strategies."""
+
+    def setUp(self):
+        """Set up test case."""
+        self.fixture = create_fixture()
+        cache.clear()
+
+    def test_exact_count(self):
+        """Test exact count."""
+        self.assertEqual((5, False), ExactCount().count(Dog.objects.all()))
+        self.assertEqual((2, False), ExactCount().count([1, 2]))
+
+    def test_cached_count(self):
+        """Test cached counts are shared by equivalent queries."""
+        strategy = CachedCount()
+        queryset = Dog.objects.filter(name="Spike")
+        self.assertEqual((2, False), strategy.count(queryset.order_by("id")))
+
+        Dog.objects.create(name="Spike")
+        with self.assertNumQueries(0):
+            self.assertEqual((2, True), strategy.count(queryset.order_by("-id")))
+            self.assertEqual((2, True), strategy.count(FastQuery(queryset)))
+        self.assertEqual((3, False), strategy.count(Dog.objects.exclude(name="Spike")))
+
+    def test_estimated_count(self):
+        """Test small estimates are counted exactly."""
+        strategy = EstimatedCount()
+        self.assertEqual((5, False), strategy.count(Dog.objects.all()))
+        self.assertEqual((2, False), strategy.count(Dog.objects.filter(name="Spike")))
+
+    def test_estimated_count_postgresql(self):
+        """Test PostgreSQL planner estimates and the exact count threshold."""
+        connection = MagicMock(vendor="postgresql")
+        connection.ops.quote_name = lambda name: f'"{name}"'
+        cursor = connection.cursor.return_value.__enter__.return_value
+        strategy = EstimatedCount()
+        queryset = Dog.objects.filter(name="Spike")
+
+        with patch("dynamic_rest.counts.connections", {"default": connection}):
+            # unfiltered queries are estimated from reltuples
+            cursor.fetchone.side_effect = [(1000.0,)]
+            self.assertEqual((1000, True), strategy.count(Dog.objects.all()))
+            sql, params = cursor.execute.call_args[0]
+            self.assertIn("reltuples", sql)
+            self.assertEqual([f'"{Dog._meta.db_table}"'], params)
+
+            cursor.fetchone.side_effect = [(999.0,)]
+            self.assertEqual((5, False), strategy.count(Dog.objects.all()))
+
+            # tables without statistics fall back to EXPLAIN
+            cursor.fetchone.side_effect = [(-1.0,), ([{"Plan": {"Plan Rows": 5000}}],)]
+            self.assertEqual((5000, True), strategy.count(Dog.objects.all()))
+            self.assertTrue(cursor.execute.call_args[0][0].startswith("EXPLAIN"))
+
+            # filtered queries are estimated with EXPLAIN
+            cursor.reset_mock()
+            cursor.fetchone.side_effect = [('[{"Plan": {"Plan Rows": 2000}}]',)]
+            self.assertEqual((2000, True), strategy.count(FastQuery(queryset)))
+            self.assertEqual(1, cursor.execute.call_count)
+            self.assertTrue(cursor.execute.call_args[0][0].startswith("EXPLAIN"))
+
+            cursor.fetchone.side_effect = [([{"Plan": {"Plan Rows": 999}}],)]
+            self.assertEqual((2, False), strategy.count(queryset))
+
+    @override_settings(
+        DYNAMIC_REST={"COUNT_STRATEGY": "dynamic_rest.counts.CachedCount"}
+    )
+    def test_get_count_strategy(self):
+        """Test count strategies are selected by view or setting."""
+        self.assertIsInstance(get_count_strategy(), CachedCount)
+        self.assertIsInstance(get_count_strategy(default=ExactCount), ExactCount)
+
+        class View(object):
+            count_strategy = EstimatedCount
+
+        self.assertIsInstance(get_count_strategy(View()), EstimatedCount)
+
+    @patch.object(DogViewSet, "count_strategy", CachedCount, create=True)
+    def test_approximate_count_metadata(self):
+        """Test pagination metadata says whether counts are approximate."""
+        url = "/dogs/?per_page=2"
+        meta = json.loads(self.client.get(url).content.decode("utf-8"))["meta"]
+        self.assertEqual(5, meta["total_results"])
+        self.assertFalse(meta["approximate_count"])
+
+        meta = json.loads(self.client.get(url).content.decode("utf-8"))["meta"]
+        self.assertEqual(5, meta["total_results"])
+        self.assertTrue(meta["approximate_count"])
+
+    def test_exact_count_metadata(self):
+        """Test exact counts are not flagged in pagination metadata."""
+        meta = json.loads(self.client.get("/dogs/").content.decode("utf-8"))["meta"]
+        self.assertNotIn("approximate_count", meta)
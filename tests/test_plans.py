@@ -0,0 +1,99 @@
+"""Tests for dynamic_rest.plans."""
+import json
+import os
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from mock import patch
+
+from dynamic_rest.plans import QueryPlanRecorder, get_prefetch_plan
+from dynamic_rest.prefetch import FastPrefetch, FastQuery
+from tests.models import Group, Location, User
+from tests.setup import create_fixture
+from tests.viewsets import UserViewSet
+
+if os.getenv("DATABASE_URL"):
+    from tests.test_cases import ResetAPITestCase as TestCase
+else:
+    from tests.test_cases import APITestCase as TestCase
+
+
+@override_settings(DYNAMIC_REST={"ENABLE_LINKS": False, "ENABLE_QUERY_PLAN": True})
+class TestQueryPlans(TestCase):
+    """Test case for query plans."""
+
+    def setUp(self):
+        """Set up test case."""
+        self.fixture = create_fixture()
+
+    def _get_json(self, url):
+        """Get a JSON response."""
+        response = self.client.get(url)
+        self.assertEqual(200, response.status_code)
+        return json.loads(response.content.decode("utf-8"))
+
+    def test_plan(self):
+        """Test queries and prefetches are returned with debug=plan."""
+        url = "/users/?include[]=groups.&debug=plan"
+        with CaptureQueriesContext(connection) as queries:
+            data = self._get_json(url)
+
+        plan = data["plan"]
+        self.assertEqual(len(queries), len(plan["queries"]))
+        for query in plan["queries"]:
+            self.assertIn("sql", query)
+            self.assertGreaterEqual(query["time"], 0)
+            self.assertNotIn("explain", query)
+        self.assertEqual("tests.User", plan["queryset"]["model"])
+        self.assertIn("tests_user", plan["queryset"]["sql"])
+        self.assertEqual(
+            "tests.Group", plan["queryset"]["prefetches"]["groups"]["model"]
+        )
+        # records are not annotated with debug information
+        self.assertNotIn("_meta", data["users"][0])
+
+    def test_explain(self):
+        """Test queries are explained with debug=explain."""
+        data = self._get_json("/users/?debug=explain")
+        self.assertTrue(data["plan"]["queries"])
+        for query in data["plan"]["queries"]:
+            self.assertTrue(query["explain"])
+
+    def test_plan_handler_error(self):
+        """Test recording stops when the handler raises an exception."""
+        self.client.raise_request_exception = False
+        with patch.object(UserViewSet, "list", side_effect=RuntimeError):
+            response = self.client.get("/users/?debug=explain")
+        self.assertEqual(500, response.status_code)
+        self.assertEqual([], connection.execute_wrappers)
+
+    @override_settings(DYNAMIC_REST={"ENABLE_LINKS": False})
+    def test_plan_disabled(self):
+        """Test plans are not returned unless ENABLE_QUERY_PLAN is set."""
+        data = self._get_json("/users/?debug=plan")
+        self.assertNotIn("plan", data)
+
+    def test_recorder(self):
+        """Test QueryPlanRecorder records queries and row counts."""
+        with QueryPlanRecorder() as recorder:
+            list(User.objects.all())
+        self.assertEqual(1, len(recorder.queries))
+        self.assertIn("tests_user", recorder.queries[0]["sql"])
+
+        list(User.objects.all())
+        self.assertEqual(1, len(recorder.queries))
+
+    def test_fast_query_plan(self):
+        """Test plans of FastQuery prefetches."""
+        locations = FastQuery(Location.objects.all())
+        locations.prefetch_related("user_set")
+        q = FastQuery(User.objects.all())
+        q.prefetch_related(FastPrefetch("groups", Group.objects.all()))
+        q.prefetch_related(FastPrefetch("location", locations))
+        plan = get_prefetch_plan(q)
+        self.assertEqual("tests.User", plan["model"])
+        self.assertEqual({"groups", "location"}, set(plan["prefetches"]))
+        self.assertEqual(
+            {"user_set"}, set(plan["prefetches"]["location"]["prefetches"])
+        )
@@ -1,9 +1,30 @@
 """Tests for FastQuery and FastPrefetch."""
+import datetime
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 
-from dynamic_rest.prefetch import FastPrefetch, FastQuery
+from django.db import connection, transaction
+from django.db.models import Value
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from mock import patch
+
+from dynamic_rest.filters import DynamicSortingFilter
+from dynamic_rest.filters.fast import FastDynamicFilterBackend
+from dynamic_rest.prefetch import (
+    FastObject,
+    FastPrefetch,
+    FastQuery,
+    IdentityMap,
+    get_prefetch_executor,
+    shutdown_prefetch_executor,
+)
+from dynamic_rest.streaming import iter_chunks, iter_pks
 from tests.models import Cat, Group, Location, Profile, User
 from tests.setup import create_fixture
+from tests.test_cases import ResetTestCase
+from tests.viewsets import LocationViewSet
 
 if os.getenv("DATABASE_URL"):
     from tests.test_cases import ResetAPITestCase as TestCase
@@ -43,7 +64,7 @@ class TestFastQuery(TestCase):
 
     def test_m2m_prefetch(self):
         """Test m2m prefetch."""
-        with self.assertNumQueries(3):
+        with self.assertNumQueries(2):
             q = FastQuery(User.objects.all())
             q.prefetch_related(FastPrefetch("groups", Group.objects.all()))
             result = q.execute()
@@ -52,6 +73,132 @@ class TestFastQuery(TestCase):
         self.assertTrue(isinstance(result[0]["groups"], list))
         self.assertEqual({"id", "name"}, set(result[0]["groups"][0].keys()))
 
+    def test_m2m_prefetch_fallback(self):
+        """Test m2m prefetch of filtered querysets uses two queries."""
+
+        def fetch(groups):
+            q = FastQuery(User.objects.order_by("id"))
+            q.prefetch_related(FastPrefetch("groups", groups))
+            return {
+                user["id"]: sorted(group["id"] for group in user["groups"])
+                for user in q.execute()
+            }
+
+        with self.assertNumQueries(2):
+            expected = fetch(Group.objects.all())
+        with self.assertNumQueries(2):
+            self.assertEqual(expected, fetch(Group.objects.distinct()))
+        with self.assertNumQueries(3):
+            self.assertEqual(expected, fetch(Group.objects.filter(pk__gt=0)))
+        with override_settings(DYNAMIC_REST={"ENABLE_SINGLE_QUERY_M2M": False}):
+            with self.assertNumQueries(3):
+                self.assertEqual(expected, fetch(Group.objects.all()))
+
+    def test_m2m_prefetch_nested(self):
+        """Test single-query m2m prefetch de-duplicates remote rows."""
+        groups = FastQuery(Group.objects.all()).only("name")
+        groups.prefetch_related("users")
+        q = FastQuery(User.objects.all())
+        q.prefetch_related(FastPrefetch("groups", groups))
+        result = q.execute()
+
+        for user in result:
+            for group in user["groups"]:
+                self.assertEqual({"id", "name", "users"}, set(group))
+                self.assertIn(user["id"], {u["id"] for u in group["users"]})
+
+    def test_identity_map(self):
+        """Test rows in a shared identity map are not fetched again."""
+        identity_map = IdentityMap()
+        locations = FastQuery(Location.objects.all())
+        locations.identity_map = identity_map
+        locations = {row["id"]: row for row in locations.execute()}
+
+        def fetch(queryset):
+            q = FastQuery(User.objects.all())
+            prefetch = FastPrefetch("location", queryset)
+            prefetch.query.identity_map = identity_map
+            q.prefetch_related(prefetch)
+            return [user["location"] for user in q.execute() if user["location"]]
+
+        with self.assertNumQueries(1):
+            result = fetch(Location.objects.all())
+        for location in result:
+            self.assertIs(locations[location["id"]], location)
+
+        # rows are not known to match other filters
+        with self.assertNumQueries(2):
+            result = fetch(Location.objects.filter(name__isnull=False))
+        for location in result:
+            self.assertIsNot(locations[location["id"]], location)
+
+        # rows fetched with the same filters are reused
+        with self.assertNumQueries(1):
+            fetch(Location.objects.filter(name__isnull=False))
+
+    def test_identity_map_projection(self):
+        """Test rows missing requested columns are fetched again."""
+        identity_map = IdentityMap()
+        locations = FastQuery(Location.objects.all()).only("name")
+        locations.identity_map = identity_map
+        locations.execute()
+
+        q = FastQuery(User.objects.all())
+        prefetch = FastPrefetch("location", Location.objects.all())
+        prefetch.query.identity_map = identity_map
+        q.prefetch_related(prefetch)
+        with self.assertNumQueries(2):
+            result = q.execute()
+        self.assertIn("blob", result[0]["location"])
+
+    def test_identity_map_filter_backend(self):
+        """Test FastDynamicFilterBackend shares an identity map."""
+        url = "/locations/?include[]=users.location."
+        with self.assertNumQueries(3):
+            expected = json.loads(self.client.get(url).content.decode("utf-8"))
+
+        backends = (FastDynamicFilterBackend, DynamicSortingFilter)
+        with patch.object(LocationViewSet, "filter_backends", backends):
+            # locations of users are taken from the primary locations
+            with self.assertNumQueries(2):
+                response = self.client.get(url)
+        self.assertEqual(expected, json.loads(response.content.decode("utf-8")))
+
+    def test_iter_chunks(self):
+        """Test each chunk of a FastQuery gets its own prefetches."""
+        q = FastQuery(User.objects.order_by("pk"))
+        q.prefetch_related("location")
+        rows = [row for chunk in iter_chunks(q, 2) for row in chunk]
+        self.assertEqual(
+            [(user.name, user.location_id) for user in self.fixture.users],
+            [
+                (row["name"], row["location"]["id"] if row["location"] else None)
+                for row in rows
+            ],
+        )
+
+    def test_iter_pks(self):
+        """Test primary keys are paged through in order, one chunk at a time."""
+        User.objects.filter(pk__in=[1, 3]).update(
+            date_of_birth=datetime.date(2000, 1, 1)
+        )
+        for ordering in (
+            ("date_of_birth", "-name"),
+            ("-date_of_birth", "name"),
+            ("-pk",),
+        ):
+            queryset = User.objects.order_by(*ordering)
+            with CaptureQueriesContext(connection) as queries:
+                chunks = list(iter_pks(FastQuery(queryset), 2))
+            self.assertEqual(
+                list(queryset.values_list("pk", flat=True)),
+                [pk for chunk in chunks for pk in chunk],
+            )
+            self.assertEqual([2, 2], [len(chunk) for chunk in chunks])
+            # one query per chunk, and one to find there are no more keys
+            self.assertEqual(3, len(queries))
+            self.assertTrue(all("LIMIT 2" in query["sql"] for query in queries))
+
     def test_o2o_prefetch(self):
         """Test o2o prefetch."""
         # Create profiles
@@ -101,6 +248,32 @@ class TestFastQuery(TestCase):
         self.assertIsNotNone(location)
         self.assertEqual(self._user_keys(), set(location["user_set"][0].keys()))
 
+    def test_chunked_prefetch(self):
+        """Test large ID sets are prefetched in chunks."""
+
+        def fetch():
+            q = FastQuery(User.objects.order_by("id"))
+            q.prefetch_related(
+                FastPrefetch("location", Location.objects.all()),
+                FastPrefetch("groups", Group.objects.all()),
+                FastPrefetch("profile", Profile.objects.all()),
+            )
+            return [
+                (
+                    user["id"],
+                    user["location"]["id"] if user["location"] else None,
+                    sorted(group["id"] for group in user["groups"]),
+                    user["profile"],
+                )
+                for user in q.execute()
+            ]
+
+        expected = fetch()
+        with override_settings(DYNAMIC_REST={"PREFETCH_CHUNK_SIZE": 2}):
+            # users, then 2 chunks each of locations, groups and profiles
+            with self.assertNumQueries(7):
+                self.assertEqual(expected, fetch())
+
     def test_pagination(self):
         """Test pagination."""
         r = list(FastQuery(User.objects.all()))
@@ -152,3 +325,127 @@ class TestFastQuery(TestCase):
 
         obj = q.first()
         self.assertEqual(0, obj.friendly_cats.count())
+
+    def test_only(self):
+        """Test only selects the pk and the columns needed by prefetches."""
+        q = FastQuery(User.objects.all()).only("name")
+        q.prefetch_related(
+            FastPrefetch("location", FastQuery(Location.objects.all()).only("name"))
+        )
+        result = q.execute()
+        self.assertEqual({"id", "name", "location_id", "location"}, set(result[0]))
+        self.assertEqual({"id", "name"}, set(result[0]["location"]))
+
+    def test_only_annotations(self):
+        """Test only keeps annotations and extra selects, as QuerySet.only."""
+        queryset = User.objects.annotate(score=Value(7)).extra(
+            select={"double_id": "id * 2"}
+        )
+        result = FastQuery(queryset).only("id", "name").execute()
+        self.assertEqual({"id", "name", "score", "double_id"}, set(result[0]))
+        self.assertEqual(7, result[0]["score"])
+        self.assertEqual(result[0]["id"] * 2, result[0]["double_id"])
+
+    def test_only_reverse_prefetch(self):
+        """Test only selects the remote reference of reverse prefetches."""
+        q = FastQuery(Location.objects.all()).only("name")
+        q.prefetch_related(
+            FastPrefetch("user_set", FastQuery(User.objects.all()).only("name"))
+        )
+        result = q.execute()
+        self.assertEqual({"id", "name", "user_set"}, set(result[0]))
+        self.assertEqual({"id", "name", "location_id"}, set(result[0]["user_set"][0]))
+
+    def test_fast_object(self):
+        """Test FastObject rows behave like dicts and share a layout."""
+        rows = FastQuery(User.objects.order_by("id")).only("name").execute()
+        user = rows[0]
+        self.assertEqual({"id": 1, "name": "0"}, dict(user))
+        self.assertEqual(1, user.pk)
+        self.assertEqual("0", user.name)
+        self.assertEqual("0", user.get("name"))
+        self.assertIsNone(user.get("last_name"))
+        self.assertNotIn("last_name", user)
+        with self.assertRaises(AttributeError):
+            user.last_name  # pylint: disable=pointless-statement
+
+        # keys set on one row are not set on the others
+        user.last_name = "Zero"
+        self.assertEqual("Zero", user["last_name"])
+        self.assertNotIn("last_name", rows[1])
+        self.assertEqual(2, len(rows[1]))
+        self.assertIs(user._layout, rows[1]._layout)  # pylint: disable=protected-access
+
+
+class TestConcurrentPrefetch(ResetTestCase):
+    """Test concurrent execution of sibling prefetches."""
+
+    def setUp(self):
+        """Set up test case."""
+        self.fixture = create_fixture()
+
+    def _fetch(self):
+        """Return users with their location, groups and profile."""
+        q = FastQuery(User.objects.order_by("id"))
+        locations = FastQuery(Location.objects.all())
+        locations.prefetch_related("user_set")
+        q.prefetch_related(
+            FastPrefetch("location", locations),
+            FastPrefetch("groups", Group.objects.all()),
+            FastPrefetch("profile", Profile.objects.all()),
+        )
+        return [
+            (
+                user["id"],
+                (
+                    [u["id"] for u in user["location"]["user_set"]]
+                    if user["location"]
+                    else None
+                ),
+                sorted(group["id"] for group in user["groups"]),
+                user["profile"],
+            )
+            for user in q.execute()
+        ]
+
+    def test_concurrent_prefetch(self):
+        """Test sibling prefetches run on a thread pool."""
+        expected = self._fetch()
+        with override_settings(DYNAMIC_REST={"PREFETCH_MAX_WORKERS": 4}):
+            with patch(
+                "dynamic_rest.prefetch.ThreadPoolExecutor", wraps=ThreadPoolExecutor
+            ) as executor, patch(
+                "dynamic_rest.prefetch.connections.close_all"
+            ) as close_all:
+                self.assertEqual(expected, self._fetch())
+                self.assertEqual(expected, self._fetch())
+
+                # the workers and their connections are reused
+                executor.assert_called_once_with(
+                    max_workers=4, thread_name_prefix="dynamic-rest-prefetch"
+                )
+                close_all.assert_not_called()
+                workers = get_prefetch_executor()._threads
+                self.assertTrue(workers)
+            shutdown_prefetch_executor()
+        self.assertFalse(any(worker.is_alive() for worker in workers))
+
+    def test_identity_map_is_thread_safe(self):
+        """Test rows can be added to an identity map from many threads."""
+        identity_map = IdentityMap()
+        rows = [FastObject({"id": i}) for i in range(100)]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for i in range(4):
+                executor.submit(identity_map.add, User, rows, f"filter-{i}")
+        self.assertEqual(100, len(identity_map.rows))
+        for key in ("filter-0", "filter-3"):
+            self.assertIs(rows[5], identity_map.get(User, 5, ["id"], key))
+
+    def test_serial_prefetch_in_transaction(self):
+        """Test prefetches run serially in a transaction."""
+        expected = self._fetch()
+        with override_settings(DYNAMIC_REST={"PREFETCH_MAX_WORKERS": 4}):
+            with patch("dynamic_rest.prefetch.ThreadPoolExecutor") as executor:
+                with transaction.atomic():
+                    self.assertEqual(expected, self._fetch())
+        executor.assert_not_called()
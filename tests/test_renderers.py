@@ -0,0 +1,120 @@
+"""Tests for dynamic_rest.renderers."""
+import datetime
+import decimal
+import os
+import uuid
+
+from django.test import override_settings
+from django.utils.translation import gettext_lazy
+from mock import patch
+from rest_framework.renderers import JSONRenderer
+
+from dynamic_rest.prefetch import FastList, FastObject
+from dynamic_rest.renderers import DynamicJSONRenderer
+from dynamic_rest.tagged import TaggedDict
+from tests.setup import create_fixture
+
+if os.getenv("DATABASE_URL"):
+    from tests.test_cases import ResetAPITestCase as TestCase
+else:
+    from tests.test_cases import APITestCase as TestCase
+
+
+class TestDynamicJSONRenderer(TestCase):
+    """Test case for dynamic_rest.renderers.DynamicJSONRenderer."""
+
+    def test_matches_json_renderer(self):
+        """Test output matches JSONRenderer."""
+        data = {
+            "tagged": TaggedDict({"id": 1}, serializer=None, instance=None),
+            "fast": FastList([FastObject({"id": 2, "name": "\u2764\ufe0f"})]),
+            "decimal": decimal.Decimal("1.50"),
+            "uuid": uuid.UUID("12345678123456781234567812345678"),
+            "date": datetime.date(2020, 1, 2),
+            "lazy": gettext_lazy("lazy"),
+            "separators": "\u2028\u2029",
+            1: None,
+        }
+        self.assertEqual(
+            DynamicJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+
+    def test_non_finite_floats(self):
+        """Test NaN and infinite floats are rendered as null."""
+        for value in (float("nan"), float("inf"), decimal.Decimal("-Infinity")):
+            data = {"id": None, "rows": [FastObject({"value": value})]}
+            self.assertEqual(
+                DynamicJSONRenderer().render(data),
+                b'{"id":null,"rows":[{"value":null}]}',
+            )
+
+    @override_settings(DYNAMIC_REST={"ORJSON_STRICT_FLOATS": True})
+    def test_strict_non_finite_floats(self):
+        """Test NaN and infinite floats can be handled as by JSONRenderer."""
+        for value in (float("nan"), float("inf"), decimal.Decimal("-Infinity")):
+            data = {"id": None, "rows": [FastObject({"value": value})]}
+            with self.assertRaisesMessage(ValueError, "not JSON compliant"):
+                DynamicJSONRenderer().render(data)
+
+        data = {"value": float("nan")}
+        renderer = DynamicJSONRenderer()
+        renderer.strict = False
+        self.assertEqual(renderer.render(data), b'{"value":NaN}')
+
+    def test_big_integers(self):
+        """Test integers wider than 64 bits are rendered."""
+        data = {"id": 2**70, "rows": [{"id": -(2**70)}]}
+        self.assertEqual(
+            DynamicJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+
+    def test_encoder_is_built_once(self):
+        """Test the encoder class is instantiated once per render."""
+        data = [decimal.Decimal(i) for i in range(3)]
+        with patch.object(
+            DynamicJSONRenderer, "encoder_class", wraps=JSONRenderer.encoder_class
+        ) as encoder_class:
+            DynamicJSONRenderer().render(data)
+        self.assertEqual(1, encoder_class.call_count)
+
+    def test_renders_aware_datetimes_in_utc(self):
+        """Test aware UTC datetimes are rendered with a Z suffix."""
+        value = datetime.datetime(2020, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc)
+        self.assertEqual(
+            DynamicJSONRenderer().render({"at": value}),
+            b'{"at":"2020-01-02T03:04:05Z"}',
+        )
+
+    def test_indented_output(self):
+        """Test indented output is rendered by JSONRenderer."""
+        data = {"id": 1}
+        self.assertEqual(
+            DynamicJSONRenderer().render(data, "application/json; indent=4"),
+            JSONRenderer().render(data, "application/json; indent=4"),
+        )
+
+    def test_render_none(self):
+        """Test rendering None."""
+        self.assertEqual(DynamicJSONRenderer().render(None), b"")
+
+
+@override_settings(DYNAMIC_REST={"ENABLE_LINKS": False})
+class TestRendererSelection(TestCase):
+    """Test case for renderer selection in dynamic viewsets."""
+
+    def setUp(self):
+        """Set up test case."""
+        create_fixture()
+
+    def test_dynamic_json_renderer_is_default(self):
+        """Test DynamicJSONRenderer replaces JSONRenderer."""
+        response = self.client.get("/users/")
+        self.assertIsInstance(response.accepted_renderer, DynamicJSONRenderer)
+
+    @override_settings(
+        DYNAMIC_REST={"ENABLE_LINKS": False, "ENABLE_ORJSON_RENDERER": False}
+    )
+    def test_dynamic_json_renderer_opt_out(self):
+        """Test ENABLE_ORJSON_RENDERER can be disabled."""
+        response = self.client.get("/users/")
+        self.assertIs(type(response.accepted_renderer), JSONRenderer)
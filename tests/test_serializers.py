@@ -6,8 +6,10 @@ from collections import OrderedDict
 from django.test import override_settings
 from mock import patch
 
+from dynamic_rest import codegen, columns
 from dynamic_rest.fields import DynamicRelationField
-from dynamic_rest.processors import register_post_processor
+from dynamic_rest.prefetch import FastQuery
+from dynamic_rest.processors import SideloadingProcessor, register_post_processor
 from dynamic_rest.serializers import DynamicListSerializer, EphemeralObject
 from tests.models import User
 from tests.serializers import (
@@ -320,6 +322,26 @@ class TestDynamicSerializer(TestCase):
         )
         self.assertEqual(set(serializer.fields.keys()), expected)
 
+    def test_get_fields_shares_field_plan(self):
+        """Test serializers with the same request shape share a field plan."""
+        s1 = UserSerializer(request_fields={"permissions": True, "id": False})
+        s2 = UserSerializer(request_fields={"permissions": True, "id": False})
+        self.assertIs(s1.get_field_plan(), s2.get_field_plan())
+        self.assertEqual(list(s1.fields.keys()), list(s1.get_field_plan().fields))
+        self.assertNotIn("id", s1.fields)
+        self.assertIsNot(s1.fields["name"], s1.get_all_fields()["name"])
+
+    def test_get_fields_flags_do_not_leak(self):
+        """Test flags applied by get_fields do not affect get_all_fields."""
+        serializer = CatSerializer()
+        name = serializer.fields["name"]
+        self.assertTrue(name.read_only)
+        self.assertFalse(name.trim_whitespace)
+
+        original = serializer.get_all_fields()["name"]
+        self.assertFalse(original.read_only)
+        self.assertTrue(original.trim_whitespace)
+
     def test_serializer_propagation_consistency(self):
         """Test serializer propagation consistency."""
         s = CatSerializer(request_fields={"home": True})
@@ -331,6 +353,36 @@ class TestDynamicSerializer(TestCase):
         self.assertEqual(r1, r2)
         self.assertEqual(r2, r3)
 
+    def test_sideloading_processor_counts(self):
+        """Test sideloading processor counts sideloads and merges."""
+        serializer = UserSerializer(
+            self.fixture.users, many=True, request_fields={"groups": {}}
+        )
+        processor = SideloadingProcessor(
+            serializer, serializer.to_representation(self.fixture.users)
+        )
+        self.assertEqual(len(processor.data["groups"]), 2)
+        self.assertEqual(processor.sideload_counts, {"groups": 2})
+        self.assertEqual(processor.merge_counts, {"groups": 6})
+
+    def test_sideloading_processor_skips_non_relations(self):
+        """Test sideloading processor only traverses relation fields."""
+        serializer = UserSerializer(
+            self.fixture.users, many=True, request_fields={"groups": {}}
+        )
+        data = serializer.to_representation(self.fixture.users)
+        group = data[0]["groups"][0].copy()
+        # a list of tagged representations in a non-relation field
+        data[0]["name"] = [group]
+        processor = SideloadingProcessor(serializer, data)
+        self.assertEqual(len(processor.data["groups"]), 2)
+        self.assertEqual(processor.merge_counts, {"groups": 6})
+        self.assertEqual(1, len(data[0]["name"]))
+        self.assertIs(data[0]["name"][0], group)
+        self.assertEqual(
+            set(processor.relation_keys[serializer.child]), {"groups", "location"}
+        )
+
     @patch.dict("dynamic_rest.processors.POST_PROCESSORS", {})
     def test_post_processors(self):
         """Test post processors."""
@@ -549,6 +601,113 @@ class TestUserLocationSerializer(TestCase):
         self.assertTrue("groups" in data)
 
 
+@override_settings(
+    DYNAMIC_REST={"ENABLE_LINKS": False, "ENABLE_COMPILED_REPRESENTATIONS": True}
+)
+class TestCompiledRepresentation(TestCase):
+    """Test case for code-generated representation functions."""
+
+    def setUp(self):
+        """Set up test case."""
+        self.fixture = create_fixture()
+
+    def _assert_same_representation(self, serializer, instances):
+        """Assert compiled and uncompiled representations are equal."""
+        for instance in instances:
+            self.assertEqual(
+                serializer._compiled_to_representation(instance),
+                serializer._faster_to_representation(instance),
+            )
+
+    def test_model_instances(self):
+        """Test model instances."""
+        serializer = UserSerializer(
+            request_fields={"groups": True, "location": {}, "last_name": True}
+        )
+        self._assert_same_representation(serializer, User.objects.all())
+
+    def test_fast_objects(self):
+        """Test fast objects."""
+        serializer = UserSerializer(request_fields={"groups": True})
+        query = FastQuery(User.objects.all())
+        query.prefetch_related("groups")
+        self._assert_same_representation(serializer, query.execute())
+
+    def test_data(self):
+        """Test data matches the uncompiled representation."""
+        request_fields = {"location": {}, "groups": True}
+        compiled = UserSerializer(
+            self.fixture.users, many=True, envelope=True, request_fields=request_fields
+        ).data
+        with override_settings(DYNAMIC_REST={"ENABLE_LINKS": False}):
+            expected = UserSerializer(
+                self.fixture.users,
+                many=True,
+                envelope=True,
+                request_fields=request_fields,
+            ).data
+        self.assertEqual(compiled, expected)
+
+    def test_factory_is_shared(self):
+        """Test serializers with the same shape share a compiled factory."""
+        s1 = UserSerializer(request_fields={"last_name": True})
+        s2 = UserSerializer(request_fields={"last_name": True})
+        spec = codegen.get_field_spec(s1)
+        self.assertEqual(spec, codegen.get_field_spec(s2))
+        self.assertIs(
+            codegen.get_factory(UserSerializer, spec),
+            codegen.get_factory(UserSerializer, codegen.get_field_spec(s2)),
+        )
+        self.assertIn((UserSerializer, spec), codegen.FACTORIES)
+
+
+@override_settings(
+    DYNAMIC_REST={"ENABLE_LINKS": False, "ENABLE_COLUMNAR_SERIALIZATION": True}
+)
+class TestColumnarSerialization(TestCase):
+    """Test case for column-at-a-time list serialization."""
+
+    def setUp(self):
+        """Set up test case."""
+        self.fixture = create_fixture()
+
+    def _assert_same_data(self, instances, **kwargs):
+        """Assert batched and row-by-row representations are equal."""
+        batched = UserSerializer(instances, many=True, **kwargs).data
+        with override_settings(DYNAMIC_REST={"ENABLE_LINKS": False}):
+            expected = UserSerializer(instances, many=True, **kwargs).data
+        self.assertEqual(batched, expected)
+
+    def test_model_instances(self):
+        """Test model instances."""
+        self._assert_same_data(
+            User.objects.all(),
+            envelope=True,
+            request_fields={"location": {}, "groups": True, "last_name": True},
+        )
+
+    def test_fast_objects(self):
+        """Test fast objects."""
+        query = FastQuery(User.objects.all())
+        query.prefetch_related("groups")
+        self._assert_same_data(
+            query.execute(), envelope=True, request_fields={"groups": True}
+        )
+
+    def test_represent_column_skips_none_columns(self):
+        """Test represent column skips columns that are entirely None."""
+        field = UserSerializer().fields["name"]
+        with patch.object(field, "to_representation") as to_representation:
+            columns.represent_column(field, [None, None])
+        to_representation.assert_not_called()
+
+    def test_represent_column_primitive_fast_path(self):
+        """Test represent column does not convert primitive values."""
+        field = UserSerializer().fields["id"]
+        self.assertEqual(columns.represent_column(field, [1, None, 3]), [1, None, 3])
+        self.assertEqual(columns.represent_column(field, ["1", True]), [1, 1])
+
+
 @override_settings(DYNAMIC_REST={"ENABLE_SERIALIZER_CACHE": True})
 class TestSerializerCaching(TestCase):
     """Test case for serializer caching."""
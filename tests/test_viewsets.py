@@ -2,17 +2,27 @@
 import json
 import os
 
+from django.db import connection
+from django.test import override_settings
 from django.test.client import RequestFactory
-from rest_framework import exceptions, status
+from django.test.utils import CaptureQueriesContext
+from mock import patch
+from rest_framework import exceptions, serializers, status
 from rest_framework.request import Request
 
-from dynamic_rest.datastructures import FilterNode
+from dynamic_rest.datastructures import QUERY_KEYS, FilterNode
 from dynamic_rest.filters import DynamicFilterBackend
 from dynamic_rest.filters.base import _get_requested_filters
+from dynamic_rest.viewsets import _parse_object_params, handle_encodings
 from tests.models import Dog, Group, User
 from tests.serializers import GroupSerializer
 from tests.setup import create_fixture
-from tests.viewsets import GroupNoMergeDictViewSet, UserViewSet
+from tests.viewsets import (
+    DogViewSet,
+    GroupNoMergeDictViewSet,
+    GroupViewSet,
+    UserViewSet,
+)
 
 if os.getenv("DATABASE_URL"):
     from tests.test_cases import ResetTestCase as TestCase
@@ -140,6 +150,101 @@ class TestUserViewSet(TestCase):
         filter_key, _ = node.generate_query_key(gs)
         self.assertEqual(filter_key, "users__id__in")
 
+    @override_settings(DYNAMIC_REST={"FILTER_KEY_CACHE_SIZE": 2})
+    def test_filter_key_cache(self):
+        """Test filter keys are cached by serializer class."""
+        node = FilterNode(["members", "id"], "in", [1])
+        self.assertEqual(
+            ("users__id__in", serializers.IntegerField),
+            node.get_query_key(GroupSerializer(include_fields="*")),
+        )
+        with patch.object(FilterNode, "generate_query_key") as generate:
+            self.assertEqual(
+                ("users__id__in", serializers.IntegerField),
+                node.get_query_key(GroupSerializer()),
+            )
+        generate.assert_not_called()
+
+        # least recently used keys are dropped
+        FilterNode(["name"], None, "a").get_query_key(GroupSerializer())
+        FilterNode(["id"], None, 1).get_query_key(GroupSerializer())
+        self.assertEqual(2, len(QUERY_KEYS))
+        self.assertNotIn((GroupSerializer, ("members", "id"), "in"), QUERY_KEYS)
+
+        # invalid filters are not cached
+        with self.assertRaises(exceptions.ValidationError):
+            FilterNode(["foo"], None, 1).get_query_key(GroupSerializer())
+
+    def test_object_params_cached(self):
+        """Test object params are parsed once until query params change."""
+        request = self.rf.get(
+            "/users/",
+            {
+                "filter{name}": "é",
+                "filter{id.in}": "[1,2]",
+                "filter{}": '{"name": "foo"}',
+                "sort[]": "name",
+            },
+        )
+        request.GET = handle_encodings(request)
+        self.view.request = request = Request(request)
+        with patch(
+            "dynamic_rest.viewsets._parse_object_params",
+            wraps=_parse_object_params,
+        ) as parse:
+            filters = self.view.get_request_feature(self.view.FILTER)
+            self.assertEqual({"name": ["é"], "id.in": ["1", "2"]}, filters)
+            self.assertEqual(
+                {"name": "foo"},
+                self.view.get_request_feature(self.view.FILTER, raw=True),
+            )
+            filters["name"].append("bar")
+            self.assertEqual(
+                {"name": ["é"], "id.in": ["1", "2"]},
+                self.view.get_request_feature(self.view.FILTER),
+            )
+            self.assertEqual(1, parse.call_count)
+
+            request.query_params.add("filter{pk}", "1")
+            self.assertEqual(
+                ["1"], self.view.get_request_feature(self.view.FILTER)["pk"]
+            )
+            self.assertEqual(2, parse.call_count)
+
+            del request.query_params["filter{pk}"]
+            self.assertNotIn("pk", self.view.get_request_feature(self.view.FILTER))
+            self.assertEqual(3, parse.call_count)
+
+        request.query_params.add("filter{name", "foo")
+        with self.assertRaises(exceptions.ParseError):
+            self.view.get_request_feature(self.view.FILTER)
+
+    def test_feature_values_cached(self):
+        """Test feature values are cached until query params change."""
+        request = self.rf.get(
+            "/users/", {"include[]": ["groups.", "location."], "debug": "1"}
+        )
+        request.GET = handle_encodings(request)
+        self.view.request = request = Request(request)
+        query_params = request.query_params
+        with patch.object(
+            type(query_params), "getlist", wraps=query_params.getlist
+        ) as getlist:
+            for _ in range(2):
+                includes = self.view.get_request_feature(self.view.INCLUDE)
+                self.assertEqual(["groups.", "location."], includes)
+                self.assertEqual("1", self.view.get_request_feature(self.view.DEBUG))
+            self.assertEqual(2, getlist.call_count)
+
+            # callers get their own copy of array values
+            includes.append("permissions.")
+            query_params.appendlist("include[]", "profile.")
+            self.assertEqual(
+                ["groups.", "location.", "profile."],
+                self.view.get_request_feature(self.view.INCLUDE),
+            )
+            self.assertEqual(3, getlist.call_count)
+
 
 class TestMergeDictConvertsToDict(TestCase):
     """Test case for MergeDict behavior in DRF 3.2."""
@@ -199,6 +304,24 @@ class BulkUpdateTestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue("dogs" in response.data)
 
+    def test_bulk_update_resolves_related_once(self):
+        """Test related IDs of all patched resources are resolved together."""
+        data = [{"id": 1, "groups": [1, 2]}, {"id": 2, "groups": [2]}]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(
+                "/users/", json.dumps(data), content_type="application/json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        group_queries = [
+            query["sql"]
+            for query in queries
+            if 'FROM "tests_group" WHERE "tests_group"."id"' in query["sql"]
+        ]
+        self.assertEqual(1, len(group_queries), group_queries)
+        self.assertEqual(
+            [1, 2], list(User.objects.get(pk=1).groups.values_list("pk", flat=True))
+        )
+
     def test_bulk_update_with_filter(self):
         """Test that you can patch inside the filtered queryset."""
         data = [{"id": 3, "fur": "gold"}]
@@ -265,6 +388,129 @@ class BulkUpdateTestCase(TestCase):
             Dog.objects.filter(fur_color="grey").count(),
         )
 
+    def test_patch_all_bulk(self):
+        """Test patch all with bulk_update."""
+        data = {"fur": "grey"}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(
+                "/dogs/?patch-all=bulk&filter{fur.contains}=brown",
+                json.dumps(data),
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        content = json.loads(response.content.decode("utf-8"))
+        self.assertEqual(3, content["meta"]["updated"])
+        updates = [
+            query["sql"] for query in queries if query["sql"].startswith("UPDATE")
+        ]
+        self.assertEqual(1, len(updates), updates)
+        self.assertEqual(3, Dog.objects.filter(fur_color="grey").count())
+
+    @patch.object(UserViewSet, "BULK_UPDATE_MODE", "bulk")
+    def test_bulk_update_bulk_mode(self):
+        """Test that bulk PATCH requests can be written with bulk_update."""
+        data = [
+            {"id": 1, "name": "one", "groups": [2]},
+            {"id": 2, "name": "two"},
+            {"id": 3, "last_name": "three"},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(
+                "/users/", json.dumps(data), content_type="application/json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        self.assertEqual(
+            ["one", "two", "2"],
+            [user["name"] for user in response.data["users"]],
+        )
+        updates = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith('UPDATE "tests_user"')
+        ]
+        self.assertEqual(1, len(updates), updates)
+        self.assertEqual(
+            [2], list(User.objects.get(pk=1).groups.values_list("pk", flat=True))
+        )
+        self.assertEqual("three", User.objects.get(pk=3).last_name)
+
+    @patch.object(UserViewSet, "BULK_UPDATE_MODE", "bulk")
+    def test_bulk_update_bulk_mode_non_concrete_field(self):
+        """Test that bulk mode updates non-concrete fields in a loop."""
+        data = [
+            {"id": 1, "favorite_pet": {"type": "dog", "id": 1}},
+            {"id": 2, "name": "two"},
+        ]
+        response = self.client.patch(
+            "/users/", json.dumps(data), content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        self.assertEqual(Dog.objects.get(pk=1), User.objects.get(pk=1).favorite_pet)
+        self.assertEqual("two", User.objects.get(pk=2).name)
+
+    @patch.object(UserViewSet, "ENABLE_PATCH_ALL", True)
+    @patch.object(
+        UserViewSet, "features", UserViewSet.features + (UserViewSet.PATCH_ALL,)
+    )
+    def test_patch_all_bulk_non_concrete_field(self):
+        """Test that patch-all in bulk updates non-concrete fields in a loop."""
+        User.objects.update(favorite_pet_id="1")
+        response = self.client.patch(
+            "/users/?patch-all=bulk",
+            json.dumps({"favorite_pet": None}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        content = json.loads(response.content.decode("utf-8"))
+        self.assertEqual(User.objects.count(), content["meta"]["updated"])
+        self.assertFalse(User.objects.filter(favorite_pet_id__isnull=False).exists())
+
+    @patch.object(
+        UserViewSet, "features", UserViewSet.features + (UserViewSet.BULK_UPDATE,)
+    )
+    def test_bulk_update_mode_per_request(self):
+        """Test the bulk update mode can be chosen per request."""
+        data = [{"id": 1, "name": "one"}, {"id": 2, "name": "two"}]
+        for mode, num_updates in (("bulk", 1), ("loop", 2)):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.patch(
+                    f"/users/?bulk-update={mode}",
+                    json.dumps(data),
+                    content_type="application/json",
+                )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            updates = [
+                query["sql"]
+                for query in queries
+                if query["sql"].startswith('UPDATE "tests_user"')
+            ]
+            self.assertEqual(num_updates, len(updates), updates)
+
+        response = self.client.patch(
+            "/users/?bulk-update=fast",
+            json.dumps(data),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_update_mode_requires_feature(self):
+        """Test the bulk update mode is not chosen by clients by default."""
+        self.assertNotIn(DogViewSet.BULK_UPDATE, DogViewSet.features)
+        data = [{"id": 1, "name": "one"}, {"id": 2, "name": "two"}]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(
+                "/dogs/?bulk-update=bulk",
+                json.dumps(data),
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        updates = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith('UPDATE "tests_dog"')
+        ]
+        self.assertEqual(2, len(updates), updates)
+
 
 class BulkCreationTestCase(TestCase):
     """Test case for bulk creation."""
@@ -361,6 +607,129 @@ class BulkCreationTestCase(TestCase):
         self.assertEqual(2, len(resp_data["users"]))
         self.assertEqual(2, len(resp_data["groups"]))
 
+    def test_post_bulk_resolves_related_once(self):
+        """Test related IDs of all posted resources are resolved together."""
+        users = [User.objects.create(name=f"user{i}", last_name="") for i in range(3)]
+        data = [
+            {"name": "foo", "members": [users[0].pk, users[1].pk]},
+            {"name": "bar", "members": [users[1].pk, str(users[2].pk)]},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                "/groups/", json.dumps(data), content_type="application/json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        user_queries = [
+            query["sql"]
+            for query in queries
+            if 'FROM "tests_user" WHERE "tests_user"."id"' in query["sql"]
+        ]
+        self.assertEqual(1, len(user_queries), user_queries)
+        self.assertEqual(
+            [users[1], users[2]],
+            list(Group.objects.get(name="bar").users.order_by("pk")),
+        )
+
+    def test_post_bulk_related_not_found(self):
+        """Test related IDs that do not exist are reported per resource."""
+        user = User.objects.create(name="foo", last_name="bar")
+        data = [
+            {"name": "foo", "members": [user.pk]},
+            {"name": "bar", "members": [user.pk, 999]},
+        ]
+        response = self.client.post(
+            "/groups/", json.dumps(data), content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(1, len(response.data["errors"]))
+        self.assertIn(
+            "Invalid value for 'members': User object with ID=999 not found",
+            response.data["errors"][0]["detail"],
+        )
+        self.assertEqual(0, Group.objects.count())
+
+    @patch.object(GroupViewSet, "ENABLE_BULK_CREATE", True)
+    def test_post_bulk_create(self):
+        """Test resources are inserted together in bulk creation mode."""
+        user = User.objects.create(name="foo", last_name="bar")
+        other = User.objects.create(name="qux", last_name="bar")
+        data = [
+            {"name": "foo", "members": [user.pk]},
+            {"name": "bar"},
+            {"name": "baz", "members": [user.pk, other.pk, user.pk]},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                "/groups/?include[]=members.",
+                json.dumps(data),
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        for table in ("tests_group", "tests_user_groups"):
+            inserts = [
+                query["sql"]
+                for query in queries
+                if query["sql"].startswith(f'INSERT INTO "{table}"')
+            ]
+            self.assertEqual(1, len(inserts), inserts)
+        self.assertEqual(
+            ["foo", "bar", "baz"], [group["name"] for group in response.data["groups"]]
+        )
+        self.assertEqual([user.pk], response.data["groups"][0]["members"])
+        self.assertEqual(
+            ["foo", "qux"], sorted(user["name"] for user in response.data["users"])
+        )
+        self.assertEqual([user], list(Group.objects.get(name="foo").users.all()))
+        self.assertEqual(
+            [user, other], list(Group.objects.get(name="baz").users.order_by("pk"))
+        )
+
+    @patch.object(GroupViewSet, "ENABLE_BULK_CREATE", True)
+    def test_post_bulk_create_with_errors(self):
+        """Test partial creation is respected in bulk creation mode."""
+        data = [{"name": "foo"}, {"name": "bar"}]
+        Group.objects.create(name="foo")
+        response = self.client.post(
+            "/groups/", json.dumps(data), content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(1, len(response.data["errors"]))
+        self.assertEqual(1, Group.objects.count())
+
+        with patch.object(GroupViewSet, "ENABLE_BULK_PARTIAL_CREATION", True):
+            response = self.client.post(
+                "/groups/", json.dumps(data), content_type="application/json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(["bar"], [group["name"] for group in response.data["groups"]])
+        self.assertEqual(
+            {"foo"}, {error["source"]["name"] for error in response.data["errors"]}
+        )
+        self.assertEqual(2, Group.objects.count())
+
+    @patch.object(GroupViewSet, "ENABLE_BULK_CREATE", True)
+    def test_post_bulk_create_with_duplicates(self):
+        """Test entries that conflict with each other in bulk creation mode."""
+        data = [{"name": "foo"}, {"name": "foo"}, {"name": "bar"}]
+        response = self.client.post(
+            "/groups/", json.dumps(data), content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(0, Group.objects.count())
+
+        with patch.object(GroupViewSet, "ENABLE_BULK_PARTIAL_CREATION", True):
+            response = self.client.post(
+                "/groups/", json.dumps(data), content_type="application/json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            ["foo", "bar"], [group["name"] for group in response.data["groups"]]
+        )
+        self.assertEqual(1, len(response.data["errors"]))
+        self.assertEqual(
+            ["foo", "bar"], list(Group.objects.values_list("name", flat=True))
+        )
+
 
 class BulkDeletionTestCase(TestCase):
     """Test case for bulk deletion."""
@@ -418,6 +787,56 @@ class BulkDeletionTestCase(TestCase):
         )
         self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
 
+    @patch.object(DogViewSet, "ENABLE_BULK_DELETE", True)
+    def test_bulk_delete_query(self):
+        """Test bulk delete with a single query."""
+        data = [{"id": i} for i in self.ids_to_delete]
+        for batch_size, deletes in ((None, 1), (1, 2)):
+            with patch.object(DogViewSet, "BULK_DELETE_BATCH_SIZE", batch_size):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.delete(
+                        "/dogs/", json.dumps(data), content_type="application/json"
+                    )
+            self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+            self.assertEqual(
+                deletes,
+                len([q for q in queries if q["sql"].startswith("DELETE")]),
+            )
+            self.assertEqual(Dog.objects.filter(id__in=self.ids_to_delete).count(), 0)
+            for dog in self.fixture.dogs[:2]:
+                dog.save()
+
+    @patch.object(DogViewSet, "ENABLE_BULK_DELETE", True)
+    def test_bulk_delete_query_permissions(self):
+        """Test bulk delete checks permissions before deleting."""
+        data = [{"id": i} for i in self.ids_to_delete]
+        with patch.object(
+            DogViewSet,
+            "check_object_permissions",
+            side_effect=[None, exceptions.PermissionDenied()],
+        ):
+            response = self.client.delete(
+                "/dogs/", json.dumps(data), content_type="application/json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(Dog.objects.filter(id__in=self.ids_to_delete).count(), 2)
+
+    def test_bulk_delete_lookup_field(self):
+        """Test bulk delete looks records up by the lookup field."""
+        data = [{"name": "Spike"}]
+        with patch.object(DogViewSet, "lookup_field", "name"):
+            response = self.client.delete(
+                "/dogs/", json.dumps(data), content_type="application/json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Dog.objects.filter(name="Spike").exists())
+        self.assertEqual(len(self.ids) - 2, Dog.objects.count())
+
+        response = self.client.delete(
+            "/dogs/", json.dumps(data), content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_delete_on_nonexistent_raises_404(self):
         """Test delete on nonexistent raises 404."""
         response = self.client.delete("/dogs/31415")